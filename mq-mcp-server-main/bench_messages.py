@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Microbenchmark the JSON-RPC hot path of raghi-sse-server.py.
+
+Starts fake_mqweb.py and the SSE server, then POSTs single JSON-RPC messages
+to /mcp/message (no session, so each answer comes back in the HTTP response)
+and reports requests/sec per method, plus the server's CPU time per request
+(Linux /proc), which stays meaningful when the client shares the machine. The
+result cache stays on, so tools/call measures the server's own request
+handling and serialization rather than mqweb:
+
+    python bench_messages.py --requests 5000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+
+from bench_servers import HERE, SSE_SERVER, drive, wait_until_up
+
+def cpu_seconds(pid: int):
+    """User plus system CPU time of a process (Linux /proc), or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+MESSAGES = {
+    "ping": {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+    "tools/list": {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+    "tools/call": {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "runmqsc", "arguments": {"qmgr_name": "QM1", "mqsc_command": "DISPLAY QUEUE(*) ALL"}}},
+}
+
+
+async def main(args):
+    fake = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_mqweb.py"), "--port", str(args.mqweb_port),
+                             "--objects", str(args.objects)])
+    env = dict(os.environ, MQ_URL=f"http://127.0.0.1:{args.mqweb_port}/ibmmq/rest/v2/admin/", PORT=str(args.sse_port))
+    server = subprocess.Popen([sys.executable, SSE_SERVER], env=env, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.sse_port}"
+    results = {}
+    try:
+        async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            await wait_until_up(client, f"http://127.0.0.1:{args.mqweb_port}/fake/stats")
+            await wait_until_up(client, f"{url}/health")
+            for method in args.methods:
+                body = json.dumps(MESSAGES[method]).encode()
+
+                async def call():
+                    response = await client.post(f"{url}/mcp/message", content=body, headers={"Content-Type": "application/json"})
+                    return response.status_code == 200 and "result" in response.json()
+
+                await drive(call, args.warmup, args.concurrency)
+                cpu_before = cpu_seconds(server.pid)
+                r = results[method] = await drive(call, args.requests, args.concurrency)
+                cpu_after = cpu_seconds(server.pid)
+                r["server_cpu_us"] = round((cpu_after - cpu_before) / args.requests * 1e6, 1) if cpu_before is not None else None
+                if not args.json:
+                    print(f"{method:11} {r['throughput_rps']:>9} req/s  p50 {r['p50_ms']:>7} ms  p99 {r['p99_ms']:>7} ms  "
+                          f"server cpu {r['server_cpu_us']} us/req  errors {r['errors']}")
+    finally:
+        for process in (server, fake):
+            process.terminate()
+            process.wait()
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--methods", nargs="+", choices=list(MESSAGES), default=list(MESSAGES))
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=50, help="MQ objects in the cached runmqsc listing")
+    parser.add_argument("--mqweb-port", type=int, default=9480)
+    parser.add_argument("--sse-port", type=int, default=9481)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Benchmark the MCP server entry points against fake_mqweb.py.
+
+Starts a fake mqweb, then each server in turn (mqmcpserver.py and
+raghi_mcp_server.py over stdio, raghi-sse-server.py over HTTP), calls one tool
+repeatedly at a fixed concurrency and reports throughput, p50/p99 latency and
+the server's peak RSS:
+
+    python bench_servers.py --requests 2000 --concurrency 16 --latency-ms 5 --objects 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SSE_SERVER = os.path.join(HERE, "..", "raghi-sse-server.py")
+
+TARGETS = {
+    "mqmcpserver": ("stdio", os.path.join(HERE, "mqmcpserver.py")),
+    "raghi-stdio": ("stdio", os.path.join(HERE, "raghi_mcp_server.py")),
+    "raghi-sse": ("http", SSE_SERVER),
+}
+
+WORKLOADS = {
+    "dspmq": {},
+    "runmqsc": {"qmgr_name": "QM1", "mqsc_command": "DISPLAY QUEUE(*) ALL"},
+    "list_queues": {"qmgr_name": "QM1"},
+    "get_queue_depth": {"qmgr_name": "QM1", "queue_name": "BENCH.QUEUE.00001"},
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def peak_rss_mb(pid: int):
+    """Peak resident set size of a process (Linux /proc), or None."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def child_pids() -> set:
+    pids = set()
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    if int(stat.read().rsplit(")", 1)[1].split()[1]) == os.getpid():
+                        pids.add(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return pids
+
+
+async def drive(call, requests: int, concurrency: int) -> dict:
+    """Run call() requests times with at most concurrency in flight."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                if not await call():
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def bench_stdio(script: str, env: dict, tool: str, arguments: dict, args) -> dict:
+    before = child_pids()
+    params = StdioServerParameters(command=sys.executable, args=[script], env=env, cwd=HERE)
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write), ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call():
+                result = await session.call_tool(tool, arguments)
+                return not result.isError and not result.content[0].text.startswith("Error:")
+
+            await drive(call, args.warmup, args.concurrency)
+            report = await drive(call, args.requests, args.concurrency)
+            pids = child_pids() - before
+            report["peak_rss_mb"] = max((peak_rss_mb(pid) or 0 for pid in pids), default=None)
+    return report
+
+
+async def bench_http(script: str, env: dict, tool: str, arguments: dict, args) -> dict:
+    env = dict(env, PORT=str(args.sse_port))
+    process = subprocess.Popen([sys.executable, script], env=env, cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.sse_port}"
+    try:
+        async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            await wait_until_up(client, f"{url}/health")
+            message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": tool, "arguments": arguments}}
+
+            async def call():
+                response = await client.post(f"{url}/mcp/message", json=message)
+                body = response.json()
+                return response.status_code == 200 and "result" in body and not body["result"]["content"][0]["text"].startswith("Error:")
+
+            await drive(call, args.warmup, args.concurrency)
+            report = await drive(call, args.requests, args.concurrency)
+            report["peak_rss_mb"] = peak_rss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+    return report
+
+
+async def wait_until_up(client: httpx.AsyncClient, url: str, timeout: float = 30, poll: float = 0.1):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(poll)
+
+
+async def main(args):
+    fake = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_mqweb.py"), "--port", str(args.mqweb_port),
+                             "--latency-ms", str(args.latency_ms), "--objects", str(args.objects),
+                             "--payload-bytes", str(args.payload_bytes)])
+    env = dict(os.environ, MQ_URL=f"http://127.0.0.1:{args.mqweb_port}/ibmmq/rest/v2/admin/",
+               MQ_CACHE="true" if args.cache else "false", MCP_SSE_WORKERS=str(args.sse_workers))
+    results = {}
+    try:
+        async with httpx.AsyncClient() as client:
+            await wait_until_up(client, f"http://127.0.0.1:{args.mqweb_port}/fake/stats")
+        for name in args.targets:
+            kind, script = TARGETS[name]
+            if not os.path.exists(script):
+                print(f"{name}: {script} not found, skipped", file=sys.stderr)
+                continue
+            if name == "mqmcpserver" and args.tool not in ("dspmq", "runmqsc"):
+                print(f"{name}: no {args.tool} tool, skipped", file=sys.stderr)
+                continue
+            bench = bench_stdio if kind == "stdio" else bench_http
+            results[name] = await bench(script, env, args.tool, WORKLOADS[args.tool], args)
+            if not args.json:
+                r = results[name]
+                print(f"{name:12} {r['throughput_rps']:>9} req/s  p50 {r['p50_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  "
+                      f"rss {r['peak_rss_mb']} MB  errors {r['errors']}")
+    finally:
+        fake.terminate()
+        fake.wait()
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--tool", choices=list(WORKLOADS), default="runmqsc")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=2, help="fake mqweb delay per request")
+    parser.add_argument("--objects", type=int, default=50, help="MQ objects per fake mqweb listing")
+    parser.add_argument("--payload-bytes", type=int, default=100, help="approximate size of each object")
+    parser.add_argument("--cache", action="store_true", help="leave the result cache on (off by default so every call reaches mqweb)")
+    parser.add_argument("--mqweb-port", type=int, default=9480)
+    parser.add_argument("--sse-port", type=int, default=9481)
+    parser.add_argument("--sse-workers", type=int, default=1, help="worker processes of raghi-sse-server.py")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Benchmark server startup: time from spawn to the first answers.
+
+Starts fake_mqweb.py, then launches each server --runs times and measures,
+from the moment the process is spawned, when it answers initialize, then
+tools/list, then its first tool call (dspmq, which has to reach mqweb). The
+stdio servers are driven with raw JSON-RPC lines, so no MCP client start-up
+is included; raghi-sse-server.py is driven over HTTP once /health answers:
+
+    python bench_startup.py --runs 10 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench_servers import HERE, TARGETS, wait_until_up
+
+INITIALIZE = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+              "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}}}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+TOOLS_LIST = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+TOOLS_CALL = {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": "dspmq", "arguments": {}}}
+
+
+async def start_stdio(script: str, env: dict) -> dict:
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(sys.executable, script, env=env, cwd=HERE, stdin=subprocess.PIPE,
+                                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    async def ask(message: dict) -> float:
+        process.stdin.write(json.dumps(message).encode() + b"\n")
+        await process.stdin.drain()
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                raise RuntimeError("server exited")
+            if json.loads(line).get("id") == message["id"]:
+                return (time.perf_counter() - started) * 1000
+
+    try:
+        timings = {"initialize_ms": await ask(INITIALIZE)}
+        process.stdin.write(json.dumps(INITIALIZED).encode() + b"\n")
+        timings["tools_list_ms"] = await ask(TOOLS_LIST)
+        timings["first_call_ms"] = await ask(TOOLS_CALL)
+    finally:
+        process.kill()
+        await process.wait()
+    return timings
+
+
+async def start_http(script: str, env: dict, port: int) -> dict:
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script], env=dict(env, PORT=str(port)), cwd=HERE,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(timeout=60) as client:
+            await wait_until_up(client, f"{url}/health", poll=0.01)
+            timings = {"ready_ms": (time.perf_counter() - started) * 1000}
+            for key, message in (("initialize_ms", INITIALIZE), ("tools_list_ms", TOOLS_LIST), ("first_call_ms", TOOLS_CALL)):
+                (await client.post(f"{url}/mcp/message", json=message)).raise_for_status()
+                timings[key] = (time.perf_counter() - started) * 1000
+    finally:
+        process.terminate()
+        process.wait()
+    return timings
+
+
+async def main(args):
+    fake = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_mqweb.py"), "--port", str(args.mqweb_port),
+                             "--latency-ms", str(args.latency_ms)])
+    env = dict(os.environ, MQ_URL=f"http://127.0.0.1:{args.mqweb_port}/ibmmq/rest/v2/admin/")
+    results = {}
+    try:
+        async with httpx.AsyncClient() as client:
+            await wait_until_up(client, f"http://127.0.0.1:{args.mqweb_port}/fake/stats")
+        for name in args.targets:
+            kind, script = TARGETS[name]
+            runs = []
+            for _ in range(args.runs):
+                runs.append(await (start_stdio(script, env) if kind == "stdio" else start_http(script, env, args.sse_port)))
+            results[name] = {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+            if not args.json:
+                print(f"{name:12} " + "  ".join(f"{key[:-3]} {value:>7} ms" for key, value in results[name].items()))
+    finally:
+        fake.terminate()
+        fake.wait()
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--runs", type=int, default=5, help="starts per server; medians are reported")
+    parser.add_argument("--latency-ms", type=float, default=50, help="fake mqweb delay per request")
+    parser.add_argument("--mqweb-port", type=int, default=9480)
+    parser.add_argument("--sse-port", type=int, default=9481)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Local stand-in for the mqweb admin REST API, for benchmarks.
+
+Serves qmgr/, action/qmgr/{qmgr}/mqsc (runCommand and runCommandJSON) and
+qmgr/{qmgr}/queue over plain HTTP with a configurable delay and response size,
+so the MCP servers can be load tested without a queue manager:
+
+    python fake_mqweb.py --port 9480 --latency-ms 5 --objects 100 --payload-bytes 200
+    MQ_URL=http://localhost:9480/ibmmq/rest/v2/admin/ python raghi_mcp_server.py
+"""
+import argparse
+import asyncio
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY = float(os.getenv("FAKE_MQWEB_LATENCY_MS", "0")) / 1000
+OBJECTS = int(os.getenv("FAKE_MQWEB_OBJECTS", "10"))
+PAYLOAD_BYTES = int(os.getenv("FAKE_MQWEB_PAYLOAD_BYTES", "100"))
+QMGRS = os.getenv("FAKE_MQWEB_QMGRS", "QM1,QM2").split(",")
+
+app = FastAPI()
+requests = {"count": 0}
+
+
+def _queue_name(i: int) -> str:
+    return f"BENCH.QUEUE.{i:05d}"
+
+
+def _padding() -> str:
+    # Filler description so each object is roughly PAYLOAD_BYTES long
+    return "X" * max(0, PAYLOAD_BYTES - 60)
+
+
+async def _delay():
+    requests["count"] += 1
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+
+
+@app.get("/ibmmq/rest/v2/admin/qmgr/")
+async def qmgr():
+    await _delay()
+    return {"qmgr": [{"name": name, "state": "running"} for name in QMGRS]}
+
+
+@app.get("/ibmmq/rest/v2/admin/qmgr/{qmgr_name}/queue")
+async def queues(qmgr_name: str):
+    await _delay()
+    return {"queue": [{"name": _queue_name(i), "type": "local", "description": _padding()} for i in range(OBJECTS)]}
+
+
+@app.post("/ibmmq/rest/v2/admin/qmgr/{qmgr_name}/queue")
+async def create_queue(qmgr_name: str):
+    await _delay()
+    return JSONResponse(None, status_code=201)
+
+
+@app.post("/ibmmq/rest/v2/admin/action/qmgr/{qmgr_name}/mqsc")
+async def mqsc(qmgr_name: str, request: Request):
+    await _delay()
+    body = await request.json()
+    if body.get("type") == "runCommandJSON":
+        responses = [{"completionCode": 0, "reasonCode": 0,
+                      "parameters": {"queue": _queue_name(i), "type": "QLOCAL", "curdepth": i, "descr": _padding()}}
+                     for i in range(OBJECTS)]
+    else:
+        responses = [{"completionCode": 0, "reasonCode": 0,
+                      "text": ["AMQ8409I: Display Queue details.",
+                               f"   QUEUE({_queue_name(i)})   TYPE(QLOCAL)   CURDEPTH({i})",
+                               f"   DESCR({_padding()})"]}
+                     for i in range(OBJECTS)]
+    return {"commandResponse": responses, "overallCompletionCode": 0, "overallReasonCode": 0}
+
+
+@app.get("/fake/stats")
+async def stats():
+    return {"requests": requests["count"]}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=9480)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY * 1000)
+    parser.add_argument("--objects", type=int, default=OBJECTS, help="MQ objects per listing")
+    parser.add_argument("--payload-bytes", type=int, default=PAYLOAD_BYTES, help="Approximate size of each object")
+    parser.add_argument("--qmgrs", default=",".join(QMGRS), help="Comma-separated queue manager names")
+    args = parser.parse_args()
+    LATENCY, OBJECTS, PAYLOAD_BYTES, QMGRS = args.latency_ms / 1000, args.objects, args.payload_bytes, args.qmgrs.split(",")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
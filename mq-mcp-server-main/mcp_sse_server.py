@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import asyncio
 import json
-import httpx
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+import mqrest
+import sse_sessions
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
@@ -14,6 +15,7 @@ PASSWORD = "passw0rd"
 
 app = FastAPI()
 server = Server("ibm-mq-server")
+sessions = sse_sessions.SessionRegistry()
 
 @server.list_tools()
 async def list_tools():
@@ -54,34 +56,29 @@ async def dspmq():
     try:
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
         url = URL_BASE + "qmgr/"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for qmgr in data['qmgr']:
-                result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
-            return result
+        response = await client.request("GET", url, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        result = "\n---\n"
+        for qmgr in data['qmgr']:
+            result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
 async def runmqsc(qmgr_name: str, mqsc_command: str):
     try:
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "a"}
-        data = json.dumps({"type": "runCommand", "parameters": {"command": mqsc_command}})
+        data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
         url = URL_BASE + f"action/qmgr/{qmgr_name}/mqsc"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.post(url, data=data, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for cmd in data['commandResponse']:
-                result += cmd['text'][0] + "\n---\n"
-            return result
+        result = "\n---\n"
+        async for cmd in client.stream("POST", url, data, headers=headers):
+            result += cmd['text'][0] + "\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -97,6 +94,8 @@ async def mcp_message_handler(message: dict):
                 "serverInfo": {"name": "ibm-mq-server", "version": "1.0.0"}
             }
         }
+    elif message.get("method") == "ping":
+        return {"jsonrpc": "2.0", "id": message.get("id"), "result": {}}
     elif message.get("method") == "tools/list":
         tools = await list_tools()
         return {
@@ -121,48 +120,34 @@ async def mcp_message_handler(message: dict):
             "error": {"code": -32601, "message": "Method not found"}
         }
 
-async def sse_stream():
-    """SSE stream for MCP communication"""
-    yield "data: " + json.dumps({"type": "connection", "status": "connected"}) + "\n\n"
-    
-    # Keep connection alive
-    while True:
-        await asyncio.sleep(30)
-        yield "data: " + json.dumps({"type": "ping", "timestamp": asyncio.get_event_loop().time()}) + "\n\n"
-
 @app.get("/sse")
-async def mcp_sse():
+async def mcp_sse(request: Request):
     """SSE endpoint for MCP communication"""
+    # A client reconnecting after a dropped stream resumes its session from Last-Event-ID
+    last_event_id = request.headers.get("last-event-id")
+    session = await sessions.open(last_event_id)
     return StreamingResponse(
-        sse_stream(),
+        sessions.stream(session, "/mcp/message", last_event_id),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*"
-        }
+        headers=sse_sessions.SSE_HEADERS
     )
 
 @app.get("/mcp/sse")
-async def mcp_sse_alt():
+async def mcp_sse_alt(request: Request):
     """Alternative SSE endpoint for MCP communication"""
-    return StreamingResponse(
-        sse_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*"
-        }
-    )
+    return await mcp_sse(request)
 
 @app.post("/mcp/message")
-async def mcp_message(message: dict):
-    """Handle MCP messages via POST"""
-    response = await mcp_message_handler(message)
-    return response
+async def mcp_message(message: dict | list = Body(), session_id: str = None):
+    """Handle MCP messages (or JSON-RPC batches) via POST, answering on the session's SSE stream when one is given"""
+    if session_id is None:
+        response = await sse_sessions.dispatch(message, mcp_message_handler)
+        return Response(status_code=202) if response is None else response
+    session = sessions.get(session_id)
+    if session is None:
+        return JSONResponse({"error": f"Unknown session: {session_id}"}, status_code=404)
+    sessions.submit(session, message, mcp_message_handler)
+    return Response(status_code=202)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Minimal MCP stdio transport for tools-only servers, for fast start-up.
+
+MCP hosts start a stdio server per session, and importing the mcp package
+alone takes most of a second. This transport speaks just what a tools-only
+server needs - initialize, ping, tools/list, tools/call and notifications - as
+newline-delimited JSON-RPC on stdin/stdout, using only the standard library.
+Requests are handled concurrently and each response is written as soon as it
+is ready, so a slow tool call does not hold up a ping or tools/list.
+"""
+import asyncio
+import sys
+
+import sse_sessions
+
+PROTOCOL_VERSIONS = ("2024-11-05", "2025-03-26", "2025-06-18")
+MAX_LINE = 64 * 1024 * 1024
+
+
+def _result(request_id, result: dict) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def message_handler(name: str, version: str, tools: list, run_tool):
+    """JSON-RPC handler answering from a static tools/list catalogue and run_tool(name, arguments) -> str."""
+
+    async def handle(message: dict):
+        method = message.get("method")
+        request_id = message.get("id")
+        if method == "initialize":
+            requested = (message.get("params") or {}).get("protocolVersion")
+            return _result(request_id, {
+                "protocolVersion": requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[-1],
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": name, "version": version},
+            })
+        if method == "ping":
+            return _result(request_id, {})
+        if method == "tools/list":
+            return _result(request_id, {"tools": tools})
+        if method == "tools/call":
+            params = message.get("params") or {}
+            try:
+                text = await run_tool(params.get("name"), params.get("arguments") or {})
+            except Exception as e:
+                # As the mcp package does: a failing tool is a tool result, not a protocol error
+                return _result(request_id, {"content": [{"type": "text", "text": str(e)}], "isError": True})
+            return _result(request_id, {"content": [{"type": "text", "text": text}]})
+        if request_id is None:
+            return None
+        return sse_sessions.error_response(request_id, -32601, "Method not found")
+
+    return handle
+
+
+def _write(response):
+    sys.stdout.buffer.write(sse_sessions.dumps(response) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+async def serve(handler):
+    """Read JSON-RPC messages (or batches) from stdin until EOF, answering each on stdout."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    tasks = set()
+
+    async def respond(message):
+        try:
+            response = await sse_sessions.dispatch(message, handler)
+        except Exception as e:
+            response = sse_sessions.error_response(message.get("id"), -32603, str(e))
+        # Notifications (no id) never get a response
+        if response is not None and not (isinstance(message, dict) and message.get("id") is None):
+            _write(response)
+
+    while line := await reader.readline():
+        if not line.strip():
+            continue
+        try:
+            message = sse_sessions.loads(line)
+        except ValueError as e:
+            _write(sse_sessions.error_response(None, -32700, f"Parse error: {e}"))
+            continue
+        if not isinstance(message, (dict, list)):
+            _write(sse_sessions.error_response(None, -32600, "Invalid Request"))
+            continue
+        task = asyncio.create_task(respond(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    # stdin closed: let calls already started finish
+    await asyncio.gather(*tasks)
@@ -2,7 +2,7 @@
 import asyncio
 import json
 import sys
-import httpx
+import mqrest
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
@@ -52,16 +52,15 @@ async def dspmq():
     try:
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
         url = URL_BASE + "qmgr/"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for qmgr in data['qmgr']:
-                result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
-            return result
+        response = await client.request("GET", url, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        result = "\n---\n"
+        for qmgr in data['qmgr']:
+            result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -70,16 +69,15 @@ async def runmqsc(qmgr_name: str, mqsc_command: str):
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "a"}
         data = json.dumps({"type": "runCommand", "parameters": {"command": mqsc_command}})
         url = URL_BASE + f"action/qmgr/{qmgr_name}/mqsc"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.post(url, data=data, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for cmd in data['commandResponse']:
-                result += cmd['text'][0] + "\n---\n"
-            return result
+        response = await client.request("POST", url, content=data, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        result = "\n---\n"
+        for cmd in data['commandResponse']:
+            result += cmd['text'][0] + "\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Admission control and priority scheduling for tool calls.
+
+Every tool call is classed by what it asks of the queue manager:
+- control - START/STOP/PING/DEFINE/ALTER/DELETE/CLEAR/REFRESH and message puts/gets
+- point   - reads of one named object, e.g. get_queue_depth, DISPLAY QLOCAL(X)
+- scan    - listings and generic DISPLAY commands, e.g. DISPLAY QUEUE(*) ALL
+
+At most QMGR_CONCURRENCY calls run against a queue manager at once; when the
+limit is reached, waiting calls are admitted control first, then point reads,
+then scans (first come, first served within a class). Independently, requests
+to each mqweb host are paced by a token bucket of RATE_LIMIT requests per
+second (bursts of RATE_BURST), handing out tokens in the same priority order.
+The class of the running tool call travels with it in a context variable, so
+its mqweb requests wait at the priority of the call that issued them.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import mqcache
+import mqmetrics
+
+QMGR_CONCURRENCY = int(os.getenv("MQ_QMGR_CONCURRENCY", "8"))
+RATE_LIMIT = float(os.getenv("MQ_RATE_LIMIT", "0"))
+RATE_BURST = int(os.getenv("MQ_RATE_BURST", str(max(1, int(RATE_LIMIT)))))
+
+CONTROL, POINT, SCAN = 0, 1, 2
+PRIORITY_NAMES = ("control", "point", "scan")
+
+TOOL_PRIORITIES = {
+    "start_channel": CONTROL, "stop_channel": CONTROL, "ping_channel": CONTROL,
+    "create_queue": CONTROL, "delete_queue": CONTROL, "clear_queue": CONTROL, "refresh_security": CONTROL,
+    "put_message": CONTROL, "get_message": CONTROL,
+    "dspmq": POINT, "get_queue_depth": POINT, "get_queue_stats": POINT, "get_channel_status": POINT,
+    "display_auth": POINT, "browse_messages": POINT,
+    "list_queues": SCAN, "list_channels": SCAN, "list_connections": SCAN, "bulk_put_messages": SCAN,
+}
+# DISPLAY commands without an object name that still return a single object
+SINGLE_OBJECT_TYPES = {"QMGR", "QMSTATUS", "PUBSUB"}
+
+# Work done outside a tool call (e.g. queue status sweeps) waits behind everything else
+PRIORITY = contextvars.ContextVar("mq_priority", default=SCAN)
+
+
+def command_priority(mqsc_command: str) -> int:
+    verb, object_type, name = mqcache.parse(mqcache.normalize(mqsc_command or ""))
+    if verb != "DISPLAY":
+        return CONTROL
+    if object_type in SINGLE_OBJECT_TYPES or (name and "*" not in name):
+        return POINT
+    return SCAN
+
+
+def request_class(method: str, path: str, data: dict = None) -> str:
+    """Class name (control, point or scan) of one mqweb request, from its MQSC command or REST path."""
+    if isinstance(data, dict) and "/mqsc" in path:
+        if data.get("type") == "runCommandJSON":
+            return PRIORITY_NAMES[command_priority(mqcache.json_command_text(data))]
+        return PRIORITY_NAMES[command_priority(data.get("parameters", {}).get("command"))]
+    if method != "GET":
+        return PRIORITY_NAMES[CONTROL]
+    # qmgr/QM1/queue lists every queue, as does a generic ?name=Q*
+    url = urlsplit(path)
+    segments = [s for s in url.path.split("/") if s]
+    name = parse_qs(url.query).get("name", [""])[0]
+    if "qmgr" in segments and len(segments) - segments.index("qmgr") == 3 and (not name or "*" in name):
+        return PRIORITY_NAMES[SCAN]
+    return PRIORITY_NAMES[POINT]
+
+
+def priority_of(tool: str, arguments: dict):
+    """Priority class of a tool call, or None for calls that are not scheduled (batch, server_stats)."""
+    if tool == "runmqsc":
+        return command_priority(arguments.get("mqsc_command"))
+    return TOOL_PRIORITIES.get(tool)
+
+
+class _Waiters:
+    """Futures waiting for a slot or token, woken in (priority, arrival) order."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._heap = []
+        self._order = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def push(self, priority: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._order), future))
+        return future
+
+    async def wait(self, future: asyncio.Future, priority: int, on_abandon):
+        """Wait to be woken; on_abandon() gives back a slot granted to a caller that was cancelled meanwhile."""
+        with mqmetrics.SCHEDULER_QUEUED.track(stage=self.stage, priority=PRIORITY_NAMES[priority]):
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    on_abandon()
+                raise
+
+    def wake(self) -> bool:
+        """Wake the first live waiter; False if there is none."""
+        while self._heap:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(None)
+                return True
+        return False
+
+
+class PrioritySemaphore:
+    def __init__(self, limit: int, stage: str = "admission"):
+        self.limit = limit
+        self.active = 0
+        self._waiters = _Waiters(stage)
+
+    async def acquire(self, priority: int):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        await self._waiters.wait(self._waiters.push(priority), priority, self.release)
+
+    def release(self):
+        # A woken waiter takes over the slot
+        if not self._waiters.wake():
+            self.active -= 1
+
+
+class TokenBucket:
+    """rate tokens per second, up to burst saved; rate <= 0 means unlimited."""
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: int = RATE_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._waiters = _Waiters("rate_limit")
+        self._timer = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: int = None):
+        if self.rate <= 0:
+            return
+        self._refill()
+        if self.tokens >= 1 and not self._waiters:
+            self.tokens -= 1
+            return
+        priority = PRIORITY.get() if priority is None else priority
+        started = time.perf_counter()
+        future = self._waiters.push(priority)
+        self._schedule()
+        try:
+            await self._waiters.wait(future, priority, self._give_back)
+        finally:
+            mqmetrics.SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started, stage="rate_limit",
+                                                     priority=PRIORITY_NAMES[priority])
+
+    def _give_back(self):
+        self.tokens += 1
+        self._schedule()
+
+    def _schedule(self):
+        if self._timer is None and self._waiters:
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._refill_and_wake)
+
+    def _refill_and_wake(self):
+        self._timer = None
+        self._refill()
+        while self.tokens >= 1 and self._waiters.wake():
+            self.tokens -= 1
+        self._schedule()
+
+
+class Scheduler:
+    """Per-queue manager concurrency limits with priority admission."""
+
+    def __init__(self, concurrency: int = QMGR_CONCURRENCY):
+        self.concurrency = concurrency
+        self._gates = {}
+        self.stats = {"admitted": 0, "queued": 0}
+
+    @asynccontextmanager
+    async def admit(self, tool: str, arguments: dict):
+        """Hold a slot on the call's queue manager for the enclosed block, at the call's priority."""
+        priority = priority_of(tool, arguments)
+        if priority is None or self.concurrency <= 0:
+            yield
+            return
+        qmgr = arguments.get("qmgr_name") or ""
+        gate = self._gates.get(qmgr)
+        if gate is None:
+            gate = self._gates[qmgr] = PrioritySemaphore(self.concurrency)
+        if gate.active >= gate.limit:
+            self.stats["queued"] += 1
+        started = time.perf_counter()
+        await gate.acquire(priority)
+        mqmetrics.SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started, stage="admission",
+                                                 priority=PRIORITY_NAMES[priority])
+        self.stats["admitted"] += 1
+        token = PRIORITY.set(priority)
+        try:
+            yield
+        finally:
+            PRIORITY.reset(token)
+            gate.release()
+
+    def snapshot(self) -> dict:
+        return dict(self.stats, concurrency=self.concurrency, rate_limit=RATE_LIMIT, rate_burst=RATE_BURST,
+                    running={qmgr: gate.active for qmgr, gate in self._gates.items() if gate.active})
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Run a list of tool invocations concurrently, bounded per queue manager."""
+import asyncio
+import os
+import time
+
+MAX_CONCURRENCY = int(os.getenv("MQ_BATCH_CONCURRENCY", "8"))
+MAX_CALLS = int(os.getenv("MQ_BATCH_MAX_CALLS", "1000"))
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "calls": {
+            "type": "array",
+            "description": "Tool invocations to run",
+            "items": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, "arguments": {"type": "object"}},
+                "required": ["name"],
+            },
+        },
+        "max_concurrency": {"type": "integer", "description": "Concurrent calls per queue manager", "default": MAX_CONCURRENCY},
+    },
+    "required": ["calls"],
+}
+
+
+async def run_batch(calls: list, invoke, max_concurrency: int = None) -> list:
+    """Run calls through invoke(name, arguments) and return per-call results in order.
+
+    Calls against the same queue manager (the qmgr_name argument) run at most
+    max_concurrency at a time; calls without one share a single limit.
+    """
+    if len(calls) > MAX_CALLS:
+        raise ValueError(f"Batch of {len(calls)} calls exceeds the limit of {MAX_CALLS}")
+    limit = max(1, max_concurrency or MAX_CONCURRENCY)
+    semaphores = {}
+
+    async def run_one(index: int, call: dict) -> dict:
+        problem = invalid_call(call)
+        if problem:
+            return {"index": index, "name": call.get("name") if isinstance(call, dict) else None, "status": "error",
+                    "elapsed_ms": 0.0, "result": problem}
+        name = call["name"]
+        arguments = call.get("arguments") or {}
+        semaphore = semaphores.setdefault(arguments.get("qmgr_name"), asyncio.Semaphore(limit))
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if name == "batch":
+                    raise ValueError("Nested batch calls are not supported")
+                result = await invoke(name, arguments)
+                status = "error" if result.startswith("Error:") else "ok"
+            except Exception as e:
+                result, status = str(e), "error"
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        return {"index": index, "name": name, "status": status, "elapsed_ms": elapsed_ms, "result": result}
+
+    return await asyncio.gather(*(run_one(i, call) for i, call in enumerate(calls)))
+
+
+def invalid_call(call) -> str:
+    """Why a batch entry cannot be run, or "" if it matches the calls item schema."""
+    if not isinstance(call, dict):
+        return "Each call must be an object with a name and arguments"
+    if not isinstance(call.get("name"), str):
+        return "Each call needs a tool name"
+    arguments = call.get("arguments") or {}
+    if not isinstance(arguments, dict):
+        return "Call arguments must be an object"
+    # Also the key of the call's concurrency limit
+    if not isinstance(arguments.get("qmgr_name"), (str, type(None))):
+        return "qmgr_name must be a string"
+    return ""
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Circuit breakers and adaptive timeouts for mqweb endpoints and queue managers.
+
+Each endpoint, and each queue manager behind it, has a Health record:
+- a circuit breaker that opens after FAILURES consecutive failures (timeouts,
+  connection errors, HTTP 5xx), rejects calls at once while open, lets a
+  single probe through after RESET_SECONDS (half-open) and closes again when
+  the probe succeeds. Timeouts and 5xx answers for one queue manager only
+  count against that queue manager, so one hung queue manager does not cut
+  off the others on the same mqweb;
+- latency windows whose high percentile, times TIMEOUT_MULTIPLIER, becomes the
+  timeout of the next call (between TIMEOUT_MIN and the endpoint's timeout), so
+  a hung queue manager is given up on long before the fixed 30s. Each command
+  class (see mqadmit.PRIORITY_NAMES) has its own window, so a DISPLAY QUEUE(*)
+  ALL is timed against earlier scans rather than against fast point reads.
+"""
+import collections
+import os
+import time
+
+import mqmetrics
+
+FAILURES = int(os.getenv("MQ_BREAKER_FAILURES", "5"))
+RESET_SECONDS = float(os.getenv("MQ_BREAKER_RESET", "30"))
+TIMEOUT_MULTIPLIER = float(os.getenv("MQ_TIMEOUT_MULTIPLIER", "4"))
+TIMEOUT_MIN = float(os.getenv("MQ_TIMEOUT_MIN", "2"))
+TIMEOUT_PERCENTILE = 0.99
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class Health:
+    """Breaker state and recent latencies of one endpoint or queue manager."""
+
+    def __init__(self, name: str, endpoint: str, qmgr: str = ""):
+        self.name = name
+        self.endpoint = endpoint
+        self.qmgr = qmgr
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_WINDOW))
+        mqmetrics.CIRCUIT_STATE.set(0, **self.labels)
+
+    @property
+    def labels(self) -> dict:
+        # Looked up each time: the queue manager may only turn out to exist after this record was made
+        return {"endpoint": self.endpoint, "qmgr": mqmetrics.qmgr_label(self.qmgr)}
+
+    def _set_state(self, state: str):
+        self.state = state
+        mqmetrics.CIRCUIT_STATE.set(STATE_VALUES[state], **self.labels)
+
+    def acquire(self):
+        """Raise CircuitOpenError if calls are rejected; otherwise admit the call (maybe as the probe)."""
+        if self.state == OPEN:
+            remaining = RESET_SECONDS - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                mqmetrics.CIRCUIT_REJECTIONS.inc(**self.labels)
+                raise CircuitOpenError(f"{self.name} is unavailable after {self.failures} consecutive failures; "
+                                       f"retrying in {remaining:.0f}s")
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self.probing:
+                mqmetrics.CIRCUIT_REJECTIONS.inc(**self.labels)
+                raise CircuitOpenError(f"{self.name} is unavailable; a probe request is in progress")
+            self.probing = True
+
+    def release(self):
+        """Give back an admitted call that was not made."""
+        self.probing = False
+
+    def record(self, ok: bool, elapsed: float = None, kind: str = "point"):
+        """Count the outcome of one upstream request (not of callers answered from the cache or by another's request)."""
+        self.probing = False
+        if ok:
+            if elapsed is not None:
+                self.latencies[kind].append(elapsed)
+            self.failures = 0
+            # Also reported when already closed, under the qmgr label the answer may just have made known
+            self._set_state(CLOSED)
+            return
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= FAILURES:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def timeout(self, ceiling: float, kind: str = "point") -> float:
+        """Timeout for the next call of a command class: a multiple of the class's recent high-percentile latency."""
+        latencies = self.latencies.get(kind, ())
+        if len(latencies) < MIN_SAMPLES:
+            return ceiling
+        ordered = sorted(latencies)
+        high = ordered[min(len(ordered) - 1, int(len(ordered) * TIMEOUT_PERCENTILE))]
+        return min(ceiling, max(TIMEOUT_MIN, high * TIMEOUT_MULTIPLIER))
+
+    def snapshot(self, ceiling: float) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures,
+                "timeout": {kind: round(self.timeout(ceiling, kind), 3) for kind in self.latencies},
+                "samples": {kind: len(latencies) for kind, latencies in self.latencies.items()}}
+
+
+def failure_kind(result: dict):
+    """Classify an mqrest result: None if healthy, "server" for HTTP 5xx, "transport" if mqweb never answered.
+
+    HTTP 4xx (unknown object, bad command, ...) is a healthy mqweb answering.
+    """
+    if "error" not in result:
+        return None
+    status = result.get("status")
+    if status is None:
+        return "transport"
+    return "server" if status >= 500 else None
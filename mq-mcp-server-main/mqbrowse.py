@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Paged, non-destructive browsing of deep queues through the v3 messaging API.
+
+Pages are walked with an opaque continuation token that records the last
+message ID returned, so each call only holds one page of messages and at most
+max_bytes of message bodies. The mqweb messagelist resource has no offset
+parameter, so each page lists summaries from the head of the queue up to the
+end of that page and skips what was already returned; MAX_DEPTH bounds how
+far a browse can walk, and a page that stops at it says so with truncated. Requests go through the queue manager's mqendpoints.Endpoint,
+so its circuit breakers and adaptive timeouts apply.
+"""
+import base64
+import json
+import os
+
+PAGE_SIZE = int(os.getenv("MQ_BROWSE_PAGE_SIZE", "50"))
+MAX_BYTES = int(os.getenv("MQ_BROWSE_MAX_BYTES", str(256 * 1024)))
+MAX_DEPTH = int(os.getenv("MQ_BROWSE_MAX_DEPTH", "10000"))
+
+BROWSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "qmgr_name": {"type": "string"},
+        "queue_name": {"type": "string"},
+        "page_size": {"type": "integer", "default": PAGE_SIZE},
+        "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+        "headers_only": {"type": "boolean", "default": False, "description": "Return message descriptors without bodies"},
+        "max_bytes": {"type": "integer", "default": MAX_BYTES, "description": "Cap on message body bytes per page"},
+    },
+    "required": ["qmgr_name", "queue_name"],
+}
+
+
+def encode_cursor(qmgr_name: str, queue_name: str, after: str, position: int) -> str:
+    state = json.dumps({"qmgr": qmgr_name, "queue": queue_name, "after": after, "position": position})
+    return base64.urlsafe_b64encode(state.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, qmgr_name: str, queue_name: str) -> dict:
+    if not isinstance(cursor, str):
+        raise ValueError("Invalid browse cursor")
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise ValueError("Invalid browse cursor")
+    if not isinstance(state, dict) or not isinstance(state.get("position"), int) or state["position"] < 0 or "after" not in state:
+        raise ValueError("Invalid browse cursor")
+    if state.get("qmgr") != qmgr_name or state.get("queue") != queue_name:
+        raise ValueError("Browse cursor belongs to a different queue")
+    return state
+
+
+async def browse_page(endpoint, qmgr_name: str, queue_name: str, cursor: str = None,
+                      page_size: int = PAGE_SIZE, headers_only: bool = False, max_bytes: int = MAX_BYTES) -> dict:
+    """Browse one page of messages on the endpoint serving qmgr_name, with the cursor for the next page.
+
+    truncated is True when the walk stopped at MAX_DEPTH with more messages
+    left on the queue (next_cursor is then None).
+    """
+    state = decode_cursor(cursor, qmgr_name, queue_name) if cursor else {"after": None, "position": 0}
+    page_size = max(1, min(page_size, MAX_DEPTH))
+    position = state["position"]
+    limit = min(position + page_size, MAX_DEPTH)
+    queue_path = f"qmgr/{qmgr_name}/queue/{queue_name}"
+    # At the cap, one more summary shows whether the queue goes on past it
+    listed = limit + 1 if limit == MAX_DEPTH else limit
+    listing = await endpoint.call("GET", f"{queue_path}/messagelist?limit={listed}", base_url=endpoint.messaging_url)
+    if "error" in listing:
+        return {"error": listing["error"]}
+    summaries = listing.get("messages", [])
+    beyond = len(summaries) > MAX_DEPTH
+    summaries = summaries[:limit]
+    start = position
+    if state["after"] is not None:
+        # Messages ahead of the cursor may have been consumed since the last page. If the
+        # cursor's own message is gone too, how many went is unknown: repeat rather than skip
+        ids = [summary.get("messageId") for summary in summaries]
+        start = ids.index(state["after"]) + 1 if state["after"] in ids else 0
+    page = summaries[start:start + page_size]
+
+    messages, used = [], 0
+    for summary in page:
+        message = dict(summary)
+        if not headers_only:
+            if used >= max_bytes:
+                break
+            try:
+                response = await endpoint.request("GET", f"{queue_path}/message", endpoint.messaging_url,
+                                                  params={"messageId": summary.get("messageId")})
+            except ValueError as e:
+                return {"error": str(e)}
+            if response.status_code == 200:
+                body = response.content[:max_bytes - used]
+                used += len(body)
+                message["body"] = body.decode("utf-8", errors="replace")
+                message["truncated"] = len(body) < len(response.content)
+            else:
+                message["body"] = None
+        messages.append(message)
+
+    position = start + len(messages)
+    more = position < len(summaries) or (len(summaries) == limit and limit < MAX_DEPTH)
+    next_cursor = encode_cursor(qmgr_name, queue_name, messages[-1].get("messageId"), position) if messages and more else None
+    return {"messages": messages, "count": len(messages), "bytes": used, "next_cursor": next_cursor,
+            "truncated": beyond and next_cursor is None}
+
+
+async def browse_all(endpoint, qmgr_name: str, queue_name: str, page_size: int = PAGE_SIZE,
+                     headers_only: bool = False, max_bytes: int = MAX_BYTES):
+    """Yield messages one at a time, walking the queue page by page; stopping at MAX_DEPTH yields an error."""
+    cursor = None
+    while True:
+        page = await browse_page(endpoint, qmgr_name, queue_name, cursor, page_size, headers_only, max_bytes)
+        if "error" in page:
+            yield page
+            return
+        for message in page["messages"]:
+            yield message
+        if page["truncated"]:
+            yield {"error": f"Browse stopped after {MAX_DEPTH} messages (MQ_BROWSE_MAX_DEPTH); the queue holds more"}
+            return
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""TTL result cache for read-only MQSC commands and REST queries.
+
+Entries are keyed by (queue manager, normalized command), expire after a TTL
+that depends on the kind of object queried, and are evicted least recently
+used first once the entry or byte budget is exceeded. Mutating commands drop
+every cached entry that refers to the same object.
+"""
+import fnmatch
+import os
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+ENABLED = os.getenv("MQ_CACHE", "true").lower() not in ("0", "false", "no")
+TTL_STATUS = float(os.getenv("MQ_CACHE_TTL_STATUS", "2"))
+TTL_CONFIG = float(os.getenv("MQ_CACHE_TTL_CONFIG", "30"))
+TTL_QMGR = float(os.getenv("MQ_CACHE_TTL_QMGR", "10"))
+TTL_DEFAULT = float(os.getenv("MQ_CACHE_TTL_DEFAULT", "5"))
+MAX_ENTRIES = int(os.getenv("MQ_CACHE_MAX_ENTRIES", "1024"))
+MAX_BYTES = int(os.getenv("MQ_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# MQSC verb abbreviations
+VERBS = {"DIS": "DISPLAY", "DEF": "DEFINE", "ALT": "ALTER", "DEL": "DELETE", "STA": "START"}
+
+# Object types that share cached state, e.g. DELETE QLOCAL(X) invalidates DISPLAY QSTATUS(X)
+FAMILIES = {
+    "QUEUE": "QUEUE", "Q": "QUEUE", "QLOCAL": "QUEUE", "QL": "QUEUE", "QALIAS": "QUEUE", "QA": "QUEUE",
+    "QREMOTE": "QUEUE", "QR": "QUEUE", "QMODEL": "QUEUE", "QM": "QUEUE", "QSTATUS": "QUEUE", "QS": "QUEUE",
+    "CHANNEL": "CHANNEL", "CHL": "CHANNEL", "CHSTATUS": "CHANNEL", "CHS": "CHANNEL",
+    "CONN": "CONN", "AUTHREC": "AUTHREC", "SECURITY": "AUTHREC", "QMGR": "QMGR",
+}
+STATUS_TYPES = {"QSTATUS", "QS", "CHSTATUS", "CHS", "CONN"}
+
+_COMMAND = re.compile(r"^(\w+)\s+(\w+)\s*(?:\(([^)]*)\))?")
+_AUTH_NAME = re.compile(r"\b(?:PROFILE|OBJNAME)\s*\(([^)]*)\)")
+_PARENS = re.compile(r"\s*([()])\s*")
+
+
+def normalize(command: str) -> str:
+    """Uppercase and collapse whitespace outside quoted strings, as MQSC does."""
+    parts = command.strip().split("'")
+    for i in range(0, len(parts), 2):
+        parts[i] = _PARENS.sub(r"\1", " ".join(parts[i].upper().split()))
+    return "'".join(parts)
+
+
+def parse(command: str):
+    """Return (verb, object type, object name) for a normalized MQSC command."""
+    match = _COMMAND.match(command)
+    if not match:
+        return None, None, None
+    verb, object_type, name = match.groups()
+    if object_type == "AUTHREC":
+        auth = _AUTH_NAME.search(command)
+        name = auth.group(1) if auth else None
+    return VERBS.get(verb, verb), object_type, (name.strip().strip("'") or None) if name else None
+
+
+def json_command_text(data: dict) -> str:
+    """MQSC-like text for a runCommandJSON request body, e.g. DISPLAY QUEUE(Q1) CURDEPTH."""
+    command = f"{data.get('command', '')} {data.get('qualifier', '')}".upper()
+    if data.get("name") is not None:
+        command += f"({data['name']})"
+    for key, value in sorted(data.get("parameters", {}).items()):
+        command += f" {key.upper()}({value})"
+    return command + "".join(f" {attribute.upper()}" for attribute in data.get("responseParameters", []))
+
+
+def describe(method: str, url: str, data: dict = None):
+    """Describe a REST call as (qmgr, command key, read only, object family, object name).
+
+    Returns None for calls the cache should neither serve nor invalidate on.
+    """
+    path = urlsplit(url).path
+    segments = [s for s in path.split("/") if s]
+    if "qmgr" not in segments:
+        return None
+    rest = segments[segments.index("qmgr") + 1:]
+    if not rest:
+        return "", f"{method} {url}", method == "GET", "QMGR", None
+    if len(rest) >= 2 and rest[1] == "mqsc" and data:
+        if data.get("type") == "runCommandJSON":
+            command = json_command_text(data)
+        else:
+            command = normalize(data.get("parameters", {}).get("command", ""))
+        verb, object_type, name = parse(command)
+        family = FAMILIES.get(object_type, object_type)
+        return rest[0], f"{data.get('type')} {command}", verb == "DISPLAY", family, name
+    if "action" in segments:
+        return None
+    qmgr = rest[0]
+    family = rest[1].upper() if len(rest) > 1 else "QMGR"
+    name = rest[2] if len(rest) > 2 else None
+    if "message" in rest or "messagelist" in rest:
+        # Message reads and browses are never cached but puts and destructive gets change queue depth
+        return (qmgr, None, False, "QUEUE", name) if method != "GET" else None
+    return qmgr, f"{method} {url}", method == "GET", FAMILIES.get(family, family), name
+
+
+def ttl_for(command: str, family: str) -> float:
+    _, object_type, _ = parse(command.partition(" ")[2])
+    if object_type in STATUS_TYPES or "CURDEPTH" in command:
+        return TTL_STATUS
+    if family == "QMGR" and object_type is None:
+        return TTL_QMGR
+    if family in ("QUEUE", "CHANNEL", "AUTHREC", "QMGR"):
+        return TTL_CONFIG
+    return TTL_DEFAULT
+
+
+def _matches(pattern, name) -> bool:
+    if pattern is None or name is None:
+        return True
+    return fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(pattern, name)
+
+
+class ResultCache:
+    """Bounded LRU cache of upstream results with per-entry expiry."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generations = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, qmgr: str, command: str):
+        entry = self._entries.get((qmgr, command))
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._drop((qmgr, command))
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end((qmgr, command))
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def generation(self, qmgr: str) -> int:
+        """Change counter for qmgr; take it before a read and pass it to put()."""
+        return self._generations.get(qmgr, 0)
+
+    def put(self, qmgr: str, command: str, value, size: int, family: str = None, name: str = None,
+            ttl: float = None, generation: int = None):
+        if size > self.max_bytes or (generation is not None and generation != self.generation(qmgr)):
+            # Too big, or a write to this qmgr completed while the read was in flight
+            return
+        key = (qmgr, command)
+        if key in self._entries:
+            self._drop(key)
+        expires = time.monotonic() + (ttl if ttl is not None else ttl_for(command, family))
+        self._entries[key] = (value, expires, family, name, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def invalidate(self, qmgr: str, family: str = None, name: str = None):
+        """Drop entries for qmgr that may refer to the given object (all of them if family is None)."""
+        self._generations[qmgr] = self.generation(qmgr) + 1
+        stale = [key for key, entry in self._entries.items()
+                 if key[0] == qmgr and (family is None or (entry[2] == family and _matches(entry[3], name)))]
+        for key in stale:
+            self._drop(key)
+        self.stats["invalidations"] += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[4]
+
+    def snapshot(self) -> dict:
+        return dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+
+
+RESULT_CACHE = ResultCache()
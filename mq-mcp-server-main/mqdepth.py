@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Background queue status snapshots per queue manager.
+
+The first depth or stats lookup for a queue manager starts a poller that
+sweeps every local queue with one DISPLAY QSTATUS(*) command each interval.
+Lookups are answered from the latest sweep, with its age, as long as it is
+younger than MAX_AGE and no write to that queue manager has gone through the
+server since; otherwise callers fall back to a live query. A poller stops
+after IDLE_TIMEOUT seconds without lookups. Only queue managers known to exist
+(ones that have answered, see mqmetrics.known_qmgr) are polled, so a mistyped name costs one live query
+rather than a sweep every interval.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import time
+
+import mqcache
+import mqmetrics
+import mqsc
+
+POLL_INTERVAL = float(os.getenv("MQ_DEPTH_POLL_INTERVAL", "5"))
+MAX_AGE = float(os.getenv("MQ_DEPTH_MAX_AGE", str(POLL_INTERVAL * 3)))
+IDLE_TIMEOUT = float(os.getenv("MQ_DEPTH_POLL_IDLE", "300"))
+
+SWEEP_COMMAND = "DISPLAY QSTATUS(*) TYPE(QUEUE) ALL"
+
+
+class Snapshot:
+    __slots__ = ("queues", "taken_at", "generation")
+
+    def __init__(self, queues: dict, taken_at: float, generation: int):
+        self.queues = queues
+        self.taken_at = taken_at
+        self.generation = generation
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+
+class DepthPoller:
+    """Queue status snapshots, refreshed by one background sweep per queue manager.
+
+    fetch(qmgr_name) runs SWEEP_COMMAND and returns an mqsc.MQObjects;
+    known(qmgr_name) says whether the queue manager may be polled.
+    """
+
+    def __init__(self, fetch, interval: float = POLL_INTERVAL, max_age: float = MAX_AGE, idle_timeout: float = IDLE_TIMEOUT,
+                 known=mqmetrics.is_known_qmgr):
+        self.fetch = fetch
+        self.known = known
+        self.interval = interval
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.snapshots = {}
+        self._tasks = {}
+        self._last_lookup = {}
+        self.stats = {"sweeps": 0, "sweep_errors": 0, "hits": 0, "misses": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def lookup(self, qmgr_name: str, queue_name: str):
+        """Return (attributes, age in seconds) for a queue, or None if the caller should query live."""
+        if not self.enabled or not isinstance(queue_name, str) or not queue_name:
+            return None
+        if not self.known(qmgr_name):
+            # The live query tells whether it exists; once it has answered, lookups start a poller
+            self.stats["misses"] += 1
+            return None
+        self._last_lookup[qmgr_name] = time.monotonic()
+        self._ensure_polling(qmgr_name)
+        snapshot = self.snapshots.get(qmgr_name)
+        if snapshot is None or snapshot.age > self.max_age or snapshot.generation != mqcache.RESULT_CACHE.generation(qmgr_name):
+            self.stats["misses"] += 1
+            return None
+        # Unquoted MQSC names are upper-cased by the queue manager
+        attributes = snapshot.queues.get(queue_name) or snapshot.queues.get(queue_name.upper())
+        if attributes is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return attributes, snapshot.age
+
+    def _ensure_polling(self, qmgr_name: str):
+        task = self._tasks.get(qmgr_name)
+        if task is None or task.done():
+            # A fresh context, so sweeps do not inherit the scheduling priority of the lookup that started them
+            self._tasks[qmgr_name] = asyncio.create_task(self._poll(qmgr_name), context=contextvars.Context())
+
+    async def _poll(self, qmgr_name: str):
+        while time.monotonic() - self._last_lookup.get(qmgr_name, 0) < self.idle_timeout:
+            await self.sweep(qmgr_name)
+            await asyncio.sleep(self.interval)
+        self.snapshots.pop(qmgr_name, None)
+        self._last_lookup.pop(qmgr_name, None)
+        self._tasks.pop(qmgr_name, None)
+
+    async def sweep(self, qmgr_name: str):
+        """Fetch the status of every local queue on qmgr_name into a new snapshot."""
+        generation = mqcache.RESULT_CACHE.generation(qmgr_name)
+        try:
+            objects = await self.fetch(qmgr_name)
+        except Exception as e:
+            objects = mqsc.MQObjects(errors=[{"error": str(e)}])
+        if objects.errors and not len(objects):
+            self.stats["sweep_errors"] += 1
+            print(f"Queue status sweep of {qmgr_name} failed: {objects.errors[0]}", file=sys.stderr)
+            return
+        self.stats["sweeps"] += 1
+        queues = {attributes.get("queue"): attributes for attributes in objects}
+        self.snapshots[qmgr_name] = Snapshot(queues, time.monotonic(), generation)
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def snapshot_stats(self) -> dict:
+        return dict(self.stats, snapshots={qmgr: {"queues": len(s.queues), "age_seconds": round(s.age, 3)}
+                                           for qmgr, s in self.snapshots.items()})
+
+
+def format_status(attributes: dict, age: float, output_format: str = "text", keys: tuple = None) -> str:
+    """Render snapshot attributes like a one-object MQSC result, noting the snapshot age.
+
+    keys limits the output to those attributes (plus the queue name), e.g. ("curdepth",).
+    """
+    if keys:
+        attributes = {key: attributes[key] for key in ("queue",) + tuple(keys) if key in attributes}
+    if output_format == "text":
+        fields = "  ".join(f"{key.upper()}({value})" for key, value in attributes.items())
+        return f"\n---\n{fields}\n---\n(from queue status snapshot, {age:.1f}s old)\n"
+    objects = mqsc.MQObjects(tuple(attributes), [tuple(attributes.values())])
+    result = objects.to_dict(output_format)
+    result["snapshot_age_seconds"] = round(age, 3)
+    return json.dumps(result)
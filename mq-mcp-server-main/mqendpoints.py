@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Registry of mqweb endpoints, routing each queue manager to the host serving it.
+
+MQ_ENDPOINTS is a JSON list (or the path of a JSON file) of endpoints:
+
+    [{"name": "east", "url": "https://mq-east:9443/ibmmq/rest/v2/admin/",
+      "user": "admin", "password": "passw0rd", "timeout": 10, "qmgrs": ["QM1", "QM2"]},
+     {"name": "west", "url": "https://mq-west:9443/ibmmq/rest/v2/admin/"}]
+
+Each endpoint gets its own pooled client (mqrest pools per host and user).
+Queue managers not listed under "qmgrs" are found by asking every endpoint
+for its queue managers, and the answer is remembered; one that no endpoint
+reports is an error rather than a guess. Without MQ_ENDPOINTS the registry
+holds the single endpoint given by MQ_URL.
+"""
+import asyncio
+import json
+import os
+
+import mqadmit
+import mqbreaker
+import mqmetrics
+import mqrest
+
+ENDPOINTS_SPEC = os.getenv("MQ_ENDPOINTS", "")
+
+_END = object()
+
+
+class Endpoint:
+    __slots__ = ("name", "url", "messaging_url", "user", "password", "timeout", "qmgrs", "health", "qmgr_health")
+
+    def __init__(self, name: str, url: str, user: str, password: str, timeout: float = None,
+                 qmgrs: list = (), messaging_url: str = None):
+        self.name = name
+        self.url = url if url.endswith("/") else url + "/"
+        self.messaging_url = messaging_url or self.url.replace("/v2/admin/", "/v3/messaging/")
+        self.user = user
+        self.password = password
+        self.timeout = float(timeout or mqrest.TIMEOUT)
+        self.qmgrs = tuple(qmgrs)
+        self.health = mqbreaker.Health(f"mqweb endpoint {name}", name)
+        self.qmgr_health = {}
+
+    def health_of(self, qmgr_name: str = None) -> list:
+        """Health records that gate a call: the endpoint's, plus the queue manager's if any."""
+        if qmgr_name is None:
+            return [self.health]
+        health = self.qmgr_health.get(qmgr_name)
+        if health is None:
+            health = self.qmgr_health[qmgr_name] = mqbreaker.Health(f"Queue manager {qmgr_name} on {self.name}", self.name, qmgr_name)
+        return [self.health, health]
+
+    def client(self) -> mqrest.MQRestClient:
+        return mqrest.get_client(self.url, self.user, self.password)
+
+    async def call(self, method: str, path: str, data: dict = None, base_url: str = None) -> dict:
+        """mqrest call against this endpoint, failing fast while its circuit (or the qmgr's) is open.
+
+        mqweb is given up on after an adaptive timeout derived from recent
+        latencies of the same class of request (mqadmit.request_class), never
+        longer than the endpoint's configured timeout. The timeout starts once
+        a rate limit token is held (see mqrest.Budget).
+        """
+        url = (base_url or self.url) + path
+        try:
+            gates = self._admit(path)
+        except mqbreaker.CircuitOpenError as e:
+            return {"error": str(e)}
+        kind = mqadmit.request_class(method, path, data)
+        budget = mqrest.Budget(gates[-1].timeout(self.timeout, kind))
+        token = mqrest.BUDGET.set(budget)
+        try:
+            result = await self.client().call(method, url, data)
+            failure = mqbreaker.failure_kind(result)
+        except BaseException:
+            for health in gates:
+                health.release()
+            raise
+        finally:
+            mqrest.BUDGET.reset(token)
+        if result.get("timed_out"):
+            result = {"error": f"mqweb endpoint {self.name} did not answer within {budget.timeout:g}s"}
+            failure = "timeout"
+        self._record(gates, failure, budget, kind)
+        return result
+
+    async def stream(self, method: str, path: str, data: dict = None, key: str = "commandResponse", base_url: str = None,
+                     rest: dict = None):
+        """mqrest stream against this endpoint, gated by its circuits like call().
+
+        The adaptive timeout covers the wait for the response headers; the
+        body then arrives as fast as the caller consumes it. Failures raise
+        ValueError with call()'s error text.
+        """
+        url = (base_url or self.url) + path
+        try:
+            gates = self._admit(path)
+        except mqbreaker.CircuitOpenError as e:
+            raise ValueError(str(e)) from None
+        kind = mqadmit.request_class(method, path, data)
+        budget = mqrest.Budget(gates[-1].timeout(self.timeout, kind))
+        items = self.client().stream(method, url, data, key, rest)
+        failure, answered = None, False
+        try:
+            # The request is sent (or joined) while the first item is awaited
+            token = mqrest.BUDGET.set(budget)
+            try:
+                item = await anext(items, _END)
+            finally:
+                mqrest.BUDGET.reset(token)
+            answered = True
+            while item is not _END:
+                yield item
+                item = await anext(items, _END)
+        except TimeoutError:
+            failure, answered = "timeout", True
+            raise ValueError(f"mqweb endpoint {self.name} did not answer within {budget.timeout:g}s") from None
+        except Exception as e:
+            result = mqrest.error_result(e)
+            failure, answered = mqbreaker.failure_kind(result), True
+            raise ValueError(result["error"]) from e
+        finally:
+            await items.aclose()
+            if answered:
+                self._record(gates, failure, budget, kind)
+            else:
+                # Given up before mqweb answered
+                for health in gates:
+                    health.release()
+
+    async def request(self, method: str, path: str, base_url: str = None, **kwargs):
+        """Raw mqrest request (e.g. for a message body), gated and timed like call(); failures raise ValueError.
+
+        HTTP error statuses are returned, not raised; 5xx still counts against the circuits.
+        """
+        url = (base_url or self.url) + path
+        try:
+            gates = self._admit(path)
+        except mqbreaker.CircuitOpenError as e:
+            raise ValueError(str(e)) from None
+        kind = mqadmit.request_class(method, path)
+        budget = mqrest.Budget(gates[-1].timeout(self.timeout, kind))
+        token = mqrest.BUDGET.set(budget)
+        try:
+            response = await self.client().request(method, url, **kwargs)
+        except Exception as e:
+            result = mqrest.error_result(e)
+            if result.get("timed_out"):
+                failure, error = "timeout", f"mqweb endpoint {self.name} did not answer within {budget.timeout:g}s"
+            else:
+                failure, error = mqbreaker.failure_kind(result), result["error"]
+        except BaseException:
+            for health in gates:
+                health.release()
+            raise
+        else:
+            failure, error = "server" if response.status_code >= 500 else None, None
+        finally:
+            mqrest.BUDGET.reset(token)
+        self._record(gates, failure, budget, kind)
+        if error is not None:
+            raise ValueError(error)
+        return response
+
+    def _admit(self, path: str) -> list:
+        """Acquire the health records that gate a call to path; raises CircuitOpenError."""
+        gates = self.health_of(qmgr_of(path))
+        admitted = []
+        try:
+            for health in gates:
+                health.acquire()
+                admitted.append(health)
+        except mqbreaker.CircuitOpenError:
+            for health in admitted:
+                health.release()
+            raise
+        return gates
+
+    def _record(self, gates: list, failure, budget: mqrest.Budget, kind: str):
+        """Count a call's outcome once per upstream request: only budget's owner sent one (see mqrest.Budget)."""
+        if budget.elapsed is None:
+            # Answered from the result cache, or by the request of a caller it was coalesced with
+            for health in gates:
+                health.release()
+            return
+        for health in gates:
+            if health is self.health and len(gates) > 1 and failure in ("timeout", "server"):
+                # mqweb itself answered or may still answer; only the queue manager is in trouble
+                health.release()
+            else:
+                health.record(failure is None, budget.elapsed, kind)
+
+
+def load_endpoints(spec: str, user: str, password: str) -> list:
+    """Parse MQ_ENDPOINTS (inline JSON or a file path); user/password are the defaults."""
+    if not spec.lstrip().startswith("["):
+        with open(spec) as f:
+            spec = f.read()
+    return [Endpoint(entry.get("name") or entry["url"], entry["url"], entry.get("user", user), entry.get("password", password),
+                     entry.get("timeout"), entry.get("qmgrs", ()), entry.get("messaging_url"))
+            for entry in json.loads(spec)]
+
+
+def qmgr_of(path: str):
+    """Queue manager named in a REST path such as action/qmgr/QM1/mqsc, or None."""
+    segments = [s for s in path.split("?")[0].split("/") if s]
+    if "qmgr" in segments:
+        index = segments.index("qmgr") + 1
+        if index < len(segments):
+            return segments[index]
+    return None
+
+
+class EndpointRegistry:
+    """Routes REST calls to the mqweb endpoint that serves the queue manager."""
+
+    def __init__(self, endpoints: list):
+        if not endpoints:
+            raise ValueError("At least one mqweb endpoint is required")
+        self.endpoints = endpoints
+        self.routes = {qmgr: endpoint for endpoint in endpoints for qmgr in endpoint.qmgrs}
+        for qmgr in self.routes:
+            mqmetrics.known_qmgr(qmgr)
+        self._discovery = None
+
+    @classmethod
+    def from_env(cls, url: str, user: str, password: str, messaging_url: str = None) -> "EndpointRegistry":
+        if ENDPOINTS_SPEC:
+            return cls(load_endpoints(ENDPOINTS_SPEC, user, password))
+        return cls([Endpoint("default", url, user, password, messaging_url=messaging_url)])
+
+    @property
+    def default(self) -> Endpoint:
+        return self.endpoints[0]
+
+    async def endpoint_for(self, qmgr_name: str = None) -> Endpoint:
+        if qmgr_name is None or len(self.endpoints) == 1:
+            return self.default
+        endpoint = self.routes.get(qmgr_name)
+        if endpoint is None:
+            await self.discover()
+            endpoint = self.routes.get(qmgr_name)
+        if endpoint is None:
+            raise LookupError(f"Queue manager {qmgr_name} was not found on any reachable mqweb endpoint")
+        return endpoint
+
+    async def call(self, method: str, path: str, data: dict = None, messaging: bool = False) -> dict:
+        """Send a REST call (admin API path, or messaging API path if messaging) to the right endpoint."""
+        try:
+            endpoint = await self.endpoint_for(qmgr_of(path))
+        except LookupError as e:
+            return {"error": str(e)}
+        return await endpoint.call(method, path, data, endpoint.messaging_url if messaging else None)
+
+    async def stream(self, method: str, path: str, data: dict = None, key: str = "commandResponse", messaging: bool = False,
+                     rest: dict = None):
+        """Yield the items of a REST call's key array from the right endpoint as they arrive; errors raise ValueError."""
+        try:
+            endpoint = await self.endpoint_for(qmgr_of(path))
+        except LookupError as e:
+            raise ValueError(str(e)) from None
+        async for item in endpoint.stream(method, path, data, key, endpoint.messaging_url if messaging else None, rest):
+            yield item
+
+    async def list_qmgrs(self) -> list:
+        """Ask every endpoint for its queue managers concurrently; [(endpoint, result)] in registry order."""
+        results = await asyncio.gather(*(endpoint.call("GET", "qmgr/") for endpoint in self.endpoints))
+        for endpoint, result in zip(self.endpoints, results):
+            for qmgr in result.get("qmgr", []):
+                self.routes.setdefault(qmgr["name"], endpoint)
+                mqmetrics.known_qmgr(qmgr["name"])
+        return list(zip(self.endpoints, results))
+
+    async def discover(self):
+        # Concurrent lookups of unknown queue managers share one fleet-wide query
+        if self._discovery is None or self._discovery.done():
+            self._discovery = asyncio.ensure_future(self.list_qmgrs())
+        await asyncio.shield(self._discovery)
+
+    def snapshot(self) -> dict:
+        return {endpoint.name: {"url": endpoint.url, "timeout": endpoint.timeout,
+                                "qmgrs": sorted(q for q, e in self.routes.items() if e is endpoint),
+                                "health": endpoint.health.snapshot(endpoint.timeout),
+                                "qmgr_health": {q: h.snapshot(endpoint.timeout) for q, h in endpoint.qmgr_health.items()}}
+                for endpoint in self.endpoints}
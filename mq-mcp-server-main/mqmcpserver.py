@@ -12,22 +12,49 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import logging
-import httpx
-import json
+import os
+import sys
+import mqrest
 
+from contextlib import asynccontextmanager
 from typing import Any
 from mcp.server.fastmcp import FastMCP
 
+# MQ_STARTUP_CHECK: "background" probes mqweb without holding up initialize/tools/list,
+# "wait" probes before serving and exits if mqweb is unreachable, "off" skips the probe
+STARTUP_CHECK = os.getenv("MQ_STARTUP_CHECK", "background").lower()
+
+async def check_connection() -> bool:
+    try:
+        result = await dspmq()
+        print(f"MQ Connection test: {result[:50]}...", file=sys.stderr)
+        return True
+    except Exception as e:
+        print(f"MQ Connection failed: {e}", file=sys.stderr)
+        return False
+
+# Close the pooled mqweb connections when the server stops
+@asynccontextmanager
+async def lifespan(server):
+    probe = asyncio.create_task(check_connection()) if STARTUP_CHECK == "background" else None
+    try:
+        yield
+    finally:
+        if probe is not None:
+            probe.cancel()
+        await mqrest.aclose_all()
+
 # Initialize FastMCP server
-mcp = FastMCP("mqmcpserver")
+mcp = FastMCP("mqmcpserver", lifespan=lifespan)
 
 # Change this to point to your mqweb server
-URL_BASE = "https://localhost:9443/ibmmq/rest/v2/admin/"
+URL_BASE = os.getenv("MQ_URL", "https://localhost:9443/ibmmq/rest/v2/admin/")
 
 # Change these to a suitable user in your mqweb server
-USER_NAME = "admin"
-PASSWORD = "passw0rd"
+USER_NAME = os.getenv("MQ_USER", "admin")
+PASSWORD = os.getenv("MQ_PASSWORD", "passw0rd")
 
 @mcp.tool()
 async def dspmq() -> str:
@@ -40,21 +67,17 @@ async def dspmq() -> str:
     
     url = URL_BASE + "qmgr/"
 
-    auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
-    async with httpx.AsyncClient(verify=False,auth=auth) as client:
-        try:            
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return prettify_dspmq(response.content)
-        except Exception as err:
-            print(err)
-            return "Something went wrong!"
+    client = mqrest.get_client(url, USER_NAME, PASSWORD)
+    try:            
+        return await prettify_dspmq(client.stream("GET", url, key="qmgr", headers=headers))
+    except Exception as err:
+        print(err)
+        return "Something went wrong!"
                         
 # Put the output of for each queue manager on its own line, separated by ---                        
-def prettify_dspmq(payload: str) -> str:
-    jsonOutput = json.loads(payload.decode("utf-8"))
+async def prettify_dspmq(qmgrs) -> str:
     prettifiedOutput="\n---\n"
-    for x in jsonOutput['qmgr']:
+    async for x in qmgrs:
       prettifiedOutput += "name = " + x['name'] + ", running = " + x['state'] + "\n---\n"
     
     return prettifiedOutput
@@ -72,54 +95,45 @@ async def runmqsc(qmgr_name: str, mqsc_command: str) -> str:
         "ibm-mq-rest-csrf-token": "a"
     }
     
-    data = "{\"type\":\"runCommand\",\"parameters\":{\"command\":\"" + mqsc_command + "\"}}"
+    data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
     
     url = URL_BASE + "action/qmgr/" + qmgr_name + "/mqsc"
 
-    auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
-    async with httpx.AsyncClient(verify=False,auth=auth) as client:
-        try:            
-            response = await client.post(url, data=data, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return prettify_runmqsc(response.content)
-        except Exception as err:
-            print(err)
-            return "Something went wrong!"
+    client = mqrest.get_client(url, USER_NAME, PASSWORD)
+    try:            
+        return await prettify_runmqsc(client.stream("POST", url, data, headers=headers))
+    except Exception as err:
+        print(err)
+        return "Something went wrong!"
             
 # Put the output of each MQSC command on its own line, separated by ---
 # For the moment this will not work against z/OS queue managers which use a slightly different format.
-def prettify_runmqsc(payload: str) -> str:
-    jsonOutput = json.loads(payload.decode("utf-8"))
+# Responses are formatted one at a time as they are read off the wire, not after parsing the whole body.
+async def prettify_runmqsc(responses) -> str:
     prettifiedOutput="\n---\n"
-    for x in jsonOutput['commandResponse']:
+    async for x in responses:
       prettifiedOutput += x['text'][0] + "\n---\n"
     
     return prettifiedOutput    
 
 if __name__ == "__main__":
-    import sys
-    import asyncio
-    
     print("Starting IBM MQ MCP Server...", file=sys.stderr)
     
     # Test MQ connection first
     async def test_connection():
         try:
-            result = await dspmq()
-            print(f"MQ Connection test: {result[:50]}...", file=sys.stderr)
-            return True
-        except Exception as e:
-            print(f"MQ Connection failed: {e}", file=sys.stderr)
-            return False
+            return await check_connection()
+        finally:
+            # The pool is bound to this event loop; mcp.run() starts a new one
+            await mqrest.aclose_all()
     
-    # Test connection before starting server
-    if asyncio.run(test_connection()):
-        print("MQ connection successful, starting MCP server...", file=sys.stderr)
-        try:
-            mcp.run()
-        except Exception as e:
-            print(f"Error starting MCP server: {e}", file=sys.stderr)
+    if STARTUP_CHECK == "wait":
+        if not asyncio.run(test_connection()):
+            print("MQ connection failed, exiting...", file=sys.stderr)
             sys.exit(1)
-    else:
-        print("MQ connection failed, exiting...", file=sys.stderr)
+        print("MQ connection successful, starting MCP server...", file=sys.stderr)
+    try:
+        mcp.run()
+    except Exception as e:
+        print(f"Error starting MCP server: {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Prometheus metrics in the text exposition format, without a client library.
+
+Metrics are registered at import time and updated in place; render() formats
+all of them for a /metrics endpoint. Label sets are kept small (tool, qmgr,
+mqweb host, status code) so the number of series stays bounded. Queue manager
+names come from clients, so only those configured, discovered or answered for
+by mqweb are used as qmgr labels (see qmgr_label()).
+"""
+import time
+from contextlib import contextmanager
+
+# Seconds; covers cache hits (sub-millisecond) up to slow mqweb commands
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+OTHER_QMGR = "other"
+_QMGRS = set()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.series = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.series[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.series[key] = self.series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in flight."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            # Per-bucket counts (not cumulative), then sum and count
+            series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block, including when it raises.
+
+        Labels only known once the block has run can be set on the yielded dict.
+        """
+        started = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+def known_qmgr(name: str):
+    """Allow a queue manager name that exists (configured, discovered, or answered for by mqweb) as a qmgr label."""
+    if name:
+        _QMGRS.add(name)
+
+
+def is_known_qmgr(name) -> bool:
+    return isinstance(name, str) and name in _QMGRS
+
+
+def qmgr_label(name: str) -> str:
+    """name if it is a known queue manager, "" for none, and OTHER_QMGR for anything a client made up."""
+    if not name:
+        return ""
+    return name if is_known_qmgr(name) else OTHER_QMGR
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Tool calls (MCP servers)
+TOOL_SECONDS = Histogram("mcp_tool_duration_seconds", "Tool call latency, including formatting.", ("tool", "qmgr"))
+TOOL_ERRORS = Counter("mcp_tool_errors_total", "Tool calls that raised or returned an error.", ("tool",))
+TOOLS_IN_FLIGHT = Gauge("mcp_tools_in_flight", "Tool calls currently running.", ("tool",))
+FORMAT_SECONDS = Histogram("mcp_format_duration_seconds", "Time spent turning mqweb responses into tool output.", ("format",))
+SSE_SESSIONS = Gauge("mcp_sse_sessions", "Open SSE sessions.")
+SSE_BUFFERED_BYTES = Gauge("mcp_sse_buffered_bytes", "Bytes of SSE frames waiting to be written to clients.")
+SSE_DROPPED_FRAMES = Counter("mcp_sse_dropped_frames_total", "SSE frames dropped from full stream buffers.", ("reason",))
+SSE_OVERFLOW_DISCONNECTS = Counter("mcp_sse_overflow_disconnects_total", "SSE streams ended because their buffer overflowed.")
+SCHEDULER_WAIT_SECONDS = Histogram("mcp_scheduler_wait_seconds", "Time spent waiting for a queue manager slot (admission) or an mqweb rate limit token.", ("stage", "priority"))
+SCHEDULER_QUEUED = Gauge("mcp_scheduler_queued", "Tool calls and mqweb requests waiting for a slot or token.", ("stage", "priority"))
+
+# mqweb calls (mqrest)
+MQ_CALL_SECONDS = Histogram("mq_call_duration_seconds", "mqweb REST call latency per queue manager, including cache hits.", ("qmgr", "method"))
+UPSTREAM_SECONDS = Histogram("mq_upstream_request_duration_seconds", "HTTP request latency to mqweb, excluding cache hits.", ("host", "method"))
+UPSTREAM_CONNECT_SECONDS = Histogram("mq_upstream_connect_duration_seconds", "New mqweb connection setup time by phase.", ("host", "phase"))
+UPSTREAM_RESPONSES = Counter("mq_upstream_responses_total", "mqweb HTTP responses by status code.", ("host", "code"))
+UPSTREAM_ERRORS = Counter("mq_upstream_errors_total", "mqweb requests that failed without a response.", ("host",))
+UPSTREAM_IN_FLIGHT = Gauge("mq_upstream_in_flight", "mqweb requests currently in flight.", ("host",))
+POOL_REQUESTS = Counter("mq_pool_requests_total", "mqweb requests by whether they reused a pooled connection.", ("host", "connection"))
+POOL_MAX_CONNECTIONS = Gauge("mq_pool_max_connections", "Configured connection limit per mqweb host.", ("host",))
+CIRCUIT_STATE = Gauge("mq_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open.", ("endpoint", "qmgr"))
+CIRCUIT_REJECTIONS = Counter("mq_circuit_rejections_total", "Calls rejected at once because a circuit was open.", ("endpoint", "qmgr"))
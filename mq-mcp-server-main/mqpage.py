@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Cursor pagination of large MQSC results.
+
+DISPLAY CHANNEL(*), DISPLAY CONN(*) or QSTATUS on a wildcard can return tens
+of thousands of objects. Results longer than one page are returned PAGE_SIZE
+objects at a time with an opaque next_cursor. The full upstream result is kept
+for TTL seconds, in a cache of at most MAX_RESULTS results, so later pages are
+sliced from it instead of asking mqweb again. A cursor that outlives its cached
+result (expired, evicted, or issued by another server process) re-runs the
+command and continues at the same offset, so objects created or deleted
+meanwhile can shift the remaining pages.
+"""
+import base64
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+PAGE_SIZE = int(os.getenv("MQ_PAGE_SIZE", "500"))
+TTL = float(os.getenv("MQ_PAGE_TTL", "120"))
+MAX_RESULTS = int(os.getenv("MQ_PAGE_MAX_RESULTS", "32"))
+
+PAGE_SIZE_SCHEMA = {"type": "integer", "default": PAGE_SIZE,
+                    "description": "Objects per page; longer results return a next_cursor"}
+CURSOR_SCHEMA = {"type": "string", "description": "next_cursor from the previous page"}
+
+
+def encode_cursor(result_id: str, qmgr_name: str, command: str, output_format: str, offset: int, page_size: int) -> str:
+    state = json.dumps({"id": result_id, "qmgr": qmgr_name, "command": command, "format": output_format,
+                        "offset": offset, "page_size": page_size})
+    return base64.urlsafe_b64encode(state.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, qmgr_name: str, command: str, output_format: str) -> dict:
+    # Cursors come back from clients as any JSON value
+    if not isinstance(cursor, str):
+        raise ValueError("Invalid cursor")
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        state["offset"] = int(state["offset"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if (state["offset"] < 0 or not isinstance(state.get("id"), (str, type(None)))
+            or not isinstance(state.get("page_size"), (int, type(None)))):
+        raise ValueError("Invalid cursor")
+    if (state.get("qmgr"), state.get("command"), state.get("format")) != (qmgr_name, command, output_format):
+        raise ValueError("Cursor belongs to a different command or format")
+    return state
+
+
+class Page:
+    """One page of a result: items is a slice of whatever the fetch returned."""
+
+    __slots__ = ("items", "offset", "total", "next_cursor")
+
+    def __init__(self, items, offset: int, total: int, next_cursor: str = None):
+        self.items = items
+        self.offset = offset
+        self.total = total
+        self.next_cursor = next_cursor
+
+    @property
+    def partial(self) -> bool:
+        return self.offset > 0 or self.next_cursor is not None
+
+    def describe(self) -> dict:
+        """Paging fields for structured results; empty when the result fit in one page."""
+        if not self.partial:
+            return {}
+        return {"total": self.total, "offset": self.offset, "next_cursor": self.next_cursor}
+
+    def trailer(self) -> str:
+        """Paging line for text results; empty when the result fit in one page."""
+        if not self.partial:
+            return ""
+        line = f"page = {self.offset + 1}-{self.offset + len(self.items)} of {self.total}"
+        return line + (f", next_cursor = {self.next_cursor}" if self.next_cursor else "") + "\n---\n"
+
+
+class PageCache:
+    """Full results of paged commands, by result id, evicted least recently used first."""
+
+    def __init__(self, max_results: int = MAX_RESULTS, ttl: float = TTL):
+        self.max_results = max_results
+        self.ttl = ttl
+        self._results = OrderedDict()
+        self.stats = {"paged": 0, "hits": 0, "refetches": 0, "evictions": 0}
+
+    async def page(self, qmgr_name: str, command: str, output_format: str, fetch, page_size: int = None,
+                   cursor: str = None) -> Page:
+        """Page of the result of fetch(), which returns a list or an mqsc.MQObjects.
+
+        Raises ValueError for a bad cursor, and lets ValueError from fetch() through.
+        """
+        state = decode_cursor(cursor, qmgr_name, command, output_format) if cursor else None
+        page_size = page_size or (state and state.get("page_size")) or PAGE_SIZE
+        offset = state["offset"] if state else 0
+        result_id = state and state.get("id")
+        items = self._get(result_id)
+        if items is None:
+            if state:
+                self.stats["refetches"] += 1
+            items = await fetch()
+        else:
+            self.stats["hits"] += 1
+        total = len(items)
+        if page_size <= 0 or (offset == 0 and total <= page_size):
+            return Page(items, 0, total)
+        if result_id not in self._results:
+            result_id = secrets.token_urlsafe(12)
+            self._put(result_id, items)
+            self.stats["paged"] += 1
+        end = min(offset + page_size, total)
+        next_cursor = encode_cursor(result_id, qmgr_name, command, output_format, end, page_size) if end < total else None
+        return Page(items[offset:end], offset, total, next_cursor)
+
+    def _get(self, result_id: str):
+        entry = self._results.get(result_id) if result_id else None
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._results[result_id]
+            return None
+        self._results.move_to_end(result_id)
+        return entry[0]
+
+    def _put(self, result_id: str, items):
+        self._results[result_id] = (items, time.monotonic() + self.ttl)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> dict:
+        return dict(self.stats, results=len(self._results), page_size=PAGE_SIZE, ttl=self.ttl)
+
+
+PAGES = PageCache()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""Shared, pooled client for the IBM MQ REST API (mqweb).
+
+All MCP servers talk to mqweb through one process-wide httpx.AsyncClient per
+mqweb host and user, so tool calls reuse keep-alive TLS connections instead
+of paying a new handshake every time.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import importlib.util
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+import mqadmit
+import mqcache
+import mqmetrics
+import mqstream
+
+
+def _lazy_import(name: str):
+    """Import a module on first attribute access; httpx alone adds ~0.2s to start-up."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+httpx = _lazy_import("httpx")
+
+
+def preload():
+    """Finish importing httpx now (e.g. in a thread while the server is idle) rather than on the first call."""
+    return httpx.AsyncClient
+
+# Connection pool configuration
+MAX_CONNECTIONS = int(os.getenv("MQ_POOL_MAX_CONNECTIONS", "20"))
+# Keep every pooled connection alive by default: connections above this are closed
+# after each request, so any concurrency beyond it pays a fresh handshake again
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MQ_POOL_MAX_KEEPALIVE", str(MAX_CONNECTIONS)))
+KEEPALIVE_EXPIRY = float(os.getenv("MQ_POOL_KEEPALIVE_EXPIRY", "60"))
+HTTP2 = os.getenv("MQ_HTTP2", "false").lower() in ("1", "true", "yes")
+TIMEOUT = float(os.getenv("MQ_TIMEOUT", "30"))
+
+# In-flight window for bulk message puts
+PUT_WINDOW = int(os.getenv("MQ_PUT_WINDOW", "16"))
+MAX_BULK_PUT = int(os.getenv("MQ_BULK_PUT_MAX", "100000"))
+MAX_REPORTED_FAILURES = 100
+
+HEADERS = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
+
+
+class Budget:
+    """Time allowed for the mqweb requests of one call, and how long the last one took.
+
+    The timeout starts once the rate limit token is held, so waiting for a
+    token is neither an mqweb timeout nor part of its latency. elapsed stays
+    None for a caller answered from the result cache or by an identical
+    request already in flight: only the single-flight leader's budget is
+    used by the request it sends.
+    """
+
+    __slots__ = ("timeout", "elapsed")
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self.elapsed = None
+
+
+# Set by mqendpoints around a call; requests made outside one only have httpx's own timeouts
+BUDGET = contextvars.ContextVar("mq_budget", default=None)
+
+
+def parse_pool_limits(spec: str) -> dict:
+    """Parse per-host pool limits such as "mqhost1:9443=50/20,mqhost2:9443=10".
+
+    Each entry is host[:port]=max_connections[/max_keepalive_connections].
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, value = entry.partition("=")
+        max_connections, _, max_keepalive = value.partition("/")
+        limits[host.strip().lower()] = httpx.Limits(
+            max_connections=int(max_connections),
+            max_keepalive_connections=int(max_keepalive or max_connections),
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+    return limits
+
+
+POOL_LIMITS = parse_pool_limits(os.getenv("MQ_POOL_LIMITS", ""))
+
+
+def pool_limits_for(host: str) -> httpx.Limits:
+    """Return the configured pool limits for an mqweb host (host:port)."""
+    return POOL_LIMITS.get(host.lower(), httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    ))
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("MQ_HTTP2 is set but the h2 package is not installed, using HTTP/1.1", file=sys.stderr)
+        return False
+
+
+class MQRestClient:
+    """Keep-alive connection pool to a single mqweb host for one user."""
+
+    def __init__(self, host: str, user: str, password: str, limits: httpx.Limits = None, http2: bool = HTTP2):
+        self.host = host
+        self.user = user
+        self.limits = limits or pool_limits_for(host)
+        self.http2 = http2 and _http2_available()
+        self._auth = httpx.BasicAuth(username=user, password=password)
+        self._client = None
+        self._inflight = {}
+        self._streams = {}
+        self.rate_limit = mqadmit.TokenBucket()
+        self.stats = {"requests": 0, "pool_hits": 0, "pool_misses": 0, "errors": 0, "coalesced": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                verify=False,
+                auth=self._auth,
+                headers=HEADERS,
+                limits=self.limits,
+                http2=self.http2,
+                timeout=TIMEOUT,
+            )
+        return self._client
+
+    async def request(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send a request over the pool, counting whether a new connection was needed.
+
+        With stream, the response is returned once its headers arrive; the
+        caller reads the body and must close the response.
+        """
+        connected = False
+        phases = {}
+
+        async def trace(event_name, info):
+            nonlocal connected
+            if event_name == "connection.connect_tcp.started":
+                connected = True
+            # Time TCP connect and TLS handshake separately from the request itself
+            for phase in ("connect_tcp", "start_tls"):
+                if event_name == f"connection.{phase}.started":
+                    phases[phase] = time.perf_counter()
+                elif event_name == f"connection.{phase}.complete" and phase in phases:
+                    mqmetrics.UPSTREAM_CONNECT_SECONDS.observe(time.perf_counter() - phases[phase], host=self.host, phase=phase)
+
+        await self.rate_limit.acquire()
+        budget = BUDGET.get()
+        started = time.perf_counter()
+        self.stats["requests"] += 1
+        try:
+            with mqmetrics.UPSTREAM_IN_FLIGHT.track(host=self.host), mqmetrics.UPSTREAM_SECONDS.time(host=self.host, method=method):
+                async with asyncio.timeout(budget.timeout if budget is not None else None):
+                    request = self.client.build_request(method, url, extensions={"trace": trace}, **kwargs)
+                    response = await self.client.send(request, stream=stream)
+        except Exception:
+            self.stats["errors"] += 1
+            mqmetrics.UPSTREAM_ERRORS.inc(host=self.host)
+            raise
+        finally:
+            if budget is not None:
+                budget.elapsed = time.perf_counter() - started
+            self.stats["pool_misses" if connected else "pool_hits"] += 1
+            mqmetrics.POOL_REQUESTS.inc(host=self.host, connection="new" if connected else "reused")
+        mqmetrics.UPSTREAM_RESPONSES.inc(host=self.host, code=response.status_code)
+        return response
+
+    async def call(self, method: str, url: str, data: dict = None) -> dict:
+        """Run a REST call and return the JSON body, or {"error": ...} on failure.
+
+        Read-only queries are served from the shared result cache when fresh,
+        and identical reads already in flight share one upstream request.
+        Anything that changes an object invalidates the cached reads of it.
+        """
+        target = mqcache.describe(method, url, data)
+        with mqmetrics.MQ_CALL_SECONDS.time(method=method) as labels:
+            try:
+                result = await self._call(method, url, data, target)
+                if target is not None and "error" not in result:
+                    mqmetrics.known_qmgr(target[0])
+                return result
+            finally:
+                labels["qmgr"] = mqmetrics.qmgr_label(target[0] if target else "")
+
+    async def _call(self, method: str, url: str, data: dict, target) -> dict:
+        if target is None:
+            if method != "GET":
+                return await self._fetch(method, url, data)
+            return await self._coalesce((url, None), lambda: self._fetch(method, url, data))
+        qmgr, command, read_only, family, name = target
+        if not read_only:
+            mqcache.RESULT_CACHE.invalidate(qmgr, family, name)
+            try:
+                return await self._fetch(method, url, data)
+            finally:
+                # Also drop reads that raced with this change
+                mqcache.RESULT_CACHE.invalidate(qmgr, family, name)
+        if mqcache.ENABLED:
+            cached = mqcache.RESULT_CACHE.get(qmgr, command)
+            if cached is not None:
+                return cached
+        return await self._coalesce((url, command), lambda: self._cached_fetch(method, url, data, target))
+
+    async def _cached_fetch(self, method: str, url: str, data: dict, target) -> dict:
+        qmgr, command, _, family, name = target
+        generation = mqcache.RESULT_CACHE.generation(qmgr)
+        result, size = await self._fetch_sized(method, url, data)
+        if mqcache.ENABLED and "error" not in result:
+            mqcache.RESULT_CACHE.put(qmgr, command, result, size, family, name, generation=generation)
+        return result
+
+    async def _fetch(self, method: str, url: str, data: dict = None) -> dict:
+        return (await self._fetch_sized(method, url, data))[0]
+
+    async def _fetch_sized(self, method: str, url: str, data: dict = None):
+        try:
+            response = await self.request(method, url, json=data)
+            response.raise_for_status()
+            return (response.json() if response.content else {"status": "success"}), len(response.content)
+        except Exception as e:
+            return error_result(e), 0
+
+    async def stream(self, method: str, url: str, data: dict = None, key: str = "commandResponse", rest: dict = None, **kwargs):
+        """Yield the items of the response's top-level key array as they arrive from mqweb.
+
+        The response's other top-level fields go into rest. Reads are served
+        from the result cache when fresh, and a read whose body stays under
+        mqstream.CACHE_BYTES is cached as call() would; larger ones are only
+        streamed. Identical reads that start before the first item arrives
+        share one upstream stream. Unlike call(), failures raise (see
+        error_result()).
+        """
+        rest = {} if rest is None else rest
+        target = mqcache.describe(method, url, data)
+        read_only = target is not None and target[2]
+        if not read_only:
+            async for item in self._stream(method, url, data, key, rest, target, **kwargs):
+                yield item
+            return
+        if mqcache.ENABLED:
+            cached = mqcache.RESULT_CACHE.get(target[0], target[1])
+            if cached is not None:
+                rest.update((field, value) for field, value in cached.items() if field != key)
+                for item in cached.get(key, ()):
+                    yield item
+                return
+        flight = (url, target[1], key)
+        shared = self._streams.get(flight)
+        if shared is None or shared.started or shared.task.done():
+            # Callers arriving after the first item would miss what was already sent
+            shared = self._streams[flight] = _SharedStream()
+            shared.task = asyncio.ensure_future(shared.pump(self._stream(method, url, data, key, shared.rest, target, **kwargs)))
+            shared.task.add_done_callback(lambda done: self._forget_stream(flight, shared))
+        else:
+            self.stats["coalesced"] += 1
+        async for item in shared.follow(rest):
+            yield item
+
+    def _forget_stream(self, key, shared):
+        if self._streams.get(key) is shared:
+            del self._streams[key]
+
+    async def _stream(self, method: str, url: str, data: dict, key: str, rest: dict, target, **kwargs):
+        read_only = target is not None and target[2]
+        if target is not None and not read_only:
+            mqcache.RESULT_CACHE.invalidate(target[0], target[3], target[4])
+        generation = mqcache.RESULT_CACHE.generation(target[0]) if target is not None else None
+        kept = [] if read_only and mqcache.ENABLED else None
+        try:
+            response = await self.request(method, url, stream=True, json=data, **kwargs)
+            try:
+                response.raise_for_status()
+                if target is not None:
+                    mqmetrics.known_qmgr(target[0])
+                async for item in mqstream.items(response.aiter_bytes(), key, rest):
+                    if kept is not None:
+                        # Small results are kept for the cache as they pass; large ones are not held
+                        kept = kept if response.num_bytes_downloaded <= mqstream.CACHE_BYTES else None
+                        if kept is not None:
+                            kept.append(item)
+                    yield item
+            finally:
+                await response.aclose()
+        finally:
+            if target is not None and not read_only:
+                # Also drop reads that raced with this change
+                mqcache.RESULT_CACHE.invalidate(target[0], target[3], target[4])
+        if kept is not None:
+            mqcache.RESULT_CACHE.put(target[0], target[1], dict(rest, **{key: kept}), response.num_bytes_downloaded,
+                                     target[3], target[4], generation=generation)
+
+    async def _coalesce(self, key, fetch) -> dict:
+        """Single-flight: concurrent callers with the same key await one upstream request."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+
+            def forget(done):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one caller giving up does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def put_messages(self, url: str, messages, window: int = PUT_WINDOW) -> dict:
+        """Put each message body to a v3 messaging queue URL, keeping up to window requests in flight.
+
+        messages may be any iterable (e.g. a generator) and is consumed lazily,
+        so memory does not grow with the number of messages. The window is capped
+        at the number of keep-alive connections so every put reuses one.
+        """
+        window = max(1, min(window, self.limits.max_keepalive_connections or self.limits.max_connections))
+        started = time.perf_counter()
+        pending = enumerate(messages)
+        sent, failures, failed = 0, [], 0
+        headers = {"Content-Type": "text/plain;charset=utf-8"}
+
+        async def worker():
+            nonlocal sent, failed
+            for index, body in pending:
+                try:
+                    response = await self.request("POST", url, content=body.encode("utf-8"), headers=headers)
+                    response.raise_for_status()
+                    sent += 1
+                except Exception as e:
+                    failed += 1
+                    if len(failures) < MAX_REPORTED_FAILURES:
+                        failures.append({"index": index, "error": str(e)})
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(window)))
+        finally:
+            target = mqcache.describe("POST", url)
+            if target is not None:
+                mqcache.RESULT_CACHE.invalidate(target[0], target[3], target[4])
+        elapsed = time.perf_counter() - started
+        return {
+            "sent": sent,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "messages_per_second": round((sent + failed) / elapsed, 1) if elapsed else None,
+            "window": window,
+            "failures": failures,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class _SharedStream:
+    """One upstream stream fanned out to every caller that joined before its first item."""
+
+    __slots__ = ("queues", "rest", "task", "started")
+
+    def __init__(self):
+        self.queues = []
+        self.rest = {}
+        self.task = None
+        self.started = False
+
+    async def pump(self, items):
+        try:
+            async for item in items:
+                self.started = True
+                for queue in self.queues:
+                    queue.put_nowait(item)
+        except Exception as e:
+            for queue in self.queues:
+                queue.put_nowait(_Failure(e))
+        else:
+            for queue in self.queues:
+                queue.put_nowait(_END)
+
+    async def follow(self, rest: dict):
+        queue = asyncio.Queue()
+        self.queues.append(queue)
+        try:
+            while (item := await queue.get()) is not _END:
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+            rest.update(self.rest)
+        finally:
+            self.queues.remove(queue)
+            # One caller giving up does not cancel the stream for the others
+            if not self.queues and not self.task.done():
+                self.task.cancel()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+_END = object()
+
+
+def error_result(error: Exception) -> dict:
+    """call()'s {"error": ...} result for a failed request; HTTP errors also carry the status."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return {"error": str(error), "status": error.response.status_code}
+    if isinstance(error, TimeoutError):
+        # The caller's Budget ran out; mqendpoints reports it with the endpoint and timeout
+        return {"error": "mqweb did not answer in time", "timed_out": True}
+    # httpx timeouts carry no message
+    return {"error": str(error) or type(error).__name__}
+
+
+_clients = {}
+
+
+def get_client(url: str, user: str, password: str) -> MQRestClient:
+    """Return the shared client for the mqweb host that serves url."""
+    host = urlsplit(url).netloc
+    key = (host.lower(), user)
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = MQRestClient(host, user, password)
+        mqmetrics.POOL_MAX_CONNECTIONS.set(client.limits.max_connections, host=host)
+    return client
+
+
+def pool_stats() -> dict:
+    """Pool usage per mqweb host and user."""
+    return {f"{client.user}@{client.host}": dict(client.stats) for client in _clients.values()}
+
+
+async def aclose_all():
+    """Close every pooled connection, e.g. on server shutdown."""
+    for client in _clients.values():
+        await client.aclose()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Structured MQSC results using the mqweb runCommandJSON request type.
+
+runCommandJSON returns one typed attribute dictionary per MQ object instead of
+formatted text. Results are held as an MQObjects table (shared column names,
+one tuple per object) so large listings do not repeat every attribute name.
+"""
+import re
+import sys
+
+import mqcache
+
+FORMATS = ("text", "json", "table")
+FORMAT_SCHEMA = {"type": "string", "enum": list(FORMATS), "default": "text",
+                 "description": "text (MQSC output), json (one object per MQ object) or table (columns and rows)"}
+
+# Object type abbreviations accepted by MQSC but not by runCommandJSON
+QUALIFIERS = {"Q": "QUEUE", "QL": "QLOCAL", "QA": "QALIAS", "QR": "QREMOTE", "QM": "QMODEL",
+              "QS": "QSTATUS", "CHL": "CHANNEL", "CHS": "CHSTATUS"}
+
+# Filters pushed down into DISPLAY commands by list_queues and list_channels
+QUEUE_TYPES = {"local": "QLOCAL", "alias": "QALIAS", "remote": "QREMOTE", "model": "QMODEL"}
+CHANNEL_TYPES = ("SDR", "SVR", "RCVR", "RQSTR", "CLNTCONN", "SVRCONN", "CLUSSDR", "CLUSRCVR", "AMQP", "MQTT")
+NAME_SCHEMA = {"type": "string", "default": "*", "description": "Object name or generic pattern, e.g. APP.*"}
+ATTRIBUTES_SCHEMA = {"type": "array", "items": {"type": "string"},
+                     "description": "MQSC attributes to return, e.g. [\"CURDEPTH\", \"MAXDEPTH\"]; all attributes if omitted"}
+
+_QUOTED = r"'(?:[^']|'')*'"
+_HEAD = re.compile(rf"^(\w+)\s+(\w+)\s*(?:\(({_QUOTED}|[^)]*)\))?")
+_TOKEN = re.compile(rf"(\w+)(?:\(({_QUOTED}|[^)]*)\))?")
+
+
+def _unquote(raw: str) -> str:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw.startswith("'") and raw.endswith("'"):
+        return raw[1:-1].replace("''", "'")
+    return raw
+
+
+def _value(raw: str):
+    value = _unquote(raw)
+    if value == raw.strip() and value.lstrip("-").isdigit():
+        return int(value)
+    return value
+
+
+def display_command(qualifier: str, name: str = "*", filters: dict = None, attributes: list = None) -> str:
+    """Build a DISPLAY command that only returns matching objects and the requested attributes.
+
+    filters become KEYWORD(value) selectors (e.g. CHLTYPE(SVRCONN)) and
+    attributes become bare keywords; validated so callers cannot inject MQSC.
+    """
+    if not re.fullmatch(r"[\w.%/*]+", name or ""):
+        raise ValueError(f"Invalid object name or pattern: {name}")
+    command = f"DISPLAY {qualifier}({name})"
+    for keyword, value in (filters or {}).items():
+        command += f" {keyword}({value})"
+    for attribute in attributes or ():
+        if not re.fullmatch(r"\w+", attribute):
+            raise ValueError(f"Invalid attribute name: {attribute}")
+        command += f" {attribute.upper()}"
+    return command
+
+
+def to_json_request(mqsc_command: str) -> dict:
+    """Translate an MQSC command into a runCommandJSON request body.
+
+    Bare keywords become responseParameters and KEYWORD(value) pairs become
+    parameters, e.g. DISPLAY QUEUE(Q1) CURDEPTH -> display/queue/Q1 [curdepth].
+    """
+    command = mqcache.normalize(mqsc_command)
+    match = _HEAD.match(command)
+    if not match:
+        raise ValueError(f"Cannot parse MQSC command: {mqsc_command}")
+    verb, qualifier, name = match.groups()
+    request = {
+        "type": "runCommandJSON",
+        "command": mqcache.VERBS.get(verb, verb).lower(),
+        "qualifier": QUALIFIERS.get(qualifier, qualifier).lower(),
+    }
+    if name:
+        request["name"] = _unquote(name)
+    parameters, response_parameters = {}, []
+    for keyword, value in _TOKEN.findall(command[match.end():]):
+        if keyword == "WHERE":
+            raise ValueError("WHERE filters are only supported in text format")
+        if value:
+            parameters[keyword.lower()] = _value(value)
+        else:
+            response_parameters.append(keyword.lower())
+    if parameters:
+        request["parameters"] = parameters
+    if response_parameters:
+        request["responseParameters"] = response_parameters
+    return request
+
+
+class MQObjects:
+    """Columnar table of MQ objects: one shared column tuple, one row tuple per object."""
+
+    __slots__ = ("columns", "rows", "errors")
+
+    def __init__(self, columns: tuple = (), rows: list = None, errors: list = None):
+        self.columns = columns
+        self.rows = rows if rows is not None else []
+        self.errors = errors if errors is not None else []
+
+    @classmethod
+    def from_response(cls, response: dict) -> "MQObjects":
+        if "error" in response:
+            return cls(errors=[{"error": response["error"]}])
+        return cls._build(response.get("commandResponse", []))
+
+    @classmethod
+    async def from_stream(cls, items) -> "MQObjects":
+        """Build the table from commandResponse items as they arrive (e.g. from mqendpoints stream())."""
+        columns, rows, errors = [], [], []
+        index = {}
+        async for item in items:
+            _add(item, index, columns, rows, errors)
+        return cls._finish(columns, rows, errors)
+
+    @classmethod
+    def _build(cls, items) -> "MQObjects":
+        columns, rows, errors = [], [], []
+        index = {}
+        for item in items:
+            _add(item, index, columns, rows, errors)
+        return cls._finish(columns, rows, errors)
+
+    @classmethod
+    def _finish(cls, columns: list, rows: list, errors: list) -> "MQObjects":
+        # Rows added before a later object brought new attributes are padded to the full width
+        width = len(columns)
+        return cls(tuple(columns), [row if len(row) == width else row + (None,) * (width - len(row)) for row in rows], errors)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: slice) -> "MQObjects":
+        # A page of objects; command errors are reported with the first page only
+        return MQObjects(self.columns, self.rows[index], self.errors if not index.start else [])
+
+    def __iter__(self):
+        for row in self.rows:
+            yield {column: value for column, value in zip(self.columns, row) if value is not None}
+
+    def first(self, attribute: str, default=None):
+        """Value of attribute on the first object, e.g. first("curdepth")."""
+        if not self.rows or attribute not in self.columns:
+            return default
+        return self.rows[0][self.columns.index(attribute)]
+
+    def to_dict(self, layout: str = "json") -> dict:
+        result = {"count": len(self.rows)}
+        if layout == "table":
+            result.update(columns=list(self.columns), rows=[list(row) for row in self.rows])
+        else:
+            result["objects"] = list(self)
+        if self.errors:
+            result["errors"] = self.errors
+        return result
+
+
+def _add(item: dict, index: dict, columns: list, rows: list, errors: list):
+    """Append one commandResponse item to a table being built."""
+    if item.get("completionCode", 0) != 0:
+        errors.append({"reasonCode": item.get("reasonCode"), "message": item.get("message", [])})
+    parameters = item.get("parameters")
+    if parameters:
+        for key in parameters:
+            if key not in index:
+                index[key] = len(columns)
+                columns.append(key)
+        rows.append(tuple(_intern(parameters.get(column)) for column in columns))
+
+
+def _intern(value):
+    # Attribute values such as QLOCAL or RUNNING repeat across thousands of rows
+    return sys.intern(value) if isinstance(value, str) and len(value) <= 48 else value
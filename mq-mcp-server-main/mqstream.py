@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Incremental parsing of large mqweb JSON responses.
+
+mqweb answers DISPLAY QUEUE(*) ALL with a single JSON object whose
+commandResponse array holds one item per MQ object. items() reads that array
+from the HTTP byte stream one element at a time, so callers can format or
+forward each object as soon as it arrives. Only the current chunk of the body
+and the item being parsed are held, rather than the raw body, its decoded text
+and the whole parsed tree at once.
+"""
+import codecs
+import json
+import os
+import re
+
+# Streamed reads whose body stays under this size are also kept in the result cache
+CACHE_BYTES = int(os.getenv("MQ_STREAM_CACHE_BYTES", str(1024 * 1024)))
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# What is left of the buffer after a number that the next chunk may continue, e.g. "-3." or "1e"
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z")
+
+
+class _Reader:
+    """Decoded text of a byte stream, read on demand."""
+
+    def __init__(self, chunks):
+        self.chunks = aiter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.done = False
+
+    async def more(self) -> bool:
+        if self.done:
+            return False
+        try:
+            text = self.decoder.decode(await anext(self.chunks))
+        except StopAsyncIteration:
+            self.done = True
+            text = self.decoder.decode(b"", final=True)
+        # Drop what was already parsed
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+        return True
+
+    async def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of the body."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not await self.more():
+                return ""
+
+    async def expect(self, allowed: str) -> str:
+        char = await self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Malformed JSON response: expected one of {allowed!r}, got {char or 'end of body'!r}")
+        self.pos += 1
+        return char
+
+    async def value(self):
+        await self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                # Most likely the value continues in the next chunk
+                if not await self.more():
+                    raise ValueError(f"Malformed JSON response: {e.msg}") from None
+                continue
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and _NUMBER_TAIL.match(self.text, end) and await self.more()):
+                # A number can also continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+
+async def items(chunks, key: str = "commandResponse", rest: dict = None):
+    """Yield each element of the top-level array key of a JSON object read from chunks of bytes.
+
+    The object's other fields (e.g. overallCompletionCode) are parsed whole
+    into rest. An empty body yields nothing; a malformed one raises ValueError.
+    """
+    reader = _Reader(chunks)
+    rest = {} if rest is None else rest
+    if not await reader.peek():
+        return
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        return
+    while True:
+        name = await reader.value()
+        await reader.expect(":")
+        if name == key and await reader.peek() == "[":
+            reader.pos += 1
+            if await reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield await reader.value()
+                    if await reader.expect(",]") == "]":
+                        break
+        else:
+            rest[name] = await reader.value()
+        if await reader.expect(",}") == "}":
+            return
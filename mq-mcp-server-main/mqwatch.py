@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Change feeds: server-side diffs of queue depths, channel statuses and connections.
+
+A feed polls one MQSC command for a queue manager every INTERVAL seconds
+and keeps the last set of entries (one per queue, channel instance or
+application). Subscribers get the full set once, then only the entries that
+changed or disappeared since the previous poll, so dashboards no longer
+re-fetch and diff whole listings. Subscribers asking for the same queue
+manager, kind and name pattern share a single feed, which stops polling when
+its last subscriber leaves.
+"""
+import asyncio
+import collections
+import contextvars
+import os
+import sys
+import uuid
+
+import mqsc
+
+INTERVAL = float(os.getenv("MQ_WATCH_INTERVAL", "5"))
+MAX_SUBSCRIPTIONS = int(os.getenv("MQ_WATCH_MAX_SUBSCRIPTIONS", "1000"))
+
+
+def _keyed(key, attributes: tuple):
+    return lambda objects: {key(o): {a: o.get(a) for a in attributes} for o in objects}
+
+
+def _connection_counts(objects) -> dict:
+    counts = collections.Counter((o.get("appltag") or "").strip() for o in objects)
+    return {tag: {"connections": count} for tag, count in counts.items()}
+
+
+# kind -> (MQSC command for a name pattern, entries from the command's objects)
+KINDS = {
+    "queue_depths": (lambda name: f"DISPLAY QSTATUS({name}) TYPE(QUEUE) CURDEPTH IPPROCS OPPROCS",
+                     _keyed(lambda o: o.get("queue"), ("curdepth", "ipprocs", "opprocs"))),
+    "channel_status": (lambda name: f"DISPLAY CHSTATUS({name}) STATUS CONNAME",
+                       # One channel can run several instances, one per partner
+                       _keyed(lambda o: f"{o.get('channel')} {o.get('conname') or ''}".strip(), ("status", "conname"))),
+    "connections": (lambda name: "DISPLAY CONN(*) TYPE(CONN) APPLTAG", _connection_counts),
+}
+
+WATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "qmgr_name": {"type": "string"},
+        "feeds": {"type": "array", "items": {"type": "string", "enum": list(KINDS)}, "default": list(KINDS)},
+        "name": {"type": "string", "default": "*", "description": "Queue or channel name pattern, e.g. APP.*"},
+    },
+    "required": ["qmgr_name"],
+}
+
+
+def diff(old: dict, new: dict):
+    """(changed, removed): entries of new that differ from old, and keys that are gone."""
+    changed = {key: value for key, value in new.items() if old.get(key) != value}
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+class Feed:
+    """Last entries of one (qmgr, kind, name) and the callbacks subscribed to them."""
+
+    def __init__(self, qmgr_name: str, kind: str, name: str):
+        self.qmgr_name = qmgr_name
+        self.kind = kind
+        self.command = KINDS[kind][0](name)
+        self.entries = None
+        self.subscribers = {}
+        self.task = None
+        self.polls = 0
+
+    def event(self, subscription: str, **fields) -> dict:
+        return dict(subscription=subscription, qmgr=self.qmgr_name, kind=self.kind, **fields)
+
+
+class Watcher:
+    """Feeds per (qmgr, kind, name pattern), polled while they have subscribers.
+
+    fetch(qmgr_name, command) returns an mqsc.MQObjects. A subscriber callback
+    receives event dicts and returns False once nobody is listening any more.
+    """
+
+    def __init__(self, fetch, interval: float = INTERVAL):
+        self.fetch = fetch
+        self.interval = interval
+        self.feeds = {}
+        self._subscriptions = {}
+        self.stats = {"polls": 0, "poll_errors": 0, "deltas": 0}
+
+    def subscribe(self, qmgr_name: str, kinds: list, name: str, callback) -> str:
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            raise ValueError(f"Unknown feed: {unknown[0]}")
+        if len(self._subscriptions) >= MAX_SUBSCRIPTIONS:
+            raise ValueError(f"Too many subscriptions (limit {MAX_SUBSCRIPTIONS})")
+        # Unguessable and unique across worker processes: the ID is all an unsubscribe names
+        subscription = f"sub-{uuid.uuid4().hex}"
+        keys = []
+        for kind in kinds:
+            key = (qmgr_name, kind, name)
+            feed = self.feeds.get(key)
+            if feed is None:
+                feed = self.feeds[key] = Feed(qmgr_name, kind, name)
+            feed.subscribers[subscription] = callback
+            keys.append(key)
+            if feed.entries is not None:
+                callback(feed.event(subscription, type="snapshot", entries=feed.entries))
+            if feed.task is None or feed.task.done():
+                # A fresh context, so polls do not inherit the request's session or scheduling priority
+                feed.task = asyncio.create_task(self._poll(feed), context=contextvars.Context())
+        self._subscriptions[subscription] = keys
+        return subscription
+
+    def unsubscribe(self, subscription: str) -> bool:
+        keys = self._subscriptions.pop(subscription, None)
+        if keys is None:
+            return False
+        for key in keys:
+            feed = self.feeds.get(key)
+            if feed is not None:
+                feed.subscribers.pop(subscription, None)
+                if not feed.subscribers:
+                    self.feeds.pop(key)
+                    feed.task.cancel()
+        return True
+
+    def current(self, event: dict) -> dict:
+        """A snapshot of the feed an event came from, for a subscriber that missed some of its events."""
+        for key in self._subscriptions.get(event["subscription"], ()):
+            feed = self.feeds.get(key)
+            if feed is not None and feed.kind == event["kind"] and feed.entries is not None:
+                return feed.event(event["subscription"], type="snapshot", entries=feed.entries)
+        return event
+
+    async def _poll(self, feed: Feed):
+        while feed.subscribers:
+            await self.refresh(feed)
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self, feed: Feed):
+        """Poll a feed once and send its subscribers what changed."""
+        try:
+            objects = await self.fetch(feed.qmgr_name, feed.command)
+        except Exception as e:
+            objects = mqsc.MQObjects(errors=[{"error": str(e)}])
+        if any("error" in error for error in objects.errors):
+            # mqweb did not answer; keep the last entries rather than report everything as removed
+            self.stats["poll_errors"] += 1
+            print(f"Change feed {feed.kind} of {feed.qmgr_name} failed: {objects.errors[0]['error']}", file=sys.stderr)
+            return
+        # MQ reason codes without objects (e.g. no channel status) mean an empty set
+        entries = KINDS[feed.kind][1](objects)
+        self.stats["polls"] += 1
+        feed.polls += 1
+        if feed.entries is None:
+            feed.entries = entries
+            self._send(feed, lambda subscription: feed.event(subscription, type="snapshot", entries=entries))
+            return
+        changed, removed = diff(feed.entries, entries)
+        feed.entries = entries
+        if changed or removed:
+            self.stats["deltas"] += 1
+            self._send(feed, lambda subscription: feed.event(subscription, type="delta", changed=changed, removed=removed))
+
+    def _send(self, feed: Feed, build):
+        for subscription, callback in list(feed.subscribers.items()):
+            if callback(build(subscription)) is False:
+                self.unsubscribe(subscription)
+
+    async def stop(self):
+        tasks = [feed.task for feed in self.feeds.values() if feed.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.feeds.clear()
+        self._subscriptions.clear()
+
+    def snapshot(self) -> dict:
+        return dict(self.stats, subscriptions=len(self._subscriptions),
+                    feeds={f"{qmgr}/{kind}/{name}": {"subscribers": len(feed.subscribers), "polls": feed.polls,
+                                                     "entries": len(feed.entries or ())}
+                           for (qmgr, kind, name), feed in self.feeds.items()})
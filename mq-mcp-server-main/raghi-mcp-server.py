@@ -1,124 +1,182 @@
 #!/usr/bin/env python3
 import asyncio
 import json
+import os
 import sys
-import httpx
-from mcp.server import Server
-from mcp.types import Tool, TextContent
+from urllib.parse import urlencode
+import mqbatch
+import mqbrowse
+import mqcache
+import mqdepth
+import mqendpoints
+import mqpage
+import mqrest
+import mqsc
+import mcp_stdio
 
 # MQ Configuration
-URL_BASE = "https://localhost:9443/ibmmq/rest/v2/admin/"
-USER_NAME = "admin"
-PASSWORD = "passw0rd"
-
-server = Server("raghi-mq-server")
-
-@server.list_tools()
-async def list_tools():
-    return [
-        # Basic Tools
-        Tool(name="dspmq", description="List queue managers and status", inputSchema={"type": "object", "properties": {}, "required": []}),
-        Tool(name="runmqsc", description="Run MQSC command", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "mqsc_command": {"type": "string"}}, "required": ["qmgr_name", "mqsc_command"]}),
-        
-        # Queue Management
-        Tool(name="list_queues", description="List all queues", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="create_queue", description="Create queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "queue_type": {"type": "string", "default": "local"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="delete_queue", description="Delete queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="get_queue_depth", description="Get queue depth", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="clear_queue", description="Clear queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        
-        # Channel Management
-        Tool(name="list_channels", description="List all channels", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="start_channel", description="Start channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="stop_channel", description="Stop channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="ping_channel", description="Ping channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        
-        # Message Operations
-        Tool(name="put_message", description="Put message to queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "message": {"type": "string"}}, "required": ["qmgr_name", "queue_name", "message"]}),
-        Tool(name="get_message", description="Get message from queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="browse_messages", description="Browse queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        
-        # Monitoring
-        Tool(name="get_queue_stats", description="Get queue statistics", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="get_channel_status", description="Get channel status", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="list_connections", description="List active connections", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        
-        # Security
-        Tool(name="refresh_security", description="Refresh security", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="display_auth", description="Display authority records", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "object_name": {"type": "string"}}, "required": ["qmgr_name", "object_name"]})
-    ]
-
-@server.call_tool()
-async def call_tool(name: str, arguments: dict):
+URL_BASE = os.getenv("MQ_URL", "https://localhost:9443/ibmmq/rest/v2/admin/")
+USER_NAME = os.getenv("MQ_USER", "admin")
+PASSWORD = os.getenv("MQ_PASSWORD", "passw0rd")
+# Serve stdio with the minimal built-in transport instead of the mcp package (much faster start-up)
+LAZY_START = os.getenv("MCP_LAZY_START", "false").lower() in ("1", "true", "yes")
+MESSAGING_URL_BASE = os.getenv("MQ_MESSAGING_URL", URL_BASE.replace("/v2/admin/", "/v3/messaging/"))
+# MQ_ENDPOINTS lists several mqweb hosts; otherwise the single endpoint above
+endpoints = mqendpoints.EndpointRegistry.from_env(URL_BASE, USER_NAME, PASSWORD, MESSAGING_URL_BASE)
+
+# The tool catalogue is plain data, so tools/list can be answered without importing mcp
+TOOLS = [
+    # Basic Tools
+    dict(name="dspmq", description="List queue managers and status", inputSchema={"type": "object", "properties": {}, "required": []}),
+    dict(name="runmqsc", description="Run MQSC command", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "mqsc_command": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "mqsc_command"]}),
+    
+    # Queue Management
+    dict(name="list_queues", description="List queues, optionally filtered by name pattern and type and limited to some attributes", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "name": mqsc.NAME_SCHEMA, "queue_type": {"type": "string", "enum": ["all"] + list(mqsc.QUEUE_TYPES), "default": "all"}, "attributes": mqsc.ATTRIBUTES_SCHEMA, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    dict(name="create_queue", description="Create queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "queue_type": {"type": "string", "default": "local"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="delete_queue", description="Delete queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="get_queue_depth", description="Get queue depth", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="clear_queue", description="Clear queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    
+    # Channel Management
+    dict(name="list_channels", description="List channels, optionally filtered by name pattern and type and limited to some attributes", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "name": mqsc.NAME_SCHEMA, "channel_type": {"type": "string", "enum": list(mqsc.CHANNEL_TYPES)}, "attributes": mqsc.ATTRIBUTES_SCHEMA, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    dict(name="start_channel", description="Start channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="stop_channel", description="Stop channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="ping_channel", description="Ping channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    
+    # Message Operations
+    dict(name="put_message", description="Put message to queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "message": {"type": "string"}}, "required": ["qmgr_name", "queue_name", "message"]}),
+    dict(name="get_message", description="Get message from queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="bulk_put_messages", description="Put a list or generated range of messages to a queue through the v3 messaging API", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "messages": {"type": "array", "items": {"type": "string"}}, "count": {"type": "integer", "description": "Generate this many messages from template instead of passing messages"}, "template": {"type": "string", "default": "Message {i}"}, "window": {"type": "integer", "description": "Puts in flight at once"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="browse_messages", description=f"Browse queue messages a page at a time without removing them; pass next_cursor back to continue. Walks at most the first {mqbrowse.MAX_DEPTH} messages of the queue; a page with truncated true stopped there", inputSchema=mqbrowse.BROWSE_SCHEMA),
+    
+    # Monitoring
+    dict(name="get_queue_stats", description="Get queue status statistics: depth, open handles, last get/put time, oldest message age", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="get_channel_status", description="Get channel status", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="list_connections", description="List active connections", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    
+    # Security
+    dict(name="refresh_security", description="Refresh security", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
+    dict(name="display_auth", description="Display authority records", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "object_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "object_name"]}),
+
+    # Batch
+    dict(name="batch", description="Run several tool calls concurrently and return per-call results in order", inputSchema=mqbatch.BATCH_SCHEMA),
+
+    # Diagnostics
+    dict(name="server_stats", description="Show MQ REST connection pool, result cache and queue status snapshot statistics", inputSchema={"type": "object", "properties": {}, "required": []})
+]
+
+def create_server():
+    """The mcp package server, imported only when it is used."""
+    from mcp.server import Server
+    from mcp.types import Tool, TextContent
+
+    server = Server("raghi-mq-server")
+
+    @server.list_tools()
+    async def list_tools():
+        return [Tool(**tool) for tool in TOOLS]
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: dict):
+        result = await run_tool(name, arguments)
+        return [TextContent(type="text", text=result)]
+
+    return server
+
+async def run_tool(name: str, arguments: dict) -> str:
     handlers = {
         "dspmq": dspmq,
-        "runmqsc": lambda: runmqsc(arguments.get("qmgr_name"), arguments.get("mqsc_command")),
-        "list_queues": lambda: list_queues(arguments.get("qmgr_name")),
+        "runmqsc": lambda: runmqsc(arguments.get("qmgr_name"), arguments.get("mqsc_command"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "list_queues": lambda: list_queues(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("name", "*"), arguments.get("queue_type", "all"), arguments.get("attributes"), arguments.get("page_size"), arguments.get("cursor")),
         "create_queue": lambda: create_queue(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("queue_type", "local")),
         "delete_queue": lambda: delete_queue(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_queue_depth": lambda: get_queue_depth(arguments.get("qmgr_name"), arguments.get("queue_name")),
+        "get_queue_depth": lambda: get_queue_depth(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("format", "text")),
         "clear_queue": lambda: clear_queue(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "list_channels": lambda: list_channels(arguments.get("qmgr_name")),
+        "list_channels": lambda: list_channels(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("name", "*"), arguments.get("channel_type"), arguments.get("attributes"), arguments.get("page_size"), arguments.get("cursor")),
         "start_channel": lambda: start_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "stop_channel": lambda: stop_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "ping_channel": lambda: ping_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "put_message": lambda: put_message(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("message")),
+        "bulk_put_messages": lambda: bulk_put_messages(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("messages"), arguments.get("count"), arguments.get("template", "Message {i}"), arguments.get("window")),
         "get_message": lambda: get_message(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "browse_messages": lambda: browse_messages(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_queue_stats": lambda: get_queue_stats(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_channel_status": lambda: get_channel_status(arguments.get("qmgr_name"), arguments.get("channel_name")),
-        "list_connections": lambda: list_connections(arguments.get("qmgr_name")),
+        "browse_messages": lambda: browse_messages(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("page_size", mqbrowse.PAGE_SIZE), arguments.get("cursor"), arguments.get("headers_only", False), arguments.get("max_bytes", mqbrowse.MAX_BYTES)),
+        "get_queue_stats": lambda: get_queue_stats(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "get_channel_status": lambda: get_channel_status(arguments.get("qmgr_name"), arguments.get("channel_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "list_connections": lambda: list_connections(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
         "refresh_security": lambda: refresh_security(arguments.get("qmgr_name")),
-        "display_auth": lambda: display_auth(arguments.get("qmgr_name"), arguments.get("object_name"))
+        "display_auth": lambda: display_auth(arguments.get("qmgr_name"), arguments.get("object_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "batch": lambda: batch(arguments.get("calls", []), arguments.get("max_concurrency")),
+        "server_stats": server_stats
     }
     
     if name in handlers:
-        result = await handlers[name]()
-        return [TextContent(type="text", text=result)]
+        return await handlers[name]()
     else:
         raise ValueError(f"Unknown tool: {name}")
 
-async def mq_request(method: str, endpoint: str, data: dict = None):
-    headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
-    auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
-    url = URL_BASE + endpoint
-    
-    async with httpx.AsyncClient(verify=False, auth=auth) as client:
-        try:
-            if method == "GET":
-                response = await client.get(url, headers=headers, timeout=30.0)
-            elif method == "POST":
-                response = await client.post(url, json=data, headers=headers, timeout=30.0)
-            elif method == "DELETE":
-                response = await client.delete(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json() if response.content else {"status": "success"}
-        except Exception as e:
-            return {"error": str(e)}
+async def mq_request(method: str, endpoint: str, data: dict = None, messaging: bool = False):
+    return await endpoints.call(method, endpoint, data, messaging)
 
 # Basic Tools
 async def dspmq():
-    result = await mq_request("GET", "qmgr/")
-    if "error" in result:
-        return f"Error: {result['error']}"
+    # Every mqweb endpoint is asked concurrently; a slow one only delays its own entry
+    results = await endpoints.list_qmgrs()
+    fleet = len(results) > 1
     output = "\n---\n"
-    for qmgr in result.get('qmgr', []):
-        output += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
+    for endpoint, result in results:
+        if "error" in result:
+            if not fleet:
+                return f"Error: {result['error']}"
+            output += f"endpoint = {endpoint.name}, error = {result['error']}\n---\n"
+            continue
+        for qmgr in result.get('qmgr', []):
+            suffix = f", endpoint = {endpoint.name}" if fleet else ""
+            output += f"name = {qmgr['name']}, running = {qmgr['state']}{suffix}\n---\n"
     return output
 
-async def runmqsc(qmgr_name: str, mqsc_command: str):
-    data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
-    result = await mq_request("POST", f"action/qmgr/{qmgr_name}/mqsc", data)
-    if "error" in result:
-        return f"Error: {result['error']}"
+async def runmqsc(qmgr_name: str, mqsc_command: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    # Long results are returned a page at a time; later pages are sliced from the kept result
+    fetch = (lambda: runmqsc_text(qmgr_name, mqsc_command)) if output_format == "text" else (lambda: runmqsc_objects(qmgr_name, mqsc_command))
+    try:
+        page = await mqpage.PAGES.page(qmgr_name, mqsc_command, output_format, fetch, page_size, cursor)
+    except ValueError as e:
+        return f"Error: {e}"
+    if output_format != "text":
+        return json.dumps(dict(page.items.to_dict(output_format), **page.describe()))
     output = "\n---\n"
-    for cmd in result.get('commandResponse', []):
-        output += cmd['text'][0] + "\n---\n"
-    return output
+    for text in page.items:
+        output += text + "\n---\n"
+    return output + page.trailer()
+
+# Text of each command response (one per MQ object); mqweb errors raise ValueError
+async def runmqsc_text(qmgr_name: str, mqsc_command: str):
+    data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
+    # Each response is joined as it is parsed off the wire, so the whole mqweb body is never held
+    return ["\n".join(cmd['text']) async for cmd in endpoints.stream("POST", f"action/qmgr/{qmgr_name}/mqsc", data)]
+
+# Structured results via runCommandJSON: typed attributes per MQ object, no text parsing
+async def runmqsc_objects(qmgr_name: str, mqsc_command: str):
+    data = mqsc.to_json_request(mqsc_command)
+    try:
+        return await mqsc.MQObjects.from_stream(endpoints.stream("POST", f"action/qmgr/{qmgr_name}/mqsc", data))
+    except ValueError as e:
+        return mqsc.MQObjects(errors=[{"error": str(e)}])
+
+# Queue depths and stats are served from a background QSTATUS sweep per queue manager
+depths = mqdepth.DepthPoller(lambda qmgr_name: runmqsc_objects(qmgr_name, mqdepth.SWEEP_COMMAND))
 
 # Queue Management
-async def list_queues(qmgr_name: str):
-    result = await mq_request("GET", f"qmgr/{qmgr_name}/queue")
+async def list_queues(qmgr_name: str, output_format: str = "text", name: str = "*", queue_type: str = "all", attributes: list = None, page_size: int = None, cursor: str = None):
+    if queue_type != "all" and queue_type not in mqsc.QUEUE_TYPES:
+        return f"Error: Unknown queue type: {queue_type}"
+    try:
+        command = mqsc.display_command(mqsc.QUEUE_TYPES.get(queue_type, "QUEUE"), name, attributes=attributes or ["TYPE"])
+    except ValueError as e:
+        return f"Error: {e}"
+    # REST attribute names differ from MQSC, so projections go through MQSC
+    if output_format != "text" or attributes or page_size or cursor:
+        return await runmqsc(qmgr_name, command, output_format, page_size, cursor)
+    result = await mq_request("GET", f"qmgr/{qmgr_name}/queue?" + urlencode({"name": name, "type": queue_type}))
     if "error" in result:
         return f"Error: {result['error']}"
     output = "\n---\n"
@@ -132,15 +190,27 @@ async def create_queue(qmgr_name: str, queue_name: str, queue_type: str):
 async def delete_queue(qmgr_name: str, queue_name: str):
     return await runmqsc(qmgr_name, f"DELETE QLOCAL({queue_name})")
 
-async def get_queue_depth(qmgr_name: str, queue_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH")
+async def get_queue_depth(qmgr_name: str, queue_name: str, output_format: str = "text"):
+    cached = depths.lookup(qmgr_name, queue_name)
+    if cached is not None:
+        return mqdepth.format_status(*cached, output_format, keys=("curdepth",))
+    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH", output_format)
 
 async def clear_queue(qmgr_name: str, queue_name: str):
     return await runmqsc(qmgr_name, f"CLEAR QLOCAL({queue_name})")
 
 # Channel Management
-async def list_channels(qmgr_name: str):
-    return await runmqsc(qmgr_name, "DISPLAY CHANNEL(*)")
+async def list_channels(qmgr_name: str, output_format: str = "text", name: str = "*", channel_type: str = None, attributes: list = None, page_size: int = None, cursor: str = None):
+    filters = {}
+    if channel_type:
+        if channel_type.upper() not in mqsc.CHANNEL_TYPES:
+            return f"Error: Unknown channel type: {channel_type}"
+        filters["CHLTYPE"] = channel_type.upper()
+    try:
+        command = mqsc.display_command("CHANNEL", name, filters, attributes)
+    except ValueError as e:
+        return f"Error: {e}"
+    return await runmqsc(qmgr_name, command, output_format, page_size, cursor)
 
 async def start_channel(qmgr_name: str, channel_name: str):
     return await runmqsc(qmgr_name, f"START CHANNEL({channel_name})")
@@ -153,44 +223,95 @@ async def ping_channel(qmgr_name: str, channel_name: str):
 
 # Message Operations
 async def put_message(qmgr_name: str, queue_name: str, message: str):
-    data = {"type": "message", "message": {"applicationData": message}}
-    result = await mq_request("POST", f"qmgr/{qmgr_name}/queue/{queue_name}/message", data)
-    return f"Message put result: {result}"
+    try:
+        target = await endpoints.endpoint_for(qmgr_name)
+    except LookupError as e:
+        return f"Error: {e}"
+    url = target.messaging_url + f"qmgr/{qmgr_name}/queue/{queue_name}/message"
+    report = await mqrest.get_client(url, target.user, target.password).put_messages(url, [message], 1)
+    if report["failed"]:
+        return f"Error: {report['failures'][0]['error']}"
+    return f"Message put to {queue_name} on {qmgr_name}"
+
+async def bulk_put_messages(qmgr_name: str, queue_name: str, messages: list = None, count: int = None, template: str = "Message {i}", window: int = None):
+    if messages is None:
+        if not count:
+            return "Error: provide either messages or count"
+        messages = (template.replace("{i}", str(i)) for i in range(1, count + 1))
+    elif count is None:
+        count = len(messages)
+    if count > mqrest.MAX_BULK_PUT:
+        return f"Error: {count} messages exceeds the limit of {mqrest.MAX_BULK_PUT}"
+    try:
+        target = await endpoints.endpoint_for(qmgr_name)
+    except LookupError as e:
+        return f"Error: {e}"
+    url = target.messaging_url + f"qmgr/{qmgr_name}/queue/{queue_name}/message"
+    report = await mqrest.get_client(url, target.user, target.password).put_messages(url, messages, window or mqrest.PUT_WINDOW)
+    return json.dumps(report, indent=2)
 
 async def get_message(qmgr_name: str, queue_name: str):
     result = await mq_request("DELETE", f"qmgr/{qmgr_name}/queue/{queue_name}/message")
     return f"Message get result: {result}"
 
-async def browse_messages(qmgr_name: str, queue_name: str):
-    result = await mq_request("GET", f"qmgr/{qmgr_name}/queue/{queue_name}/message")
-    return f"Browse result: {result}"
+async def browse_messages(qmgr_name: str, queue_name: str, page_size: int = mqbrowse.PAGE_SIZE, cursor: str = None, headers_only: bool = False, max_bytes: int = mqbrowse.MAX_BYTES):
+    try:
+        target = await endpoints.endpoint_for(qmgr_name)
+        page = await mqbrowse.browse_page(target, qmgr_name, queue_name, cursor, page_size, headers_only, max_bytes)
+    except (LookupError, ValueError) as e:
+        return f"Error: {e}"
+    if "error" in page:
+        return f"Error: {page['error']}"
+    return json.dumps(page, indent=2)
 
 # Monitoring
-async def get_queue_stats(qmgr_name: str, queue_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) ALL")
+async def get_queue_stats(qmgr_name: str, queue_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    cached = depths.lookup(qmgr_name, queue_name)
+    if cached is not None:
+        return mqdepth.format_status(*cached, output_format)
+    return await runmqsc(qmgr_name, f"DISPLAY QSTATUS({queue_name}) TYPE(QUEUE) ALL", output_format, page_size, cursor)
 
-async def get_channel_status(qmgr_name: str, channel_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY CHSTATUS({channel_name})")
+async def get_channel_status(qmgr_name: str, channel_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, f"DISPLAY CHSTATUS({channel_name})", output_format, page_size, cursor)
 
-async def list_connections(qmgr_name: str):
-    return await runmqsc(qmgr_name, "DISPLAY CONN(*)")
+async def list_connections(qmgr_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, "DISPLAY CONN(*)", output_format, page_size, cursor)
 
 # Security
 async def refresh_security(qmgr_name: str):
     return await runmqsc(qmgr_name, "REFRESH SECURITY TYPE(CONNAUTH)")
 
-async def display_auth(qmgr_name: str, object_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY AUTHREC OBJNAME({object_name})")
+async def display_auth(qmgr_name: str, object_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, f"DISPLAY AUTHREC OBJNAME({object_name})", output_format, page_size, cursor)
+
+# Batch
+async def batch(calls: list, max_concurrency: int = None):
+    results = await mqbatch.run_batch(calls, run_tool, max_concurrency)
+    return json.dumps(results, indent=2)
+
+# Diagnostics
+async def server_stats():
+    return json.dumps({"pool": mqrest.pool_stats(), "cache": mqcache.RESULT_CACHE.snapshot(), "depth_poller": depths.snapshot_stats(), "endpoints": endpoints.snapshot(), "pages": mqpage.PAGES.snapshot()}, indent=2)
 
 async def main():
     print("Starting Raghi's comprehensive MQ MCP server...", file=sys.stderr)
     try:
+        if LAZY_START:
+            # Answer initialize and tools/list at once; httpx finishes importing in the background
+            preload = asyncio.create_task(asyncio.to_thread(mqrest.preload))
+            await mcp_stdio.serve(mcp_stdio.message_handler("raghi-mq-server", "1.0.0", TOOLS, run_tool))
+            await preload
+            return
         from mcp.server.stdio import stdio_server
+        server = create_server()
         async with stdio_server() as (read_stream, write_stream):
             await server.run(read_stream, write_stream, server.create_initialization_options())
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        await depths.stop()
+        await mqrest.aclose_all()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import asyncio
+import itertools
 import json
-import httpx
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse
+import mqrest
+import sse_sessions
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
 
 # MQ Configuration
 URL_BASE = "https://localhost:9443/ibmmq/rest/v2/admin/"
@@ -11,39 +13,36 @@ USER_NAME = "admin"
 PASSWORD = "passw0rd"
 
 app = FastAPI()
+# Event IDs keep increasing across connections, so a reconnect never sees one it already had
+event_ids = itertools.count(1)
 
 async def dspmq():
     try:
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
         url = URL_BASE + "qmgr/"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for qmgr in data['qmgr']:
-                result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
-            return result
+        response = await client.request("GET", url, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        result = "\n---\n"
+        for qmgr in data['qmgr']:
+            result += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
 async def runmqsc(qmgr_name: str, mqsc_command: str):
     try:
         headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "a"}
-        data = json.dumps({"type": "runCommand", "parameters": {"command": mqsc_command}})
+        data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
         url = URL_BASE + f"action/qmgr/{qmgr_name}/mqsc"
-        auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
+        client = mqrest.get_client(url, USER_NAME, PASSWORD)
         
-        async with httpx.AsyncClient(verify=False, auth=auth) as client:
-            response = await client.post(url, data=data, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            result = "\n---\n"
-            for cmd in data['commandResponse']:
-                result += cmd['text'][0] + "\n---\n"
-            return result
+        result = "\n---\n"
+        async for cmd in client.stream("POST", url, data, headers=headers):
+            result += cmd['text'][0] + "\n---\n"
+        return result
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -112,25 +111,38 @@ async def handle_mcp_message(message: dict):
             "error": {"code": -32601, "message": "Method not found"}
         }
 
-async def sse_generator():
+# One timer pings every idle connection with the same pre-encoded frame
+heartbeat = sse_sessions.Heartbeat(f"data: {json.dumps({'type': 'ping'})}\n\n", 30)
+
+def sse_event(data: dict) -> str:
+    return f"id: {next(event_ids)}\ndata: {json.dumps(data)}\n\n"
+
+async def sse_generator(last_event_id: str = None):
     """Generate SSE events"""
-    # Send initial connection event
-    yield f"data: {json.dumps({'type': 'connection', 'status': 'connected'})}\n\n"
+    # Send initial connection event; this stream carries no results, so a reconnect has nothing to replay
+    if last_event_id:
+        yield sse_event({'type': 'connection', 'status': 'reconnected', 'last_event_id': last_event_id})
+    else:
+        yield sse_event({'type': 'connection', 'status': 'connected'})
     
-    # Keep connection alive with periodic pings
-    while True:
-        await asyncio.sleep(30)
-        yield f"data: {json.dumps({'type': 'ping', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
+    # Keep connection alive with the shared heartbeat's pings
+    queue = sse_sessions.FrameBuffer()
+    heartbeat.add(queue)
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        heartbeat.discard(queue)
 
 @app.get("/")
 async def root():
     return {"message": "IBM MQ MCP Server", "endpoints": ["/sse", "/message"]}
 
 @app.get("/sse")
-async def sse_endpoint():
+async def sse_endpoint(request: Request):
     """Standard SSE endpoint"""
     return StreamingResponse(
-        sse_generator(),
+        sse_generator(request.headers.get("last-event-id")),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -140,10 +152,10 @@ async def sse_endpoint():
     )
 
 @app.post("/message")
-async def message_endpoint(message: dict):
-    """Handle MCP messages"""
-    response = await handle_mcp_message(message)
-    return response
+async def message_endpoint(message: dict | list = Body()):
+    """Handle MCP messages, or a JSON-RPC batch of them run concurrently"""
+    response = await sse_sessions.dispatch(message, handle_mcp_message)
+    return Response(status_code=202) if response is None else response
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Session registry shared by the worker processes of one SSE server.
+
+With several workers behind one listening socket, a client's SSE stream and
+its POSTs to /mcp/message can land on different workers. Every worker records
+the sessions it streams in a SQLite file in a shared directory, next to the
+Unix socket it listens on. A worker that receives a message for a session
+streamed by another worker handles it itself - so tool calls spread over all
+workers - and forwards only the encoded response frame to the owner's socket,
+which delivers it on the session's stream.
+
+    MCP_SSE_CLUSTER_DIR=/run/mcp-sse uvicorn raghi-sse-server:app --workers 4
+
+Each forwarded frame is one line of JSON ({"session": ..., "frame": ..., "key": ...}) on a
+connection kept open per peer worker, so frames for a session stay in order.
+
+A client reconnecting with Last-Event-ID to a worker other than the one that
+streamed its session takes the session over: the old owner hands over its
+numbering and replay frames ({"take": ..., "to": ...} on a connection of its
+own) and forwards whatever still reaches it to the new owner.
+
+The SQLite file is only touched from one thread of its own, never from the
+event loop. Sessions of other workers this worker has looked up are mirrored
+in memory, and every SWEEP_SECONDS the mirror is refreshed from the file.
+"""
+import asyncio
+import collections
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from sse_sessions import Session, SessionRegistry, end_subscriptions, encode, parse_event_id
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, socket TEXT NOT NULL)"
+# How often a worker refreshes its view of the sessions streamed by other workers
+SWEEP_SECONDS = float(os.getenv("MCP_SSE_CLUSTER_SWEEP_SECONDS", "10"))
+# How long a reconnect waits for the previous owner to hand its session over
+TAKE_TIMEOUT = 5
+
+
+class RemoteSession:
+    """A session streamed by another worker; send() forwards to it."""
+
+    __slots__ = ("id", "socket", "registry")
+
+    def __init__(self, session_id: str, socket: str, registry: "ClusterRegistry"):
+        self.id = session_id
+        self.socket = socket
+        self.registry = registry
+
+    def send(self, message: dict, event: str = "message", key: str = None):
+        self.registry.forward(self.socket, self.id, encode(message, event), key)
+
+    def stale(self, key: str) -> bool:
+        # Drops happen in the owner's buffer, out of sight of this worker
+        return False
+
+
+class ClusterRegistry(SessionRegistry):
+    """SessionRegistry whose sessions are visible to, and reachable from, the other workers."""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.socket = os.path.join(directory, f"worker-{os.getpid()}.sock")
+        self.db = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="sse-cluster-db")
+        self._server = None
+        self._sweeper = None
+        self._peers = {}
+        # Writers of connections from other workers, closed on stop() so it does not wait on the peers
+        self._incoming = set()
+        # session id -> socket of the worker streaming it, for sessions of other workers looked up here
+        self._owners = {}
+        # session id -> {subscription id: end} for sessions streamed by other workers
+        self._remote = {}
+        # session id -> [(frame, key)] that arrived while the session is being taken over
+        self._taking = {}
+        self._cluster_sessions = 0
+        self.stats = {"forwarded": 0, "received": 0, "undeliverable": 0, "taken_over": 0, "handed_over": 0}
+
+    def _connect(self):
+        # Autocommit, and WAL so lookups from other workers do not wait on writers
+        self.db = sqlite3.connect(os.path.join(self.directory, "sessions.db"), timeout=5, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(SCHEMA)
+
+    def _execute(self, sql: str, params=()) -> list:
+        return self.db.execute(sql, params).fetchall()
+
+    def _query(self, sql: str, params=()) -> asyncio.Future:
+        """Run a statement on the database thread; the future's result is its rows."""
+        return asyncio.get_running_loop().run_in_executor(self._executor, self._execute, sql, params)
+
+    def _query_later(self, sql: str, params=()):
+        """_query() for callers that cannot wait for it; failures are logged instead of lost."""
+        self._query(sql, params).add_done_callback(_log_failure)
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._connect)
+        if os.path.exists(self.socket):
+            os.unlink(self.socket)
+        self._server = await asyncio.start_unix_server(self._receive, path=self.socket)
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._incoming):
+                writer.close()
+            await self._server.wait_closed()
+        for queue, task in self._peers.values():
+            task.cancel()
+        if self.db is not None:
+            await self._query("DELETE FROM sessions WHERE socket = ?", (self.socket,))
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.db.close)
+        self._executor.shutdown(wait=False)
+        if os.path.exists(self.socket):
+            os.unlink(self.socket)
+
+    async def open(self, last_event_id: str = None) -> Session:
+        session_id, _ = parse_event_id(last_event_id)
+        if session_id and session_id not in self.sessions:
+            rows = await self._query("SELECT socket FROM sessions WHERE id = ?", (session_id,))
+            if rows and rows[0][0] != self.socket:
+                await self._take(session_id, rows[0][0])
+        session = await super().open(last_event_id)
+        await self._query("INSERT OR REPLACE INTO sessions (id, socket) VALUES (?, ?)", (session.id, self.socket))
+        return session
+
+    async def _take(self, session_id: str, socket: str):
+        """Take over a session from the worker streaming it, keeping its numbering and replay frames."""
+        early = self._taking[session_id] = []
+        try:
+            async with asyncio.timeout(TAKE_TIMEOUT):
+                reader, writer = await asyncio.open_unix_connection(socket)
+                try:
+                    writer.write(json.dumps({"take": session_id, "to": self.socket}).encode() + b"\n")
+                    await writer.drain()
+                    line = await reader.readline()
+                finally:
+                    writer.close()
+        except (OSError, TimeoutError) as e:
+            # The session is lost; the client gets a new one and a resync
+            print(f"SSE worker at {socket} did not hand over session {session_id} ({e})", file=sys.stderr)
+            return
+        finally:
+            self._taking.pop(session_id, None)
+        state = json.loads(line) if line else {}
+        if "last_id" not in state:
+            return
+        session = Session(session_id)
+        session.last_id = state["last_id"]
+        session.replay = collections.deque((n, frame) for n, frame in state["replay"])
+        session.replay_bytes = sum(len(frame) for _, frame in session.replay)
+        # Change feeds this worker pushed to the session from afar now end with it
+        session.subscriptions = self._remote.pop(session_id, {})
+        self.sessions[session_id] = session
+        self._owners.pop(session_id, None)
+        self.stats["taken_over"] += 1
+        # Forwarded by the old owner before this worker was ready for them
+        for frame, key in early:
+            session.deliver(frame, key)
+
+    def _hand_over(self, session_id: str, socket: str) -> dict:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return {}
+        self._owners[session_id] = socket
+        if session.subscriptions:
+            # Still this worker's feeds, now pushing to a session streamed elsewhere
+            self._remote.setdefault(session_id, {}).update(session.subscriptions)
+        session.subscriptions = {}
+        if session.queue is not None:
+            # The client has left the stream this worker still holds
+            session.queue.put_nowait(None)
+        self.stats["handed_over"] += 1
+        return {"last_id": session.last_id, "replay": list(session.replay)}
+
+    def close(self, session_id: str):
+        session = super().close(session_id)
+        if session is not None:
+            self._query_later("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return session
+
+    def track(self, session, subscription: str, end):
+        local = self.sessions.get(session.id)
+        if local is not None:
+            super().track(local, subscription, end)
+        else:
+            # The owner cannot reach this worker's feeds; _sweep() notices when the session is gone
+            self._remote.setdefault(session.id, {})[subscription] = end
+
+    def untrack(self, session, subscription: str) -> bool:
+        local = self.sessions.get(session.id)
+        found = local is not None and super().untrack(local, subscription)
+        subscriptions = self._remote.get(session.id, {})
+        found = subscriptions.pop(subscription, None) is not None or found
+        if not subscriptions:
+            self._remote.pop(session.id, None)
+        return found
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(SWEEP_SECONDS)
+            try:
+                owners = dict(await self._query("SELECT id, socket FROM sessions"))
+            except sqlite3.Error as e:
+                # Keep the mirror as it is until the next sweep
+                print(f"SSE session registry sweep failed: {e}", file=sys.stderr)
+                continue
+            self._cluster_sessions = len(owners)
+            for session_id in list(self._owners):
+                if owners.get(session_id, self.socket) == self.socket:
+                    del self._owners[session_id]
+                else:
+                    self._owners[session_id] = owners[session_id]
+            for session_id in list(self._remote):
+                if session_id not in owners:
+                    end_subscriptions(self._remote.pop(session_id, {}))
+
+    def get(self, session_id: str):
+        """A session of this worker, or of another worker that find() looked up (it may have closed since)."""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return session
+        socket = self._owners.get(session_id)
+        return RemoteSession(session_id, socket, self) if socket is not None else None
+
+    async def find(self, session_id: str):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            return session
+        rows = await self._query("SELECT socket FROM sessions WHERE id = ?", (session_id,))
+        if not rows or rows[0][0] == self.socket:
+            self._owners.pop(session_id, None)
+            return self.sessions.get(session_id)
+        self._owners[session_id] = rows[0][0]
+        return RemoteSession(session_id, rows[0][0], self)
+
+    def forward(self, socket: str, session_id: str, frame: str, key: str = None):
+        peer = self._peers.get(socket)
+        if peer is None or peer[1].done():
+            queue = asyncio.Queue()
+            peer = self._peers[socket] = (queue, asyncio.create_task(self._send_to(socket, queue)))
+        peer[0].put_nowait(json.dumps({"session": session_id, "frame": frame, "key": key}).encode() + b"\n")
+
+    async def _send_to(self, socket: str, queue: asyncio.Queue):
+        try:
+            _, writer = await asyncio.open_unix_connection(socket)
+        except OSError as e:
+            # The owning worker is gone; its sessions cannot be reached any more
+            print(f"SSE worker at {socket} is unreachable ({e}), dropping its sessions", file=sys.stderr)
+            self._query_later("DELETE FROM sessions WHERE socket = ?", (socket,))
+            for session_id in [s for s, owner in self._owners.items() if owner == socket]:
+                del self._owners[session_id]
+            self.stats["undeliverable"] += queue.qsize()
+            self._peers.pop(socket, None)
+            return
+        try:
+            while True:
+                line = await queue.get()
+                writer.write(line)
+                self.stats["forwarded"] += 1
+                if queue.empty():
+                    await writer.drain()
+        except (OSError, ConnectionError):
+            self._peers.pop(socket, None)
+        finally:
+            writer.close()
+
+    async def _receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._incoming.add(writer)
+        try:
+            while line := await reader.readline():
+                item = json.loads(line)
+                if "take" in item:
+                    writer.write(json.dumps(self._hand_over(item["take"], item["to"])).encode() + b"\n")
+                    await writer.drain()
+                    continue
+                session = self.sessions.get(item["session"])
+                if session is None:
+                    socket = self._owners.get(item["session"])
+                    if item["session"] in self._taking:
+                        self._taking[item["session"]].append((item["frame"], item.get("key")))
+                    elif socket is not None:
+                        # Sent here before the session moved to another worker
+                        self.forward(socket, item["session"], item["frame"], item.get("key"))
+                    else:
+                        self.stats["undeliverable"] += 1
+                    continue
+                self.stats["received"] += 1
+                session.deliver(item["frame"], item.get("key"))
+        finally:
+            self._incoming.discard(writer)
+            writer.close()
+
+    def snapshot(self) -> dict:
+        # cluster_sessions is as of the last sweep
+        return dict(self.stats, worker=os.getpid(), local_sessions=len(self.sessions), cluster_sessions=self._cluster_sessions)
+
+
+def _log_failure(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"SSE session registry update failed: {future.exception()}", file=sys.stderr)
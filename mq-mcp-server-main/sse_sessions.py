@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Session-based MCP-over-SSE transport.
+
+A client opens GET /sse and receives an "endpoint" event naming its own
+message URL (".../mcp/message?session_id=..."). JSON-RPC messages POSTed there
+are accepted immediately, handled in the background, and their responses are
+pushed onto the session's queue, which the SSE stream drains as "message"
+events. An idle session costs one queue and one suspended generator: there is
+no timer per stream. A single Heartbeat task pings idle streams, and a stream
+whose client has gone away ends when writing the ping fails.
+
+Every frame on a session stream carries an event ID, "<session>.<n>" with n
+counting up from 1, and the last REPLAY_EVENTS frames (at most REPLAY_BYTES)
+are kept. When the stream drops, the session stays open for RESUME_SECONDS: a
+client reconnecting to /sse with Last-Event-ID gets the same session back and
+only the frames it missed, or a "resync" event first if some of them are no
+longer kept (so it should re-list whatever state it tracks).
+
+Frames waiting for a slow client are held in a FrameBuffer of at most
+BUFFER_BYTES / BUFFER_FRAMES. When it overflows, OVERFLOW decides:
+- drop_oldest - drop the oldest waiting frames
+- coalesce    - first drop keyed frames superseded by a newer frame with the
+                same key (change feed events, whose next event becomes a full
+                snapshot), then the oldest
+- disconnect  - end the stream; the client can reconnect with Last-Event-ID
+                and be replayed what is still kept
+
+A POST body may also be a JSON-RPC batch array: its calls run concurrently
+and the array of their responses comes back as one message.
+"""
+import asyncio
+import collections
+import contextvars
+import json
+import os
+import uuid
+
+import mqmetrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HEARTBEAT_INTERVAL = float(os.getenv("MCP_SSE_HEARTBEAT", "15"))
+MAX_BATCH = int(os.getenv("MCP_MAX_BATCH", "100"))
+REPLAY_EVENTS = int(os.getenv("MCP_SSE_REPLAY_EVENTS", "128"))
+REPLAY_BYTES = int(os.getenv("MCP_SSE_REPLAY_BYTES", str(1024 * 1024)))
+RESUME_SECONDS = float(os.getenv("MCP_SSE_RESUME_SECONDS", "60"))
+BUFFER_BYTES = int(os.getenv("MCP_SSE_BUFFER_BYTES", str(4 * 1024 * 1024)))
+BUFFER_FRAMES = int(os.getenv("MCP_SSE_BUFFER_FRAMES", "1000"))
+OVERFLOW = os.getenv("MCP_SSE_OVERFLOW", "disconnect")
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+if OVERFLOW not in OVERFLOW_POLICIES:
+    raise ValueError(f"MCP_SSE_OVERFLOW must be one of {', '.join(OVERFLOW_POLICIES)}, not {OVERFLOW!r}")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    "X-Accel-Buffering": "no",
+}
+
+PING_FRAME = ": ping\n\n"
+
+# The session whose POSTed message is being handled, for tools that push to it later
+CURRENT_SESSION = contextvars.ContextVar("mcp_session", default=None)
+
+
+def dumps(value) -> bytes:
+    """Compact JSON as UTF-8 bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(body: bytes):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def encode(message, event: str = "message") -> str:
+    """Encode a JSON-RPC message as one SSE frame."""
+    return f"event: {event}\ndata: {dumps(message).decode()}\n\n"
+
+
+def error_response(request_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+async def dispatch(payload, handler):
+    """Handle a JSON-RPC message or batch array with handler(message).
+
+    A batch returns the list of responses of its requests, in order.
+    Notifications get none, so a notification or a batch of only
+    notifications returns None. A handler that raises answers -32603.
+    """
+    if not isinstance(payload, list):
+        return await _handle(payload, handler)
+    if not payload:
+        return error_response(None, -32600, "Invalid Request: empty batch")
+    if len(payload) > MAX_BATCH:
+        return error_response(None, -32600, f"Invalid Request: batch of {len(payload)} messages exceeds the limit of {MAX_BATCH}")
+    responses = await asyncio.gather(*(_handle(message, handler) for message in payload))
+    return [response for response in responses if response is not None] or None
+
+
+async def _handle(message, handler):
+    if not isinstance(message, dict):
+        return error_response(None, -32600, "Invalid Request")
+    try:
+        response = await handler(message)
+    except Exception as e:
+        response = error_response(message.get("id"), -32603, str(e))
+    return response if message.get("id") is not None else None
+
+
+def end_subscriptions(subscriptions: dict):
+    """Run and forget the end() callables of a {subscription id: end} dict."""
+    ends = list(subscriptions.values())
+    subscriptions.clear()
+    for end in ends:
+        end()
+
+
+class FrameBuffer:
+    """Bounded queue of encoded frames for one stream; get() returns None once the stream should end."""
+
+    def __init__(self, max_bytes: int = BUFFER_BYTES, max_frames: int = BUFFER_FRAMES, policy: str = OVERFLOW):
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.policy = policy
+        self.frames = collections.deque()
+        self.bytes = 0
+        self.closed = False
+        self._dropped_keys = set()
+        self._waiter = None
+
+    def empty(self) -> bool:
+        return not self.frames
+
+    def put_nowait(self, frame: str, key: str = None):
+        """Queue a frame (None ends the stream); keyed frames supersede older ones with the same key."""
+        if self.closed:
+            return
+        if frame is None:
+            self.close()
+        else:
+            self.frames.append((frame, key))
+            self._grow(len(frame))
+            # One frame larger than the whole buffer is still let through on its own
+            if len(self.frames) > 1 and (len(self.frames) > self.max_frames or self.bytes > self.max_bytes):
+                self._overflow()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _grow(self, size: int):
+        self.bytes += size
+        mqmetrics.SSE_BUFFERED_BYTES.inc(size)
+
+    def _drop(self, entry, reason: str):
+        self._grow(-len(entry[0]))
+        if entry[1] is not None:
+            self._dropped_keys.add(entry[1])
+        mqmetrics.SSE_DROPPED_FRAMES.inc(reason=reason)
+
+    def _overflow(self):
+        if self.policy == "disconnect":
+            mqmetrics.SSE_OVERFLOW_DISCONNECTS.inc()
+            self.close()
+            return
+        if self.policy == "coalesce":
+            kept, seen = collections.deque(), set()
+            for entry in reversed(self.frames):
+                if entry[1] is not None and entry[1] in seen:
+                    self._drop(entry, "coalesced")
+                    continue
+                seen.add(entry[1])
+                kept.appendleft(entry)
+            self.frames = kept
+        while len(self.frames) > 1 and (len(self.frames) > self.max_frames or self.bytes > self.max_bytes):
+            self._drop(self.frames.popleft(), "oldest")
+
+    def close(self):
+        self.closed = True
+        while self.frames:
+            self._drop(self.frames.popleft(), "disconnect")
+
+    def take_dropped(self, key: str) -> bool:
+        """Whether a frame with this key was dropped since the last call; its sender should resend full state."""
+        if key in self._dropped_keys:
+            self._dropped_keys.discard(key)
+            return True
+        return False
+
+    async def get(self):
+        while not self.frames:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+        frame, _ = self.frames.popleft()
+        self._grow(-len(frame))
+        return frame
+
+
+class Heartbeat:
+    """One timer for all streams: a pre-encoded ping frame for every idle stream each interval.
+
+    Stream queues are spread over the slots of a wheel that turns once per
+    interval, so each tick only visits one slot's queues, and a queue that still
+    has frames waiting is skipped. The wheel stops turning when no stream is left.
+    """
+
+    def __init__(self, frame: str = PING_FRAME, interval: float = HEARTBEAT_INTERVAL, slots: int = 16):
+        self.frame = frame
+        self.interval = interval
+        self.wheel = [set() for _ in range(slots)]
+        self._slot_of = {}
+        self._next_slot = 0
+        self._task = None
+        self.pings = 0
+
+    def add(self, queue: FrameBuffer):
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % len(self.wheel)
+        self.wheel[slot].add(queue)
+        self._slot_of[queue] = slot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._turn())
+
+    def discard(self, queue: FrameBuffer):
+        slot = self._slot_of.pop(queue, None)
+        if slot is not None:
+            self.wheel[slot].discard(queue)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    async def _turn(self):
+        tick = self.interval / len(self.wheel)
+        slot = 0
+        while self._slot_of:
+            await asyncio.sleep(tick)
+            for queue in self.wheel[slot]:
+                if queue.empty():
+                    queue.put_nowait(self.frame)
+                    self.pings += 1
+            slot = (slot + 1) % len(self.wheel)
+
+
+HEARTBEAT = Heartbeat()
+
+
+def parse_event_id(event_id: str):
+    """(session id, n) of a Last-Event-ID header, or (None, None) if it is not one of ours."""
+    session_id, _, n = (event_id or "").strip().rpartition(".")
+    return (session_id, int(n)) if session_id and n.isdigit() else (None, None)
+
+
+class Session:
+    """One client's SSE session; queue is None while no stream is attached."""
+
+    __slots__ = ("id", "queue", "last_id", "replay", "replay_bytes", "attachments", "subscriptions")
+
+    def __init__(self, session_id: str = None):
+        self.id = session_id or uuid.uuid4().hex
+        self.queue = None
+        self.last_id = 0
+        self.replay = collections.deque()
+        self.replay_bytes = 0
+        self.attachments = 0
+        # subscription id -> callable that ends it, run when the session closes
+        self.subscriptions = {}
+
+    def send(self, message: dict, event: str = "message", key: str = None):
+        self.deliver(encode(message, event), key)
+
+    def stale(self, key: str) -> bool:
+        """Whether a frame sent with this key was dropped from the stream buffer; send full state next."""
+        return self.queue is not None and self.queue.take_dropped(key)
+
+    def deliver(self, frame: str, key: str = None):
+        """Number an encoded frame, keep it for replay, and queue it for the attached stream."""
+        self.last_id += 1
+        frame = f"id: {self.id}.{self.last_id}\n{frame}"
+        self.replay.append((self.last_id, frame))
+        self.replay_bytes += len(frame)
+        while len(self.replay) > REPLAY_EVENTS or (self.replay_bytes > REPLAY_BYTES and len(self.replay) > 1):
+            self.replay_bytes -= len(self.replay.popleft()[1])
+        if self.queue is not None:
+            self.queue.put_nowait(frame, key)
+
+    def missed(self, after: int) -> list:
+        """Kept frames numbered after `after`, preceded by a resync event if some were dropped."""
+        frames = [frame for n, frame in self.replay if n > after]
+        first = self.replay[0][0] if self.replay else self.last_id + 1
+        if first > after + 1:
+            resync = {"session": self.id, "last_event_id": after, "replayed_from": first}
+            frames.insert(0, encode(resync, "resync"))
+        return frames
+
+
+class SessionRegistry:
+    """Open SSE sessions of one server process and their in-flight requests."""
+
+    def __init__(self):
+        self.sessions = {}
+        self._tasks = set()
+
+    async def open(self, last_event_id: str = None) -> Session:
+        """A new session, or the one a reconnecting client names in its Last-Event-ID."""
+        session = self.sessions.get(parse_event_id(last_event_id)[0])
+        if session is not None:
+            return session
+        session = Session()
+        self.sessions[session.id] = session
+        return session
+
+    def close(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            end_subscriptions(session.subscriptions)
+        return session
+
+    def track(self, session, subscription: str, end):
+        """Run end() when the session closes, e.g. to stop a change feed pushing to it."""
+        session.subscriptions[subscription] = end
+
+    def untrack(self, session, subscription: str) -> bool:
+        """Forget a subscription of the session; False if the session had no such subscription."""
+        return session.subscriptions.pop(subscription, None) is not None
+
+    def get(self, session_id: str) -> Session:
+        return self.sessions.get(session_id)
+
+    async def find(self, session_id: str) -> Session:
+        """get() for a session named by a client, which may have to be looked up further."""
+        return self.get(session_id)
+
+    def is_open(self, session: Session) -> bool:
+        return self.get(session.id) is not None
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    async def stream(self, session: Session, endpoint: str, last_event_id: str = None):
+        """SSE frames for a session: the endpoint event, missed frames, then queued messages and heartbeats."""
+        if session.queue is not None:
+            # A reconnect took over from a stream the server had not noticed was gone
+            session.queue.put_nowait(None)
+        queue = session.queue = FrameBuffer()
+        session.attachments += 1
+        HEARTBEAT.add(queue)
+        try:
+            yield f"event: endpoint\ndata: {endpoint}?session_id={session.id}\n\n"
+            resumed_id, after = parse_event_id(last_event_id)
+            if resumed_id == session.id:
+                for frame in session.missed(after):
+                    yield frame
+            elif last_event_id:
+                # The old session is gone; the client has to start over
+                yield encode({"session": session.id, "last_event_id": last_event_id}, "resync")
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            HEARTBEAT.discard(queue)
+            queue.close()
+            if session.queue is queue:
+                self.detach(session)
+
+    def detach(self, session: Session):
+        """Keep a session whose stream ended open for RESUME_SECONDS, then close it."""
+        session.queue = None
+        if self.sessions.get(session.id) is not session:
+            # Already closed, or handed over to another worker
+            return
+        if RESUME_SECONDS <= 0:
+            self.close(session.id)
+            return
+        asyncio.get_running_loop().call_later(RESUME_SECONDS, self._expire, session, session.attachments)
+
+    def _expire(self, session: Session, attachments: int):
+        # Unless a stream attached again meanwhile
+        if session.queue is None and session.attachments == attachments and self.sessions.get(session.id) is session:
+            self.close(session.id)
+
+    def submit(self, session: Session, message, handler):
+        """Handle a JSON-RPC message (or batch) in the background and queue its response on the session."""
+        task = asyncio.create_task(self._deliver(session, message, handler))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, session: Session, message, handler):
+        CURRENT_SESSION.set(session)
+        response = await dispatch(message, handler)
+        # Looked up again: the session may have closed, or moved to another worker, meanwhile
+        target = self.get(session.id)
+        if response is not None and target is not None:
+            target.send(response)
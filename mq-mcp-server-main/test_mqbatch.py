@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for batched tool calls (no queue manager needed)
+
+    python test_mqbatch.py
+"""
+import unittest
+
+import mqbatch
+
+
+async def invoke(name, arguments):
+    return f"{name} on {arguments.get('qmgr_name')}"
+
+
+class BatchTest(unittest.IsolatedAsyncioTestCase):
+    async def test_bad_entries_fail_alone(self):
+        calls = [{"name": "runmqsc", "arguments": {"qmgr_name": "QM1"}},
+                 {"name": "runmqsc", "arguments": {"qmgr_name": ["QM1"]}},
+                 {"name": "runmqsc", "arguments": {"qmgr_name": {"x": 1}}},
+                 {"name": "runmqsc", "arguments": 5},
+                 "runmqsc",
+                 {"name": "batch", "arguments": {}},
+                 {"name": "server_stats"}]
+        results = await mqbatch.run_batch(calls, invoke)
+        self.assertEqual([result["status"] for result in results], ["ok", "error", "error", "error", "error", "error", "ok"])
+        self.assertEqual(results[1]["result"], "qmgr_name must be a string")
+        self.assertEqual(results[0]["result"], "runmqsc on QM1")
+
+
+if __name__ == "__main__":
+    unittest.main()
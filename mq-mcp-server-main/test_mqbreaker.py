@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for circuit breakers and how endpoint calls count against them (no queue manager needed)
+
+    python test_mqbreaker.py
+"""
+import asyncio
+import itertools
+import time
+import unittest
+
+import httpx
+
+import mqbreaker
+import mqcache
+import mqendpoints
+import mqrest
+
+COMMAND = {"type": "runCommand", "parameters": {"command": "DISPLAY QLOCAL(Q1)"}}
+PATH = "action/qmgr/QM1/mqsc"
+
+_hosts = itertools.count()
+
+
+class HealthTest(unittest.TestCase):
+    def test_opens_probes_and_closes(self):
+        health = mqbreaker.Health("QM1", "default", "QM1")
+        for _ in range(mqbreaker.FAILURES):
+            health.acquire()
+            health.record(False)
+        self.assertEqual(health.state, mqbreaker.OPEN)
+        self.assertRaises(mqbreaker.CircuitOpenError, health.acquire)
+        health.opened_at -= mqbreaker.RESET_SECONDS
+        health.acquire()
+        self.assertEqual(health.state, mqbreaker.HALF_OPEN)
+        self.assertRaisesRegex(mqbreaker.CircuitOpenError, "probe", health.acquire)
+        health.record(True, 0.01)
+        self.assertEqual((health.state, health.failures), (mqbreaker.CLOSED, 0))
+
+    def test_failed_probe_reopens(self):
+        health = mqbreaker.Health("QM1", "default", "QM1")
+        health.state, health.opened_at = mqbreaker.OPEN, time.monotonic() - mqbreaker.RESET_SECONDS
+        health.acquire()
+        health.record(False)
+        self.assertEqual(health.state, mqbreaker.OPEN)
+
+    def test_released_probe_lets_the_next_call_probe(self):
+        health = mqbreaker.Health("QM1", "default", "QM1")
+        health.state, health.opened_at = mqbreaker.OPEN, time.monotonic() - mqbreaker.RESET_SECONDS
+        health.acquire()
+        health.release()
+        health.acquire()
+        self.assertEqual(health.state, mqbreaker.HALF_OPEN)
+
+
+class EndpointTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        mqcache.RESULT_CACHE.invalidate("QM1")
+        self.requests = 0
+        self.delay = 0
+        self.endpoint = mqendpoints.Endpoint("default", f"http://mqweb{next(_hosts)}/ibmmq/rest/v2/admin/", "u", "p", timeout=0.05)
+
+        async def handler(request):
+            self.requests += 1
+            await asyncio.sleep(self.delay)
+            return httpx.Response(200, json={"commandResponse": [{"completionCode": 0, "parameters": {"queue": "Q1"}}]})
+
+        client = self.endpoint.client()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), headers=mqrest.HEADERS)
+
+    async def asyncTearDown(self):
+        await self.endpoint.client().aclose()
+
+    @property
+    def qmgr_health(self) -> mqbreaker.Health:
+        return self.endpoint.health_of("QM1")[1]
+
+    async def test_coalesced_timeout_counts_once(self):
+        self.delay = 1
+        results = await asyncio.gather(*(self.endpoint.call("POST", PATH, COMMAND) for _ in range(10)))
+        self.assertTrue(all("did not answer" in result["error"] for result in results))
+        self.assertEqual(self.requests, 1)
+        self.assertEqual(self.qmgr_health.failures, 1)
+        self.assertEqual(self.qmgr_health.state, mqbreaker.CLOSED)
+
+    async def test_coalesced_stream_timeout_counts_once(self):
+        self.delay = 1
+
+        async def read():
+            with self.assertRaisesRegex(ValueError, "did not answer"):
+                async for _ in self.endpoint.stream("POST", PATH, COMMAND):
+                    pass
+
+        await asyncio.gather(*(read() for _ in range(10)))
+        self.assertEqual(self.qmgr_health.failures, 1)
+
+    async def test_cache_hit_does_not_close_a_half_open_circuit(self):
+        self.assertNotIn("error", await self.endpoint.call("POST", PATH, COMMAND))
+        health = self.qmgr_health
+        health.failures = mqbreaker.FAILURES
+        health.state, health.opened_at = mqbreaker.OPEN, time.monotonic() - mqbreaker.RESET_SECONDS
+        self.assertNotIn("error", await self.endpoint.call("POST", PATH, COMMAND))
+        self.assertEqual(self.requests, 1)
+        self.assertEqual((health.state, health.failures, health.probing), (mqbreaker.HALF_OPEN, mqbreaker.FAILURES, False))
+        self.assertEqual(sum(map(len, health.latencies.values())), 1)
+        items = [item async for item in self.endpoint.stream("POST", PATH, COMMAND)]
+        self.assertEqual(len(items), 1)
+        self.assertEqual(health.state, mqbreaker.HALF_OPEN)
+        # The next request that reaches mqweb is the probe
+        mqcache.RESULT_CACHE.invalidate("QM1")
+        self.assertNotIn("error", await self.endpoint.call("POST", PATH, COMMAND))
+        self.assertEqual((health.state, health.failures), (mqbreaker.CLOSED, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
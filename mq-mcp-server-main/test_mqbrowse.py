@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for paged message browsing and its cursors (no queue manager needed)
+
+    python test_mqbrowse.py
+"""
+import base64
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import mqbrowse
+
+
+class FakeEndpoint:
+    """The messaging API of one queue: messagelist from the head, and message bodies by id."""
+
+    messaging_url = "http://mqweb/ibmmq/rest/v3/messaging/"
+
+    def __init__(self, depth: int):
+        self.ids = [f"m{i}" for i in range(depth)]
+        self.limits = []
+
+    async def call(self, method, path, data=None, base_url=None):
+        limit = int(parse_qs(urlsplit(path).query)["limit"][0])
+        self.limits.append(limit)
+        return {"messages": [{"messageId": message_id} for message_id in self.ids[:limit]]}
+
+    async def request(self, method, path, base_url=None, params=None):
+        return SimpleNamespace(status_code=200, content=f"body of {params['messageId']}".encode())
+
+
+async def walk(endpoint, page_size: int, **kwargs):
+    """messageIds of every page, and the last page."""
+    ids, cursor = [], None
+    while True:
+        page = await mqbrowse.browse_page(endpoint, "QM1", "Q1", cursor, page_size, **kwargs)
+        ids.extend(message["messageId"] for message in page["messages"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page
+
+
+def cursor_of(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+class BrowseTest(unittest.IsolatedAsyncioTestCase):
+    async def test_pages_cover_the_queue(self):
+        endpoint = FakeEndpoint(7)
+        ids, last = await walk(endpoint, 3)
+        self.assertEqual(ids, endpoint.ids)
+        self.assertFalse(last["truncated"])
+
+    async def test_bodies_and_byte_cap(self):
+        page = await mqbrowse.browse_page(FakeEndpoint(3), "QM1", "Q1", page_size=3, max_bytes=12)
+        self.assertEqual(page["messages"][0]["body"], "body of m0")
+        self.assertTrue(page["messages"][1]["truncated"])
+        self.assertEqual(page["bytes"], 12)
+        page = await mqbrowse.browse_page(FakeEndpoint(3), "QM1", "Q1", page_size=3, headers_only=True)
+        self.assertNotIn("body", page["messages"][0])
+
+    async def test_consumed_messages_ahead_of_the_cursor(self):
+        endpoint = FakeEndpoint(6)
+        page = await mqbrowse.browse_page(endpoint, "QM1", "Q1", page_size=2)
+        del endpoint.ids[:2]
+        page = await mqbrowse.browse_page(endpoint, "QM1", "Q1", page["next_cursor"], 2)
+        self.assertEqual([message["messageId"] for message in page["messages"]], ["m2", "m3"])
+
+    async def test_consumed_cursor_message_repeats_rather_than_skips(self):
+        endpoint = FakeEndpoint(6)
+        page = await mqbrowse.browse_page(endpoint, "QM1", "Q1", page_size=2)
+        endpoint.ids.remove("m1")
+        page = await mqbrowse.browse_page(endpoint, "QM1", "Q1", page["next_cursor"], 2)
+        self.assertEqual([message["messageId"] for message in page["messages"]], ["m0", "m2"])
+
+    async def test_stopping_at_max_depth_is_reported(self):
+        with mock.patch.object(mqbrowse, "MAX_DEPTH", 5):
+            endpoint = FakeEndpoint(8)
+            ids, last = await walk(endpoint, 2)
+            self.assertEqual(ids, endpoint.ids[:5])
+            self.assertTrue(last["truncated"])
+            self.assertEqual(max(endpoint.limits), 6)
+            messages = [message async for message in mqbrowse.browse_all(FakeEndpoint(8), "QM1", "Q1", 2)]
+            self.assertEqual(len(messages), 6)
+            self.assertIn("MQ_BROWSE_MAX_DEPTH", messages[-1]["error"])
+
+    async def test_queue_exactly_max_depth_deep_is_complete(self):
+        with mock.patch.object(mqbrowse, "MAX_DEPTH", 5):
+            ids, last = await walk(FakeEndpoint(5), 2)
+            self.assertEqual(len(ids), 5)
+            self.assertFalse(last["truncated"])
+
+    async def test_invalid_cursors(self):
+        for text in ("[1]", "1", '"x"', "null", '{"qmgr": "QM1", "queue": "Q1"}',
+                     '{"qmgr": "QM1", "queue": "Q1", "after": null, "position": -1}'):
+            with self.subTest(cursor=text):
+                with self.assertRaisesRegex(ValueError, "Invalid browse cursor"):
+                    await mqbrowse.browse_page(FakeEndpoint(3), "QM1", "Q1", cursor_of(text))
+        for cursor in ("not base64!", "é", 5, ["x"]):
+            with self.subTest(cursor=cursor):
+                with self.assertRaisesRegex(ValueError, "Invalid browse cursor"):
+                    await mqbrowse.browse_page(FakeEndpoint(3), "QM1", "Q1", cursor)
+        other = mqbrowse.encode_cursor("QM1", "Q2", "m0", 1)
+        with self.assertRaisesRegex(ValueError, "different queue"):
+            await mqbrowse.browse_page(FakeEndpoint(3), "QM1", "Q1", other)
+
+
+if __name__ == "__main__":
+    unittest.main()
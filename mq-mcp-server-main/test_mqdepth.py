@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the background queue status poller (no queue manager needed)
+
+    python test_mqdepth.py
+"""
+import asyncio
+import unittest
+
+import mqcache
+import mqdepth
+import mqsc
+
+
+class DepthPollerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fetched = []
+
+        async def fetch(qmgr_name):
+            self.fetched.append(qmgr_name)
+            return mqsc.MQObjects(("queue", "curdepth"), [("Q1", 4)])
+
+        self.poller = mqdepth.DepthPoller(fetch, interval=0.01, max_age=1, idle_timeout=60, known=lambda name: name == "QM1")
+
+    async def asyncTearDown(self):
+        await self.poller.stop()
+
+    async def test_unknown_queue_manager_is_not_polled(self):
+        self.assertIsNone(self.poller.lookup("QMTYPO", "Q1"))
+        await asyncio.sleep(0.03)
+        self.assertEqual(self.fetched, [])
+        self.assertEqual((self.poller._tasks, self.poller._last_lookup), ({}, {}))
+
+    async def test_known_queue_manager_is_answered_from_the_sweep(self):
+        self.assertIsNone(self.poller.lookup("QM1", "Q1"))
+        await asyncio.sleep(0.03)
+        attributes, age = self.poller.lookup("QM1", "q1")
+        self.assertEqual(attributes["curdepth"], 4)
+        self.assertIn("QM1", self.fetched)
+
+    async def test_queue_name_must_be_a_string(self):
+        for queue_name in (None, 5, "", ["Q1"]):
+            with self.subTest(queue_name=queue_name):
+                self.assertIsNone(self.poller.lookup("QM1", queue_name))
+        self.assertEqual(self.poller._tasks, {})
+
+    async def test_write_invalidates_the_snapshot(self):
+        self.poller.lookup("QM1", "Q1")
+        await self.poller.sweep("QM1")
+        self.assertIsNotNone(self.poller.lookup("QM1", "Q1"))
+        mqcache.RESULT_CACHE.invalidate("QM1")
+        self.assertIsNone(self.poller.lookup("QM1", "Q1"))
+
+    async def test_idle_poller_forgets_the_queue_manager(self):
+        self.poller.idle_timeout = 0.02
+        self.poller.lookup("QM1", "Q1")
+        await asyncio.sleep(0.1)
+        self.assertEqual((self.poller.snapshots, self.poller._tasks, self.poller._last_lookup), ({}, {}, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
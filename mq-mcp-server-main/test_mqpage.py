@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for cursor pagination of MQSC results (no queue manager needed)
+
+    python test_mqpage.py
+"""
+import base64
+import json
+import unittest
+
+import mqpage
+
+
+def cursor_of(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+class PageTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pages = mqpage.PageCache()
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        return list(range(7))
+
+    async def page(self, cursor=None, page_size=3):
+        return await self.pages.page("QM1", "DISPLAY QLOCAL(*)", "json", self.fetch, page_size, cursor)
+
+    async def test_pages_are_sliced_from_one_fetch(self):
+        items, cursor = [], None
+        while True:
+            page = await self.page(cursor)
+            items.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(items, list(range(7)))
+        self.assertEqual(self.fetches, 1)
+
+    async def test_invalid_cursors(self):
+        state = {"id": "x", "qmgr": "QM1", "command": "DISPLAY QLOCAL(*)", "format": "json", "offset": 3, "page_size": 3}
+        for cursor in (5, ["x"], {"offset": 1}, True, "not base64!", cursor_of([1]), cursor_of("x"),
+                       cursor_of(dict(state, offset=-1)), cursor_of(dict(state, id=["x"])), cursor_of(dict(state, page_size="3"))):
+            with self.subTest(cursor=cursor):
+                with self.assertRaisesRegex(ValueError, "Invalid cursor"):
+                    await self.page(cursor)
+        with self.assertRaisesRegex(ValueError, "different command"):
+            await self.page(cursor_of(dict(state, command="DISPLAY CHANNEL(*)")))
+        self.assertEqual(self.fetches, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
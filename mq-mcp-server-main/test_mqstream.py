@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental commandResponse parser (no queue manager needed)
+
+    python test_mqstream.py
+"""
+import asyncio
+import json
+import random
+import unittest
+
+import mqstream
+
+COMMAND_RESPONSE = {
+    "commandResponse": [
+        {"completionCode": 0, "reasonCode": 0, "text": ["AMQ8409I: Display Queue details.", "   QUEUE(Q1)   CURDEPTH(12)"]},
+        {"completionCode": 0, "reasonCode": 0, "parameters": {"queue": "Qé€", "curdepth": 123456789, "maxmsgl": 4.5e6}},
+        {"completionCode": 2, "reasonCode": 2085, "message": ["AMQ8147E: IBM MQ object Q2 not found."]},
+    ],
+    "overallCompletionCode": 2,
+    "overallReasonCode": 3008,
+}
+
+
+async def _chunks(body: bytes, sizes):
+    position = 0
+    while position < len(body):
+        size = next(sizes)
+        yield body[position:position + size]
+        position += size
+
+
+def parse(body: bytes, sizes=None, key: str = "commandResponse"):
+    """(items, rest) of body fed to mqstream.items() in chunks of the given sizes (all at once by default)."""
+    async def run():
+        rest = {}
+        found = [item async for item in mqstream.items(_chunks(body, iter(sizes or [len(body) or 1])), key, rest)]
+        return found, rest
+    return asyncio.run(run())
+
+
+class ItemsTest(unittest.TestCase):
+    def test_whole_body(self):
+        found, rest = parse(json.dumps(COMMAND_RESPONSE).encode())
+        self.assertEqual(found, COMMAND_RESPONSE["commandResponse"])
+        self.assertEqual(rest, {"overallCompletionCode": 2, "overallReasonCode": 3008})
+
+    def test_every_split_point(self):
+        # Byte-sized chunks split numbers, literals, escapes and multi-byte characters
+        body = json.dumps(COMMAND_RESPONSE, ensure_ascii=False).encode()
+        found, rest = parse(body, iter(lambda: 1, None))
+        self.assertEqual(found, COMMAND_RESPONSE["commandResponse"])
+        self.assertEqual(rest["overallReasonCode"], 3008)
+
+    def test_number_split_after_point_or_exponent(self):
+        body = b'{"x": -3.5, "commandResponse": [1e5, 2.25, -7], "y": 10}'
+        for cut in (body.index(b"."), body.index(b"e") + 1, body.index(b"1e")):
+            with self.subTest(cut=body[:cut]):
+                found, rest = parse(body, iter([cut, len(body)]))
+                self.assertEqual(found, [1e5, 2.25, -7])
+                self.assertEqual(rest, {"x": -3.5, "y": 10})
+
+    def test_random_chunk_sizes(self):
+        rng = random.Random(25)
+        for case in range(3000):
+            document = {"commandResponse": [rng.choice([rng.randint(-10**6, 10**6), rng.uniform(-1e3, 1e3), rng.random() * 1e-5,
+                                                        True, False, None, "tëxt \"q\" \\", [1, {"a": 2.5}], {}])
+                                            for _ in range(rng.randint(0, 6))],
+                        "overallCompletionCode": rng.uniform(-10, 10)}
+            items = list(document.items())
+            rng.shuffle(items)
+            body = json.dumps(dict(items), ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1])).encode()
+            found, rest = parse(body, iter(lambda: rng.randint(1, 8), None))
+            self.assertEqual(found, document["commandResponse"], body)
+            self.assertEqual(rest, {"overallCompletionCode": document["overallCompletionCode"]}, body)
+
+    def test_other_key(self):
+        found, rest = parse(b'{"qmgr": [{"name": "QM1", "state": "running"}]}', key="qmgr")
+        self.assertEqual(found, [{"name": "QM1", "state": "running"}])
+        self.assertEqual(rest, {})
+
+    def test_empty(self):
+        self.assertEqual(parse(b""), ([], {}))
+        self.assertEqual(parse(b"{}"), ([], {}))
+        self.assertEqual(parse(b'{"commandResponse": []}'), ([], {}))
+
+    def test_malformed(self):
+        for body in (b"[1]", b'{"commandResponse": [1, 2', b'{"commandResponse": [1 2]}', b'{"a": tru', b'{"a": -3.'):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    parse(body, iter(lambda: 3, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for change feed subscriptions and their sessions (no queue manager needed)
+
+    python test_mqwatch.py
+"""
+import asyncio
+import unittest
+
+import mqsc
+import mqwatch
+import sse_sessions
+
+
+class WatchTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.polls = 0
+
+        async def fetch(qmgr_name, command):
+            self.polls += 1
+            return mqsc.MQObjects(("queue", "curdepth"), [("Q1", self.polls)])
+
+        self.watcher = mqwatch.Watcher(fetch, interval=0.01)
+        self.sessions = sse_sessions.SessionRegistry()
+
+    async def asyncTearDown(self):
+        await self.watcher.stop()
+
+    def subscribe(self, session, events: list) -> str:
+        subscription = self.watcher.subscribe("QM1", ["queue_depths"], "*", events.append)
+        self.sessions.track(session, subscription, lambda: self.watcher.unsubscribe(subscription))
+        return subscription
+
+    async def test_ids_are_unguessable(self):
+        ids = {self.watcher.subscribe("QM1", ["queue_depths"], "*", lambda event: None) for _ in range(50)}
+        self.assertEqual(len(ids), 50)
+        for subscription in ids:
+            self.assertRegex(subscription, r"^sub-[0-9a-f]{32}$")
+
+    async def test_only_the_owner_can_untrack(self):
+        owner, other = await self.sessions.open(), await self.sessions.open()
+        subscription = self.subscribe(owner, [])
+        self.assertFalse(self.sessions.untrack(other, subscription))
+        self.assertIn(subscription, owner.subscriptions)
+        self.assertTrue(self.sessions.untrack(owner, subscription))
+        self.assertFalse(self.sessions.untrack(owner, subscription))
+
+    async def test_close_ends_quiet_feeds(self):
+        session = await self.sessions.open()
+        events = []
+        self.subscribe(session, events)
+        await asyncio.sleep(0.05)
+        self.assertEqual(events[0]["type"], "snapshot")
+        self.sessions.close(session.id)
+        self.assertEqual(self.watcher.snapshot()["subscriptions"], 0)
+        self.assertEqual(self.watcher.feeds, {})
+        polls = self.polls
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.polls, polls)
+
+    async def test_shared_feed_outlives_one_subscriber(self):
+        first, second = await self.sessions.open(), await self.sessions.open()
+        self.subscribe(first, [])
+        self.subscribe(second, [])
+        self.assertEqual(len(self.watcher.feeds), 1)
+        self.sessions.close(first.id)
+        self.assertEqual(len(self.watcher.feeds), 1)
+        self.sessions.close(second.id)
+        self.assertEqual(self.watcher.feeds, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the session registry shared by SSE workers, with two workers in one process (no queue manager needed)
+
+    python test_sse_cluster.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import sse_cluster
+
+
+async def eventually(condition, timeout: float = 2):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+class ClusterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.enterContext(mock.patch.object(sse_cluster, "SWEEP_SECONDS", 0.05))
+        self.a = sse_cluster.ClusterRegistry(self.directory.name)
+        self.b = sse_cluster.ClusterRegistry(self.directory.name)
+        self.b.socket = os.path.join(self.directory.name, "worker-b.sock")
+        await self.a.start()
+        await self.b.start()
+
+    async def asyncTearDown(self):
+        await self.b.stop()
+        await self.a.stop()
+        self.directory.cleanup()
+
+    async def test_frames_reach_the_owning_worker(self):
+        session = await self.a.open()
+        remote = await self.b.find(session.id)
+        self.assertIsInstance(remote, sse_cluster.RemoteSession)
+        remote.send({"n": 1})
+        await eventually(lambda: session.last_id == 1)
+        self.assertIn('"n":1', session.replay[0][1])
+
+    async def test_reconnect_to_another_worker_takes_the_session_over(self):
+        session = await self.a.open()
+        session.send({"n": 1})
+        session.send({"n": 2})
+        ended = []
+        self.a.track(session, "sub-1", lambda: ended.append("sub-1"))
+        taken = await self.b.open(f"{session.id}.1")
+        self.assertEqual(taken.id, session.id)
+        self.assertNotIn(session.id, self.a.sessions)
+        self.assertEqual((taken.last_id, len(taken.missed(1))), (2, 1))
+        # A frame still sent through the old owner follows the session
+        self.a.get(session.id).send({"n": 3})
+        await eventually(lambda: taken.last_id == 3)
+        # The old owner's feed ends once the session closes on the new one
+        self.b.close(session.id)
+        await eventually(lambda: ended == ["sub-1"])
+
+    async def test_closed_sessions_leave_the_registry(self):
+        session = await self.a.open()
+        self.a.close(session.id)
+        # Statements run in order on the database thread
+        await self.a._query("SELECT 1")
+        self.assertIsNone(await self.b.find(session.id))
+
+    async def test_failed_delete_is_logged(self):
+        session = await self.a.open()
+        execute = self.a._execute
+
+        def failing(sql, params=()):
+            if sql.startswith("DELETE"):
+                raise sqlite3.OperationalError("database is locked")
+            return execute(sql, params)
+
+        stderr = io.StringIO()
+        with mock.patch.object(self.a, "_execute", failing), contextlib.redirect_stderr(stderr):
+            self.a.close(session.id)
+            await eventually(lambda: "database is locked" in stderr.getvalue())
+        self.assertIn("SSE session registry update failed", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,51 @@
 #!/usr/bin/env python3
 import asyncio
+import hashlib
 import json
-import httpx
+import os
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from mcp.server import Server
-from mcp.types import Tool, TextContent
+
+# Shared MQ REST client lives next to the stdio servers (or alongside this file in the container)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mq-mcp-server-main"))
+import mqadmit
+import mqbatch
+import mqbrowse
+import mqcache
+import mqdepth
+import mqendpoints
+import mqmetrics
+import mqpage
+import mqrest
+import mqsc
+import mqwatch
+import sse_cluster
+import sse_sessions
 
 # MQ Configuration
-import os
 URL_BASE = os.getenv("MQ_URL", "https://host.docker.internal:9443/ibmmq/rest/v2/admin/")
 USER_NAME = os.getenv("MQ_USER", "admin")
 PASSWORD = os.getenv("MQ_PASSWORD", "passw0rd")
+MESSAGING_URL_BASE = os.getenv("MQ_MESSAGING_URL", URL_BASE.replace("/v2/admin/", "/v3/messaging/"))
+# MQ_ENDPOINTS lists several mqweb hosts; otherwise the single endpoint above
+endpoints = mqendpoints.EndpointRegistry.from_env(URL_BASE, USER_NAME, PASSWORD, MESSAGING_URL_BASE)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    endpoints.default.client()
+    if CLUSTER_DIR:
+        await sessions.start()
+    yield
+    if CLUSTER_DIR:
+        await sessions.stop()
+    await watcher.stop()
+    await depths.stop()
+    await mqrest.aclose_all()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,113 +56,168 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-server = Server("raghi-mq-sse-server")
-
-@server.list_tools()
-async def list_tools():
-    return [
-        # Basic Tools
-        Tool(name="dspmq", description="List queue managers and status", inputSchema={"type": "object", "properties": {}, "required": []}),
-        Tool(name="runmqsc", description="Run MQSC command", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "mqsc_command": {"type": "string"}}, "required": ["qmgr_name", "mqsc_command"]}),
-        
-        # Queue Management
-        Tool(name="list_queues", description="List all queues", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="create_queue", description="Create queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "queue_type": {"type": "string", "default": "local"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="delete_queue", description="Delete queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="get_queue_depth", description="Get queue depth", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="clear_queue", description="Clear queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        
-        # Channel Management
-        Tool(name="list_channels", description="List all channels", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="start_channel", description="Start channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="stop_channel", description="Stop channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="ping_channel", description="Ping channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        
-        # Message Operations
-        Tool(name="put_message", description="Put message to queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "message": {"type": "string"}}, "required": ["qmgr_name", "queue_name", "message"]}),
-        Tool(name="get_message", description="Get message from queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="browse_messages", description="Browse queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        
-        # Monitoring
-        Tool(name="get_queue_stats", description="Get queue statistics", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
-        Tool(name="get_channel_status", description="Get channel status", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
-        Tool(name="list_connections", description="List active connections", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        
-        # Security
-        Tool(name="refresh_security", description="Refresh security", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
-        Tool(name="display_auth", description="Display authority records", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "object_name": {"type": "string"}}, "required": ["qmgr_name", "object_name"]})
-    ]
-
-@server.call_tool()
-async def call_tool(name: str, arguments: dict):
+# With several workers (MCP_SSE_WORKERS), sessions are shared through a directory all of them can reach
+CLUSTER_DIR = os.getenv("MCP_SSE_CLUSTER_DIR")
+sessions = sse_cluster.ClusterRegistry(CLUSTER_DIR) if CLUSTER_DIR else sse_sessions.SessionRegistry()
+# Control operations and point reads overtake full scans when a queue manager is busy
+scheduler = mqadmit.Scheduler()
+
+# The tool catalogue is plain data, so tools/list can be answered without importing mcp
+TOOLS = [
+    # Basic Tools
+    dict(name="dspmq", description="List queue managers and status", inputSchema={"type": "object", "properties": {}, "required": []}),
+    dict(name="runmqsc", description="Run MQSC command", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "mqsc_command": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "mqsc_command"]}),
+    
+    # Queue Management
+    dict(name="list_queues", description="List queues, optionally filtered by name pattern and type and limited to some attributes", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "name": mqsc.NAME_SCHEMA, "queue_type": {"type": "string", "enum": ["all"] + list(mqsc.QUEUE_TYPES), "default": "all"}, "attributes": mqsc.ATTRIBUTES_SCHEMA, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    dict(name="create_queue", description="Create queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "queue_type": {"type": "string", "default": "local"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="delete_queue", description="Delete queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="get_queue_depth", description="Get queue depth", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="clear_queue", description="Clear queue messages", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    
+    # Channel Management
+    dict(name="list_channels", description="List channels, optionally filtered by name pattern and type and limited to some attributes", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "name": mqsc.NAME_SCHEMA, "channel_type": {"type": "string", "enum": list(mqsc.CHANNEL_TYPES)}, "attributes": mqsc.ATTRIBUTES_SCHEMA, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    dict(name="start_channel", description="Start channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="stop_channel", description="Stop channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="ping_channel", description="Ping channel", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}}, "required": ["qmgr_name", "channel_name"]}),
+    
+    # Message Operations
+    dict(name="put_message", description="Put message to queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "message": {"type": "string"}}, "required": ["qmgr_name", "queue_name", "message"]}),
+    dict(name="get_message", description="Get message from queue", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="bulk_put_messages", description="Put a list or generated range of messages to a queue through the v3 messaging API", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "messages": {"type": "array", "items": {"type": "string"}}, "count": {"type": "integer", "description": "Generate this many messages from template instead of passing messages"}, "template": {"type": "string", "default": "Message {i}"}, "window": {"type": "integer", "description": "Puts in flight at once"}}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="browse_messages", description=f"Browse queue messages a page at a time without removing them; pass next_cursor back to continue. Walks at most the first {mqbrowse.MAX_DEPTH} messages of the queue; a page with truncated true stopped there", inputSchema=mqbrowse.BROWSE_SCHEMA),
+    
+    # Monitoring
+    dict(name="get_queue_stats", description="Get queue status statistics: depth, open handles, last get/put time, oldest message age", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "queue_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "queue_name"]}),
+    dict(name="get_channel_status", description="Get channel status", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "channel_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "channel_name"]}),
+    dict(name="list_connections", description="List active connections", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name"]}),
+    
+    # Security
+    dict(name="refresh_security", description="Refresh security", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}}, "required": ["qmgr_name"]}),
+    dict(name="display_auth", description="Display authority records", inputSchema={"type": "object", "properties": {"qmgr_name": {"type": "string"}, "object_name": {"type": "string"}, "format": mqsc.FORMAT_SCHEMA, "page_size": mqpage.PAGE_SIZE_SCHEMA, "cursor": mqpage.CURSOR_SCHEMA}, "required": ["qmgr_name", "object_name"]}),
+
+    # Change feeds
+    dict(name="subscribe", description="Push queue depth, channel status and connection changes to this SSE session as notifications/mq/changes, after a first snapshot", inputSchema=mqwatch.WATCH_SCHEMA),
+    dict(name="unsubscribe", description="Stop a change feed subscription", inputSchema={"type": "object", "properties": {"subscription": {"type": "string"}}, "required": ["subscription"]}),
+
+    # Batch
+    dict(name="batch", description="Run several tool calls concurrently and return per-call results in order", inputSchema=mqbatch.BATCH_SCHEMA),
+
+    # Diagnostics
+    dict(name="server_stats", description="Show MQ REST connection pool, result cache and queue status snapshot statistics", inputSchema={"type": "object", "properties": {}, "required": []})
+]
+
+# tools/list never changes while the server runs, so it is serialized once
+TOOLS_JSON = sse_sessions.dumps({"tools": TOOLS})
+TOOLS_ETAG = f'"{hashlib.sha256(TOOLS_JSON).hexdigest()[:32]}"'
+
+async def run_tool(name: str, arguments: dict) -> str:
     handlers = {
         "dspmq": dspmq,
-        "runmqsc": lambda: runmqsc(arguments.get("qmgr_name"), arguments.get("mqsc_command")),
-        "list_queues": lambda: list_queues(arguments.get("qmgr_name")),
+        "runmqsc": lambda: runmqsc(arguments.get("qmgr_name"), arguments.get("mqsc_command"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "list_queues": lambda: list_queues(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("name", "*"), arguments.get("queue_type", "all"), arguments.get("attributes"), arguments.get("page_size"), arguments.get("cursor")),
         "create_queue": lambda: create_queue(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("queue_type", "local")),
         "delete_queue": lambda: delete_queue(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_queue_depth": lambda: get_queue_depth(arguments.get("qmgr_name"), arguments.get("queue_name")),
+        "get_queue_depth": lambda: get_queue_depth(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("format", "text")),
         "clear_queue": lambda: clear_queue(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "list_channels": lambda: list_channels(arguments.get("qmgr_name")),
+        "list_channels": lambda: list_channels(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("name", "*"), arguments.get("channel_type"), arguments.get("attributes"), arguments.get("page_size"), arguments.get("cursor")),
         "start_channel": lambda: start_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "stop_channel": lambda: stop_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "ping_channel": lambda: ping_channel(arguments.get("qmgr_name"), arguments.get("channel_name")),
         "put_message": lambda: put_message(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("message")),
+        "bulk_put_messages": lambda: bulk_put_messages(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("messages"), arguments.get("count"), arguments.get("template", "Message {i}"), arguments.get("window")),
         "get_message": lambda: get_message(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "browse_messages": lambda: browse_messages(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_queue_stats": lambda: get_queue_stats(arguments.get("qmgr_name"), arguments.get("queue_name")),
-        "get_channel_status": lambda: get_channel_status(arguments.get("qmgr_name"), arguments.get("channel_name")),
-        "list_connections": lambda: list_connections(arguments.get("qmgr_name")),
+        "browse_messages": lambda: browse_messages(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("page_size", mqbrowse.PAGE_SIZE), arguments.get("cursor"), arguments.get("headers_only", False), arguments.get("max_bytes", mqbrowse.MAX_BYTES)),
+        "get_queue_stats": lambda: get_queue_stats(arguments.get("qmgr_name"), arguments.get("queue_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "get_channel_status": lambda: get_channel_status(arguments.get("qmgr_name"), arguments.get("channel_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "list_connections": lambda: list_connections(arguments.get("qmgr_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
         "refresh_security": lambda: refresh_security(arguments.get("qmgr_name")),
-        "display_auth": lambda: display_auth(arguments.get("qmgr_name"), arguments.get("object_name"))
+        "display_auth": lambda: display_auth(arguments.get("qmgr_name"), arguments.get("object_name"), arguments.get("format", "text"), arguments.get("page_size"), arguments.get("cursor")),
+        "subscribe": lambda: subscribe(arguments.get("qmgr_name"), arguments.get("feeds") or list(mqwatch.KINDS), arguments.get("name", "*")),
+        "unsubscribe": lambda: unsubscribe(arguments.get("subscription")),
+        "batch": lambda: batch(arguments.get("calls", []), arguments.get("max_concurrency")),
+        "server_stats": server_stats
     }
     
-    if name in handlers:
-        result = await handlers[name]()
-        return [TextContent(type="text", text=result)]
-    else:
+    if name not in handlers:
         raise ValueError(f"Unknown tool: {name}")
+    async with scheduler.admit(name, arguments):
+        with mqmetrics.TOOLS_IN_FLIGHT.track(tool=name), mqmetrics.TOOL_SECONDS.time(tool=name) as labels:
+            try:
+                result = await handlers[name]()
+            except Exception:
+                mqmetrics.TOOL_ERRORS.inc(tool=name)
+                raise
+            finally:
+                # Made-up queue manager names share one series; the call has shown whether this one exists
+                labels["qmgr"] = mqmetrics.qmgr_label(arguments.get("qmgr_name"))
+    if result.startswith("Error:"):
+        mqmetrics.TOOL_ERRORS.inc(tool=name)
+    return result
 
-async def mq_request(method: str, endpoint: str, data: dict = None, base_url: str = None):
-    headers = {"Content-Type": "application/json", "ibm-mq-rest-csrf-token": "token"}
-    auth = httpx.BasicAuth(username=USER_NAME, password=PASSWORD)
-    url = (base_url or URL_BASE) + endpoint
-    
-    async with httpx.AsyncClient(verify=False, auth=auth) as client:
-        try:
-            if method == "GET":
-                response = await client.get(url, headers=headers, timeout=30.0)
-            elif method == "POST":
-                response = await client.post(url, json=data, headers=headers, timeout=30.0)
-            elif method == "DELETE":
-                response = await client.delete(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json() if response.content else {"status": "success"}
-        except Exception as e:
-            return {"error": str(e)}
+async def mq_request(method: str, endpoint: str, data: dict = None, messaging: bool = False):
+    return await endpoints.call(method, endpoint, data, messaging)
 
 # MQ Functions (same as raghi-mcp-server.py)
 async def dspmq():
-    result = await mq_request("GET", "qmgr/")
-    if "error" in result:
-        return f"Error: {result['error']}"
+    # Every mqweb endpoint is asked concurrently; a slow one only delays its own entry
+    results = await endpoints.list_qmgrs()
+    fleet = len(results) > 1
     output = "\n---\n"
-    for qmgr in result.get('qmgr', []):
-        output += f"name = {qmgr['name']}, running = {qmgr['state']}\n---\n"
+    for endpoint, result in results:
+        if "error" in result:
+            if not fleet:
+                return f"Error: {result['error']}"
+            output += f"endpoint = {endpoint.name}, error = {result['error']}\n---\n"
+            continue
+        for qmgr in result.get('qmgr', []):
+            suffix = f", endpoint = {endpoint.name}" if fleet else ""
+            output += f"name = {qmgr['name']}, running = {qmgr['state']}{suffix}\n---\n"
     return output
 
-async def runmqsc(qmgr_name: str, mqsc_command: str):
+async def runmqsc(qmgr_name: str, mqsc_command: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    # Long results are returned a page at a time; later pages are sliced from the kept result
+    fetch = (lambda: runmqsc_text(qmgr_name, mqsc_command)) if output_format == "text" else (lambda: runmqsc_objects(qmgr_name, mqsc_command))
+    try:
+        page = await mqpage.PAGES.page(qmgr_name, mqsc_command, output_format, fetch, page_size, cursor)
+    except ValueError as e:
+        return f"Error: {e}"
+    if output_format != "text":
+        with mqmetrics.FORMAT_SECONDS.time(format="table" if output_format == "table" else "json"):
+            return json.dumps(dict(page.items.to_dict(output_format), **page.describe()))
+    with mqmetrics.FORMAT_SECONDS.time(format="text"):
+        output = "\n---\n"
+        for text in page.items:
+            output += text + "\n---\n"
+    return output + page.trailer()
+
+# Text of each command response (one per MQ object); mqweb errors raise ValueError
+async def runmqsc_text(qmgr_name: str, mqsc_command: str):
     data = {"type": "runCommand", "parameters": {"command": mqsc_command}}
-    result = await mq_request("POST", f"action/qmgr/{qmgr_name}/mqsc", data)
-    if "error" in result:
-        return f"Error: {result['error']}"
-    output = "\n---\n"
-    for cmd in result.get('commandResponse', []):
-        output += cmd['text'][0] + "\n---\n"
-    return output
+    # Each response is joined as it is parsed off the wire, so the whole mqweb body is never held
+    return ["\n".join(cmd['text']) async for cmd in endpoints.stream("POST", f"action/qmgr/{qmgr_name}/mqsc", data)]
+
+# Structured results via runCommandJSON: typed attributes per MQ object, no text parsing
+async def runmqsc_objects(qmgr_name: str, mqsc_command: str):
+    data = mqsc.to_json_request(mqsc_command)
+    try:
+        return await mqsc.MQObjects.from_stream(endpoints.stream("POST", f"action/qmgr/{qmgr_name}/mqsc", data))
+    except ValueError as e:
+        return mqsc.MQObjects(errors=[{"error": str(e)}])
+
+# Queue depths and stats are served from a background QSTATUS sweep per queue manager
+depths = mqdepth.DepthPoller(lambda qmgr_name: runmqsc_objects(qmgr_name, mqdepth.SWEEP_COMMAND))
+# Change feeds diff successive polls and push only what changed
+watcher = mqwatch.Watcher(runmqsc_objects)
 
-async def list_queues(qmgr_name: str):
-    return await runmqsc(qmgr_name, "DISPLAY QUEUE(*) TYPE")
+async def list_queues(qmgr_name: str, output_format: str = "text", name: str = "*", queue_type: str = "all", attributes: list = None, page_size: int = None, cursor: str = None):
+    if queue_type != "all" and queue_type not in mqsc.QUEUE_TYPES:
+        return f"Error: Unknown queue type: {queue_type}"
+    try:
+        command = mqsc.display_command(mqsc.QUEUE_TYPES.get(queue_type, "QUEUE"), name, attributes=attributes or ["TYPE"])
+    except ValueError as e:
+        return f"Error: {e}"
+    return await runmqsc(qmgr_name, command, output_format, page_size, cursor)
 
 async def create_queue(qmgr_name: str, queue_name: str, queue_type: str):
     return await runmqsc(qmgr_name, f"DEFINE QLOCAL({queue_name})")
@@ -139,14 +225,26 @@ async def create_queue(qmgr_name: str, queue_name: str, queue_type: str):
 async def delete_queue(qmgr_name: str, queue_name: str):
     return await runmqsc(qmgr_name, f"DELETE QLOCAL({queue_name})")
 
-async def get_queue_depth(qmgr_name: str, queue_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH")
+async def get_queue_depth(qmgr_name: str, queue_name: str, output_format: str = "text"):
+    cached = depths.lookup(qmgr_name, queue_name)
+    if cached is not None:
+        return mqdepth.format_status(*cached, output_format, keys=("curdepth",))
+    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH", output_format)
 
 async def clear_queue(qmgr_name: str, queue_name: str):
     return await runmqsc(qmgr_name, f"CLEAR QLOCAL({queue_name})")
 
-async def list_channels(qmgr_name: str):
-    return await runmqsc(qmgr_name, "DISPLAY CHANNEL(*)")
+async def list_channels(qmgr_name: str, output_format: str = "text", name: str = "*", channel_type: str = None, attributes: list = None, page_size: int = None, cursor: str = None):
+    filters = {}
+    if channel_type:
+        if channel_type.upper() not in mqsc.CHANNEL_TYPES:
+            return f"Error: Unknown channel type: {channel_type}"
+        filters["CHLTYPE"] = channel_type.upper()
+    try:
+        command = mqsc.display_command("CHANNEL", name, filters, attributes)
+    except ValueError as e:
+        return f"Error: {e}"
+    return await runmqsc(qmgr_name, command, output_format, page_size, cursor)
 
 async def start_channel(qmgr_name: str, channel_name: str):
     return await runmqsc(qmgr_name, f"START CHANNEL({channel_name})")
@@ -158,25 +256,48 @@ async def ping_channel(qmgr_name: str, channel_name: str):
     return await runmqsc(qmgr_name, f"PING CHANNEL({channel_name})")
 
 async def put_message(qmgr_name: str, queue_name: str, message: str):
-    return f"Note: Use amqsput command to put messages. Message '{message}' would be put to {queue_name} on {qmgr_name}"
+    try:
+        target = await endpoints.endpoint_for(qmgr_name)
+    except LookupError as e:
+        return f"Error: {e}"
+    url = target.messaging_url + f"qmgr/{qmgr_name}/queue/{queue_name}/message"
+    report = await mqrest.get_client(url, target.user, target.password).put_messages(url, [message], 1)
+    if report["failed"]:
+        return f"Error: {report['failures'][0]['error']}"
+    return f"Message put to {queue_name} on {qmgr_name}"
+
+async def bulk_put_messages(qmgr_name: str, queue_name: str, messages: list = None, count: int = None, template: str = "Message {i}", window: int = None):
+    if messages is None:
+        if not count:
+            return "Error: provide either messages or count"
+        messages = (template.replace("{i}", str(i)) for i in range(1, count + 1))
+    elif count is None:
+        count = len(messages)
+    if count > mqrest.MAX_BULK_PUT:
+        return f"Error: {count} messages exceeds the limit of {mqrest.MAX_BULK_PUT}"
+    try:
+        target = await endpoints.endpoint_for(qmgr_name)
+    except LookupError as e:
+        return f"Error: {e}"
+    url = target.messaging_url + f"qmgr/{qmgr_name}/queue/{queue_name}/message"
+    report = await mqrest.get_client(url, target.user, target.password).put_messages(url, messages, window or mqrest.PUT_WINDOW)
+    return json.dumps(report, indent=2)
 
 async def get_message(qmgr_name: str, queue_name: str):
     # Try REST API v3 messaging first
     try:
-        url = URL_BASE.replace('/v2/admin/', '/v3/messaging/')
-        result = await mq_request("GET", f"qmgr/{qmgr_name}/queue/{queue_name}/message", base_url=url)
+        result = await mq_request("GET", f"qmgr/{qmgr_name}/queue/{queue_name}/message", messaging=True)
         if "error" not in result:
             return f"Message retrieved via REST API: {result}"
     except:
         pass
     
     # Fallback to queue depth check and command guidance
-    depth_result = await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH")
+    objects = await runmqsc_objects(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH")
+    depth_result = json.dumps(objects.to_dict())
     
-    import re
-    depth_match = re.search(r'CURDEPTH\((\d+)\)', depth_result)
-    if depth_match:
-        depth = int(depth_match.group(1))
+    depth = objects.first("curdepth")
+    if depth is not None:
         if depth == 0:
             return f"{depth_result}\n\nNo messages to retrieve."
         else:
@@ -184,34 +305,81 @@ async def get_message(qmgr_name: str, queue_name: str):
     
     return f"{depth_result}\n\nUse: podman exec ibm-mq-server /opt/mqm/samp/bin/amqsget {queue_name} {qmgr_name}"
 
-async def browse_messages(qmgr_name: str, queue_name: str):
-    # First get queue depth
-    depth_result = await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) CURDEPTH")
-    
-    # Try to browse actual message content using REST API
+async def browse_messages(qmgr_name: str, queue_name: str, page_size: int = mqbrowse.PAGE_SIZE, cursor: str = None, headers_only: bool = False, max_bytes: int = mqbrowse.MAX_BYTES):
     try:
-        result = await mq_request("GET", f"messaging/qmgr/{qmgr_name}/queue/{queue_name}/message")
-        if "error" not in result:
-            return f"Queue depth info:\n{depth_result}\n\nMessage content:\n{result}"
-    except:
-        pass
-    
-    return f"{depth_result}\n\nNote: To view message content, use: podman exec ibm-mq-server /opt/mqm/samp/bin/amqsbcg {queue_name} {qmgr_name}"
+        target = await endpoints.endpoint_for(qmgr_name)
+        page = await mqbrowse.browse_page(target, qmgr_name, queue_name, cursor, page_size, headers_only, max_bytes)
+    except (LookupError, ValueError) as e:
+        return f"Error: {e}"
+    if "error" in page:
+        return f"Error: {page['error']}"
+    return json.dumps(page, indent=2)
 
-async def get_queue_stats(qmgr_name: str, queue_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY QUEUE({queue_name}) ALL")
+async def get_queue_stats(qmgr_name: str, queue_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    cached = depths.lookup(qmgr_name, queue_name)
+    if cached is not None:
+        return mqdepth.format_status(*cached, output_format)
+    return await runmqsc(qmgr_name, f"DISPLAY QSTATUS({queue_name}) TYPE(QUEUE) ALL", output_format, page_size, cursor)
 
-async def get_channel_status(qmgr_name: str, channel_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY CHSTATUS({channel_name})")
+async def get_channel_status(qmgr_name: str, channel_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, f"DISPLAY CHSTATUS({channel_name})", output_format, page_size, cursor)
 
-async def list_connections(qmgr_name: str):
-    return await runmqsc(qmgr_name, "DISPLAY CONN(*)")
+async def list_connections(qmgr_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, "DISPLAY CONN(*)", output_format, page_size, cursor)
 
 async def refresh_security(qmgr_name: str):
     return await runmqsc(qmgr_name, "REFRESH SECURITY TYPE(CONNAUTH)")
 
-async def display_auth(qmgr_name: str, object_name: str):
-    return await runmqsc(qmgr_name, f"DISPLAY AUTHREC OBJNAME({object_name})")
+async def display_auth(qmgr_name: str, object_name: str, output_format: str = "text", page_size: int = None, cursor: str = None):
+    return await runmqsc(qmgr_name, f"DISPLAY AUTHREC OBJNAME({object_name})", output_format, page_size, cursor)
+
+# Change feeds
+async def subscribe(qmgr_name: str, feeds: list, name: str = "*"):
+    session = sse_sessions.CURRENT_SESSION.get()
+    if session is None:
+        return f"Error: subscribe pushes changes to an SSE session; POST to the message URL of GET /sse, or stream GET /watch/{qmgr_name}"
+    session_id = session.id
+
+    def push(event: dict):
+        # Look the session up each time: it may have closed, or be streamed by another worker
+        target = sessions.get(session_id)
+        if target is None:
+            sessions.untrack(session, event["subscription"])
+            return False
+        key = f"{event['subscription']}/{event['kind']}"
+        target.send({"jsonrpc": "2.0", "method": "notifications/mq/changes", "params": event}, key=key)
+        if target.stale(key):
+            # Some of this feed's events were dropped from a full stream buffer; a snapshot makes up for them
+            target.send({"jsonrpc": "2.0", "method": "notifications/mq/changes", "params": watcher.current(event)}, key=key)
+            target.stale(key)
+
+    try:
+        subscription = watcher.subscribe(qmgr_name, feeds, name, push)
+    except ValueError as e:
+        return f"Error: {e}"
+    if not sessions.is_open(session):
+        watcher.unsubscribe(subscription)
+        return "Error: The session closed"
+    # Quiet feeds never push, so the session's close ends the subscription rather than a failed push
+    sessions.track(session, subscription, lambda: watcher.unsubscribe(subscription))
+    return json.dumps({"subscription": subscription, "qmgr": qmgr_name, "feeds": feeds, "interval": watcher.interval})
+
+async def unsubscribe(subscription: str):
+    # Only the session that subscribed can end a subscription
+    session = sse_sessions.CURRENT_SESSION.get()
+    if session is None or not sessions.untrack(session, subscription):
+        return f"Error: Unknown subscription: {subscription}"
+    watcher.unsubscribe(subscription)
+    return f"Subscription {subscription} ended"
+
+# Batch
+async def batch(calls: list, max_concurrency: int = None):
+    results = await mqbatch.run_batch(calls, run_tool, max_concurrency)
+    return json.dumps(results, indent=2)
+
+# Diagnostics
+async def server_stats():
+    return json.dumps({"pool": mqrest.pool_stats(), "cache": mqcache.RESULT_CACHE.snapshot(), "depth_poller": depths.snapshot_stats(), "endpoints": endpoints.snapshot(), "scheduler": scheduler.snapshot(), "pages": mqpage.PAGES.snapshot(), "watch": watcher.snapshot()}, indent=2)
 
 # MCP Message Handler
 async def mcp_message_handler(message: dict):
@@ -225,22 +393,23 @@ async def mcp_message_handler(message: dict):
                 "serverInfo": {"name": "raghi-mq-sse-server", "version": "1.0.0"}
             }
         }
+    elif message.get("method") == "ping":
+        return {"jsonrpc": "2.0", "id": message.get("id"), "result": {}}
     elif message.get("method") == "tools/list":
-        tools = await list_tools()
         return {
             "jsonrpc": "2.0",
             "id": message.get("id"),
-            "result": {"tools": [tool.model_dump() for tool in tools]}
+            "result": {"tools": TOOLS}
         }
     elif message.get("method") == "tools/call":
         params = message.get("params", {})
         name = params.get("name")
         arguments = params.get("arguments", {})
-        result = await call_tool(name, arguments)
+        result = await run_tool(name, arguments)
         return {
             "jsonrpc": "2.0",
             "id": message.get("id"),
-            "result": {"content": [content.model_dump() for content in result]}
+            "result": {"content": [{"type": "text", "text": result}]}
         }
     else:
         return {
@@ -253,38 +422,153 @@ async def mcp_message_handler(message: dict):
 @app.api_route("/sse", methods=["GET", "POST", "OPTIONS"])
 @app.api_route("/mcp/sse", methods=["GET", "POST", "OPTIONS"])
 async def mcp_sse(request: Request):
-    async def sse_stream():
-        try:
-            yield "data: " + json.dumps({"type": "connection", "status": "connected"}) + "\n\n"
-            while True:
-                if await request.is_disconnected():
-                    break
-                await asyncio.sleep(5)
-                yield "data: " + json.dumps({"type": "ping", "timestamp": asyncio.get_event_loop().time()}) + "\n\n"
-        except Exception as e:
-            yield "data: " + json.dumps({"type": "error", "message": str(e)}) + "\n\n"
-    
+    # A client reconnecting after a dropped stream resumes its session from Last-Event-ID
+    last_event_id = request.headers.get("last-event-id")
+    session = await sessions.open(last_event_id)
     return StreamingResponse(
-        sse_stream(),
+        sessions.stream(session, "/mcp/message", last_event_id),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "*",
-            "X-Accel-Buffering": "no"
-        }
+        headers=sse_sessions.SSE_HEADERS
     )
 
 @app.post("/mcp/message")
-async def mcp_message(message: dict):
-    response = await mcp_message_handler(message)
-    return response
+async def mcp_message(request: Request, session_id: str = None):
+    # The body is parsed and the answer serialized here, skipping FastAPI's model validation and encoding
+    try:
+        message = sse_sessions.loads(await request.body())
+    except ValueError as e:
+        return json_response(sse_sessions.error_response(None, -32700, f"Parse error: {e}"))
+    if not isinstance(message, (dict, list)):
+        return json_response(sse_sessions.error_response(None, -32600, "Invalid Request"))
+    # Without a session the response is returned directly (plain HTTP clients)
+    if session_id is None:
+        if isinstance(message, dict) and message.get("method") == "tools/list" and message.get("id") is not None:
+            body = b'{"jsonrpc":"2.0","id":' + sse_sessions.dumps(message.get("id")) + b',"result":' + TOOLS_JSON + b"}"
+            return json_response(body, {"ETag": TOOLS_ETAG})
+        response = await sse_sessions.dispatch(message, mcp_message_handler)
+        return Response(status_code=202) if response is None else json_response(response)
+    session = await sessions.find(session_id)
+    if session is None:
+        return JSONResponse({"error": f"Unknown session: {session_id}"}, status_code=404)
+    sessions.submit(session, message, mcp_message_handler)
+    return Response(status_code=202)
+
+def json_response(content, headers: dict = None) -> Response:
+    """JSON response from a value or already serialized bytes."""
+    body = content if isinstance(content, bytes) else sse_sessions.dumps(content)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/mcp/tools")
+async def mcp_tools(request: Request):
+    # The tool catalogue for plain HTTP clients, revalidated with If-None-Match
+    if request.headers.get("if-none-match") == TOOLS_ETAG:
+        return Response(status_code=304, headers={"ETag": TOOLS_ETAG})
+    return json_response(TOOLS_JSON, {"ETag": TOOLS_ETAG})
+
+@app.get("/browse/{qmgr_name}/{queue_name}")
+async def browse_stream(qmgr_name: str, queue_name: str, page_size: int = mqbrowse.PAGE_SIZE, headers_only: bool = False, max_bytes: int = mqbrowse.MAX_BYTES):
+    # Streams every message on the queue as one SSE event each, fetching a page at a time
+    async def events():
+        try:
+            target = await endpoints.endpoint_for(qmgr_name)
+        except LookupError as e:
+            yield sse_sessions.encode({"error": str(e)}, "error")
+            return
+        count = 0
+        async for message in mqbrowse.browse_all(target, qmgr_name, queue_name, page_size, headers_only, max_bytes):
+            if "error" in message:
+                yield sse_sessions.encode(message, "error")
+                return
+            count += 1
+            yield sse_sessions.encode(message)
+        yield sse_sessions.encode({"count": count}, "end")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=sse_sessions.SSE_HEADERS)
+
+@app.get("/mqsc/{qmgr_name}")
+async def mqsc_stream(qmgr_name: str, command: str, output_format: str = "text"):
+    # Streams a DISPLAY command's result as one SSE event per MQ object, each forwarded as soon as mqweb sends it
+    if mqcache.parse(mqcache.normalize(command))[0] != "DISPLAY":
+        return JSONResponse({"error": "Only DISPLAY commands can be streamed"}, status_code=400)
+    if output_format not in ("text", "json"):
+        return JSONResponse({"error": f"Unknown format: {output_format}"}, status_code=400)
+    try:
+        data = mqsc.to_json_request(command) if output_format == "json" else {"type": "runCommand", "parameters": {"command": command}}
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    async def events():
+        rest, count = {}, 0
+        try:
+            async for item in endpoints.stream("POST", f"action/qmgr/{qmgr_name}/mqsc", data, rest=rest):
+                count += 1
+                yield sse_sessions.encode(item if output_format == "json" else {"text": "\n".join(item.get("text", []))})
+        except ValueError as e:
+            yield sse_sessions.encode({"error": str(e)}, "error")
+            return
+        yield sse_sessions.encode(dict(rest, count=count), "end")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=sse_sessions.SSE_HEADERS)
+
+@app.get("/watch/{qmgr_name}")
+async def watch_stream(qmgr_name: str, feeds: str = ",".join(mqwatch.KINDS), name: str = "*"):
+    # Change feed as plain SSE for dashboards: one snapshot event per feed, then delta events
+    events = sse_sessions.FrameBuffer()
+
+    def push(event: dict):
+        events.put_nowait(sse_sessions.encode(event, event["type"]), event["kind"])
+        if events.take_dropped(event["kind"]):
+            # Some of this feed's events were dropped from a full stream buffer; a snapshot makes up for them
+            events.put_nowait(sse_sessions.encode(watcher.current(event), "snapshot"), event["kind"])
+            events.take_dropped(event["kind"])
+
+    try:
+        subscription = watcher.subscribe(qmgr_name, feeds.split(","), name, push)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    async def frames():
+        # The shared heartbeat puts ping frames on the same buffer
+        sse_sessions.HEARTBEAT.add(events)
+        try:
+            while (frame := await events.get()) is not None:
+                yield frame
+        finally:
+            sse_sessions.HEARTBEAT.discard(events)
+            events.close()
+            watcher.unsubscribe(subscription)
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers=sse_sessions.SSE_HEADERS)
 
 @app.get("/health")
 async def health():
     return {"status": "healthy", "server": "raghi-mq-sse-server"}
 
+@app.get("/metrics")
+async def metrics():
+    mqmetrics.SSE_SESSIONS.set(len(sessions))
+    return Response(mqmetrics.render(), media_type=mqmetrics.CONTENT_TYPE)
+
+@app.get("/stats")
+async def stats():
+    return {"pool": mqrest.pool_stats(), "cache": mqcache.RESULT_CACHE.snapshot(), "depth_poller": depths.snapshot_stats(), "endpoints": endpoints.snapshot(), "scheduler": scheduler.snapshot(), "pages": mqpage.PAGES.snapshot(), "watch": watcher.snapshot(), "sse_sessions": len(sessions),
+            "heartbeat": {"streams": len(sse_sessions.HEARTBEAT), "pings": sse_sessions.HEARTBEAT.pings},
+            "sse_buffers": {"policy": sse_sessions.OVERFLOW, "max_bytes": sse_sessions.BUFFER_BYTES, "max_frames": sse_sessions.BUFFER_FRAMES},
+            "cluster": sessions.snapshot() if CLUSTER_DIR else None}
+
 if __name__ == "__main__":
+    import shutil
+    import tempfile
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    port = int(os.getenv("PORT", "8000"))
+    workers = int(os.getenv("MCP_SSE_WORKERS", "1"))
+    if workers > 1:
+        # Workers import the app themselves, so hand them the shared directory through the environment
+        cluster_dir = CLUSTER_DIR or tempfile.mkdtemp(prefix="mcp-sse-")
+        os.environ["MCP_SSE_CLUSTER_DIR"] = cluster_dir
+        uvicorn.run("raghi-sse-server:app", host="0.0.0.0", port=port, workers=workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+        if not CLUSTER_DIR:
+            shutil.rmtree(cluster_dir, ignore_errors=True)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file